@@ -0,0 +1,132 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# 共用的直方图/核密度计算位于上一级目录（report/distribution.py）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from distribution import histogram_kde
+
+# 流失报告的聚合引擎：一次遍历数据，得到所有图表需要的小表
+#   - 每个分类列 × Churn 的计数和流失率（factorize 后对组合编码做一次 bincount）
+#   - 每个数值列按 Churn 分组的箱线图统计量（四分位数、须、离群点），可直接传给 ax.bxp
+#   - 每个数值列按 Churn 分组的直方图和核密度曲线（distribution.histogram_kde，分组在同一遍中完成）
+#   - 数值列相关系数矩阵（由一次 XᵀX 得到）
+# 之后绘图只使用这些小表，耗时与客户数量无关。
+
+DEFAULT_BINS = 30
+MAX_FLIERS = 1000
+
+
+def _factorize(values: pd.Series) -> tuple:
+    """把一列转换为整数编码（缺失值为 -1）和有序的取值列表。"""
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, list(uniques)
+
+
+def category_counts(codes: np.ndarray, levels: list, target_codes: np.ndarray, target_levels: list) -> pd.DataFrame:
+    """
+    用一次 bincount 统计 分类取值 × 目标取值 的计数。
+
+    返回:
+        pandas.DataFrame: 行为分类取值、列为目标取值的计数表
+    """
+    valid = (codes >= 0) & (target_codes >= 0)
+    combined = codes[valid] * len(target_levels) + target_codes[valid]
+    counts = np.bincount(combined, minlength=len(levels) * len(target_levels))
+    return pd.DataFrame(counts.reshape(len(levels), len(target_levels)),
+                        index=pd.Index(levels), columns=pd.Index(target_levels))
+
+
+def box_stats(values: np.ndarray, whis: float = 1.5, max_fliers: int = MAX_FLIERS) -> dict:
+    """
+    计算与 seaborn/matplotlib 箱线图一致的统计量（可直接传给 ax.bxp）。
+
+    离群点超过 max_fliers 个时均匀抽取 max_fliers 个（保留最小和最大值），
+    使图表大小不随数据量增长。
+    """
+    data = np.sort(values[~np.isnan(values)])
+    if not len(data):
+        return {'med': np.nan, 'q1': np.nan, 'q3': np.nan, 'whislo': np.nan, 'whishi': np.nan,
+                'mean': np.nan, 'fliers': np.empty(0), 'count': 0}
+    q1, med, q3 = np.quantile(data, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    lo = data[np.searchsorted(data, q1 - whis * iqr, side='left')]
+    hi = data[np.searchsorted(data, q3 + whis * iqr, side='right') - 1]
+    fliers = np.concatenate([data[data < lo], data[data > hi]])
+    if len(fliers) > max_fliers:
+        fliers = fliers[np.linspace(0, len(fliers) - 1, max_fliers).round().astype(int)]
+    return {'med': med, 'q1': q1, 'q3': q3, 'whislo': lo, 'whishi': hi, 'mean': data.mean(),
+            'fliers': fliers, 'count': len(data)}
+
+
+def compute_aggregates(df: pd.DataFrame, categorical_cols: list, numeric_cols: list,
+                       target: str = 'Churn', bins: int = DEFAULT_BINS) -> dict:
+    """
+    一次遍历数据，计算报告中所有图表需要的聚合表。
+
+    参数:
+        df (pandas.DataFrame): 清洗后的流失数据
+        categorical_cols (list): 需要按 Churn 计数的分类列
+        numeric_cols (list): 需要直方图和箱线图的数值列
+        target (str): 目标列，默认为'Churn'
+        bins (int): 直方图分箱数
+
+    返回:
+        dict: {
+            'target_levels': 目标取值列表,
+            'target_counts': 各目标取值的计数 (Series),
+            'counts': {分类列: 计数表},
+            'rates': {分类列: 各取值的流失率 (Series)，目标取值为 'Yes' 的比例},
+            'box': {数值列: {目标取值: box_stats}},
+            'hist': {数值列: {'edges': 分箱边界, 'counts': {目标取值: 计数}}},
+            'density': {数值列: {'x': 网格, 'y': {目标取值: 曲线}}},
+            'corr': 数值列相关系数矩阵,
+            'rows': 行数
+        }
+    """
+    target_codes, target_levels = _factorize(df[target])
+    n_target = len(target_levels)
+    target_counts = pd.Series(np.bincount(target_codes[target_codes >= 0], minlength=n_target),
+                              index=pd.Index(target_levels, name=target))
+    positive = target_levels.index('Yes') if 'Yes' in target_levels else n_target - 1
+
+    counts, rates = {}, {}
+    for col in categorical_cols:
+        codes, levels = _factorize(df[col])
+        table = category_counts(codes, levels, target_codes, target_levels)
+        table.index.name = col
+        counts[col] = table
+        totals = table.sum(axis=1)
+        rates[col] = (table.iloc[:, positive] / totals.where(totals > 0)).rename('churn_rate')
+
+    # 按目标取值分组：一次稳定排序后各组为连续切片，所有数值列共用
+    order = np.argsort(target_codes, kind='stable')
+    bounds = np.searchsorted(target_codes[order], np.arange(n_target + 1))
+
+    box, hist, density = {}, {}, {}
+    numeric = np.column_stack([df[col].to_numpy(dtype='float64') for col in numeric_cols]) \
+        if numeric_cols else np.empty((len(df), 0))
+    for position, col in enumerate(numeric_cols):
+        values = numeric[:, position]
+        box[col] = {level: box_stats(values[order[bounds[t]:bounds[t + 1]]])
+                    for t, level in enumerate(target_levels)}
+        dist = histogram_kde(values, target_codes, target_levels, bins=bins)
+        hist[col] = {'edges': dist['edges'], 'counts': dict(zip(target_levels, dist['counts']))}
+        density[col] = {'x': dist['x'], 'y': dict(zip(target_levels, dist['density']))}
+
+    corr = pd.DataFrame(_correlation(numeric), index=numeric_cols, columns=numeric_cols)
+    return {'target_levels': target_levels, 'target_counts': target_counts, 'counts': counts,
+            'rates': rates, 'box': box, 'hist': hist, 'density': density, 'corr': corr, 'rows': len(df)}
+
+
+def _correlation(X: np.ndarray) -> np.ndarray:
+    """由一次 XᵀX 计算皮尔逊相关系数（忽略含缺失值的行，与 DataFrame.corr 的逐对处理在无缺失时一致）。"""
+    X = X[~np.isnan(X).any(axis=1)]
+    if not len(X):
+        return np.full((X.shape[1], X.shape[1]), np.nan)
+    centered = X - X.mean(axis=0)
+    cov = centered.T @ centered
+    std = np.sqrt(np.diag(cov))
+    return cov / np.outer(std, std)
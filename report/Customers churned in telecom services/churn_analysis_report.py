@@ -1,265 +1,350 @@
+import argparse
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # Headless backend: figures are only saved, never shown
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import warnings
+
+from churn_aggregates import compute_aggregates
+from churn_data import load_churn
 
 # Basic Configuration
 warnings.filterwarnings('ignore')
-sns.set_style('whitegrid')
-plt.rcParams['font.sans-serif'] = ['SimHei']  # Use SimHei font for Chinese characters
-plt.rcParams['axes.unicode_minus'] = False  # Fix for displaying negative signs
 
-# --- Checklist Step 1: Load Data ---
-print("\n--- 1. Loading Data ---")
-file_path = 'report/Customers churned in telecom services/customer_churn_telecom_services.csv'
-try:
-    df = pd.read_csv(file_path)
-    print(f"Successfully loaded data from {file_path}")
-    print("First 5 rows:")
-    print(df.head().to_markdown(index=False))
-except FileNotFoundError:
-    print(f"Error: File not found at {file_path}")
-    exit()
-
-# --- Checklist Step 2: Initial Inspection ---
-print("\n--- 2. Initial Inspection ---")
-print("DataFrame Info:")
-df.info()
-print("\nInitial Missing Values:")
-print(df.isnull().sum())
-
-# --- Checklist Step 3: Clean TotalCharges ---
-print("\n--- 3. Cleaning TotalCharges ---")
-# Convert TotalCharges to numeric, coercing errors (spaces become NaN)
-df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce')
-
-# Check how many NaNs were introduced
-nan_count = df['TotalCharges'].isnull().sum()
-print(f"Found {nan_count} rows with non-numeric TotalCharges (converted to NaN).")
-
-# Investigate NaN rows, often related to tenure=0
-nan_rows = df[df['TotalCharges'].isnull()][['tenure', 'MonthlyCharges', 'TotalCharges']]
-print("Rows where TotalCharges became NaN:")
-if not nan_rows.empty:
-    print(nan_rows.to_markdown(index=False))
-    # Impute NaN TotalCharges with 0 where tenure is 0
-    zero_tenure_nan_indices = nan_rows[nan_rows['tenure'] == 0].index
-    if not zero_tenure_nan_indices.empty:
-        df.loc[zero_tenure_nan_indices, 'TotalCharges'] = 0
-        print(f"Imputed {len(zero_tenure_nan_indices)} NaN TotalCharges with 0 for tenure=0 customers.")
-    else:
-        print("No NaN TotalCharges found for tenure=0 customers. Further investigation needed if NaNs remain.")
-else:
-    print("No rows found where TotalCharges became NaN.")
-
-
-# Verify imputation
-print("\nMissing Values After Cleaning TotalCharges:")
-print(df.isnull().sum())
-# Drop any remaining rows with NaN TotalCharges if they exist (shouldn't based on common cases)
-df.dropna(subset=['TotalCharges'], inplace=True)
-print(f"DataFrame shape after handling TotalCharges NaN: {df.shape}")
-
-
-# --- Checklist Step 4: Convert SeniorCitizen ---
-print("\n--- 4. Converting SeniorCitizen ---")
-df['SeniorCitizen'] = df['SeniorCitizen'].map({0: 'No', 1: 'Yes'})
-print("Converted SeniorCitizen to 'Yes'/'No':")
-print(df['SeniorCitizen'].value_counts())
-
-# Add customerID removal - often not useful for analysis itself
-if 'customerID' in df.columns:
-    print("\nRemoving customerID column.")
-    df = df.drop('customerID', axis=1, errors='ignore')
-
-
-# --- Checklist Step 5 & 6: Overall Churn Rate & Visualization ---
-print("\n--- 5 & 6. Overall Churn Rate ---")
-churn_rate = df['Churn'].value_counts(normalize=True) * 100
-print("Overall Churn Rate (%):")
-print(churn_rate)
-
-plt.figure(figsize=(6, 4))
-sns.countplot(x='Churn', data=df, palette='viridis')
-plt.title('整体客户流失分布')
-plt.xlabel('是否流失')
-plt.ylabel('客户数量')
-plt.tight_layout()
-plt.savefig('churn_distribution.png')
-print("Saved plot: churn_distribution.png")
-# plt.show() # Keep commented out for non-interactive execution
-
-# --- Checklist Step 7: Demographic Analysis vs. Churn ---
-print("\n--- 7. Demographic Analysis vs. Churn ---")
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_PATH = os.path.join(SCRIPT_DIR, 'customer_churn_telecom_services.csv')
+
 demographic_cols = ['gender', 'SeniorCitizen', 'Partner', 'Dependents']
-fig, axes = plt.subplots(1, len(demographic_cols), figsize=(18, 5), sharey=True)
-fig.suptitle('人口统计特征与客户流失关系', fontsize=16)
-
-for i, col in enumerate(demographic_cols):
-    sns.countplot(x=col, hue='Churn', data=df, ax=axes[i], palette='viridis')
-    axes[i].set_title(f'{col} vs Churn')
-    axes[i].set_xlabel(col)
-    axes[i].set_ylabel('客户数量' if i == 0 else '')
-    axes[i].tick_params(axis='x', rotation=10)
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.95]) # Adjust layout to prevent title overlap
-plt.savefig('demographic_churn_analysis.png')
-print("Saved plot: demographic_churn_analysis.png")
-# plt.show()
-
-# --- Checklist Step 8 & 9: Tenure Analysis vs. Churn ---
-print("\n--- 8 & 9. Tenure Analysis vs. Churn ---")
-fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-fig.suptitle('客户任期 (Tenure) 与流失关系', fontsize=16)
-
-# Histogram
-sns.histplot(data=df, x='tenure', hue='Churn', kde=True, ax=axes[0], palette='viridis')
-axes[0].set_title('任期分布 (按是否流失区分)')
-axes[0].set_xlabel('任期 (月)')
-axes[0].set_ylabel('客户数量')
-
-# Box Plot
-sns.boxplot(x='Churn', y='tenure', data=df, ax=axes[1], palette='viridis')
-axes[1].set_title('任期箱线图 (按是否流失区分)')
-axes[1].set_xlabel('是否流失')
-axes[1].set_ylabel('任期 (月)')
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-plt.savefig('tenure_churn_analysis.png')
-print("Saved plot: tenure_churn_analysis.png")
-# plt.show()
-
-avg_tenure = df.groupby('Churn')['tenure'].mean()
-print("\nAverage Tenure by Churn Status:")
-print(avg_tenure)
-
-# --- Checklist Step 10: Phone/MultipleLines Analysis vs. Churn ---
-print("\n--- 10. Phone Service Analysis vs. Churn ---")
 phone_cols = ['PhoneService', 'MultipleLines']
-fig, axes = plt.subplots(1, len(phone_cols), figsize=(12, 5), sharey=True)
-fig.suptitle('电话服务与客户流失关系', fontsize=16)
-
-for i, col in enumerate(phone_cols):
-    sns.countplot(x=col, hue='Churn', data=df, ax=axes[i], palette='viridis')
-    axes[i].set_title(f'{col} vs Churn')
-    axes[i].set_xlabel(col)
-    axes[i].set_ylabel('客户数量' if i == 0 else '')
-    axes[i].tick_params(axis='x', rotation=10)
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-plt.savefig('phone_churn_analysis.png')
-print("Saved plot: phone_churn_analysis.png")
-# plt.show()
-
-# --- Checklist Step 11: Internet Service Analysis vs. Churn ---
-print("\n--- 11. Internet Service Analysis vs. Churn ---")
 internet_cols = ['InternetService', 'OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies']
-n_cols = 3
-n_rows = (len(internet_cols) + n_cols - 1) // n_cols # Calculate rows needed
-fig, axes = plt.subplots(n_rows, n_cols, figsize=(18, 5 * n_rows), sharey=True)
-fig.suptitle('互联网服务与客户流失关系', fontsize=16)
-axes = axes.flatten() # Flatten axes array for easy iteration
-
-for i, col in enumerate(internet_cols):
-    sns.countplot(x=col, hue='Churn', data=df, ax=axes[i], palette='viridis')
-    axes[i].set_title(f'{col} vs Churn')
-    axes[i].set_xlabel(col)
-    axes[i].set_ylabel('客户数量' if i % n_cols == 0 else '')
-    axes[i].tick_params(axis='x', rotation=10)
-
-# Hide any unused subplots
-for j in range(i + 1, len(axes)):
-    fig.delaxes(axes[j])
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.97]) # Adjust layout
-plt.savefig('internet_churn_analysis.png')
-print("Saved plot: internet_churn_analysis.png")
-# plt.show()
-
-# --- Checklist Step 12: Account Info Analysis vs. Churn ---
-print("\n--- 12. Account Information Analysis vs. Churn ---")
 account_cols = ['Contract', 'PaperlessBilling', 'PaymentMethod']
-n_cols = 3
-n_rows = (len(account_cols) + n_cols - 1) // n_cols
-fig, axes = plt.subplots(n_rows, n_cols, figsize=(18, 5 * n_rows), sharey=True)
-fig.suptitle('账户信息与客户流失关系', fontsize=16)
-axes = axes.flatten()
-
-for i, col in enumerate(account_cols):
-    sns.countplot(x=col, hue='Churn', data=df, ax=axes[i], palette='viridis')
-    axes[i].set_title(f'{col} vs Churn')
-    axes[i].set_xlabel(col)
-    axes[i].set_ylabel('客户数量' if i % n_cols == 0 else '')
-    axes[i].tick_params(axis='x', rotation=15) # Increased rotation for payment method
-
-# Hide unused subplots
-for j in range(i + 1, len(axes)):
-    fig.delaxes(axes[j])
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-plt.savefig('account_churn_analysis.png')
-print("Saved plot: account_churn_analysis.png")
-# plt.show()
-
-
-# --- Checklist Step 13 & 14: MonthlyCharges Analysis vs. Churn ---
-print("\n--- 13 & 14. Monthly Charges Analysis vs. Churn ---")
-fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-fig.suptitle('月度费用 (MonthlyCharges) 与流失关系', fontsize=16)
-
-# Histogram
-sns.histplot(data=df, x='MonthlyCharges', hue='Churn', kde=True, ax=axes[0], palette='viridis')
-axes[0].set_title('月度费用分布 (按是否流失区分)')
-axes[0].set_xlabel('月度费用')
-axes[0].set_ylabel('客户数量')
-
-# Box Plot
-sns.boxplot(x='Churn', y='MonthlyCharges', data=df, ax=axes[1], palette='viridis')
-axes[1].set_title('月度费用箱线图 (按是否流失区分)')
-axes[1].set_xlabel('是否流失')
-axes[1].set_ylabel('月度费用')
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-plt.savefig('monthlycharges_churn_analysis.png')
-print("Saved plot: monthlycharges_churn_analysis.png")
-# plt.show()
-
-# --- Checklist Step 15 & 16: TotalCharges Analysis vs. Churn ---
-print("\n--- 15 & 16. Total Charges Analysis vs. Churn ---")
-fig, axes = plt.subplots(1, 2, figsize=(14, 5))
-fig.suptitle('总费用 (TotalCharges) 与流失关系', fontsize=16)
-
-# Histogram
-sns.histplot(data=df, x='TotalCharges', hue='Churn', kde=True, ax=axes[0], palette='viridis')
-axes[0].set_title('总费用分布 (按是否流失区分)')
-axes[0].set_xlabel('总费用')
-axes[0].set_ylabel('客户数量')
-
-# Box Plot
-sns.boxplot(x='Churn', y='TotalCharges', data=df, ax=axes[1], palette='viridis')
-axes[1].set_title('总费用箱线图 (按是否流失区分)')
-axes[1].set_xlabel('是否流失')
-axes[1].set_ylabel('总费用')
-
-plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-plt.savefig('totalcharges_churn_analysis.png')
-print("Saved plot: totalcharges_churn_analysis.png")
-# plt.show()
-
-# --- Checklist Step 17 & 18: Numerical Feature Correlation ---
-print("\n--- 17 & 18. Numerical Feature Correlation ---")
 numerical_cols = ['tenure', 'MonthlyCharges', 'TotalCharges']
-correlation_matrix = df[numerical_cols].corr()
-print("Correlation Matrix:")
-print(correlation_matrix)
-
-plt.figure(figsize=(8, 6))
-sns.heatmap(correlation_matrix, annot=True, cmap='viridis', fmt=".2f", linewidths=.5)
-plt.title('数值特征相关性热力图')
-plt.tight_layout()
-plt.savefig('numerical_correlation_heatmap.png')
-print("Saved plot: numerical_correlation_heatmap.png")
-# plt.show()
-
-print("\n--- Analysis Script Completed ---") 
\ No newline at end of file
+
+
+def configure_style():
+    sns.set_style('whitegrid')
+    plt.rcParams['font.sans-serif'] = ['SimHei']  # Use SimHei font for Chinese characters
+    plt.rcParams['axes.unicode_minus'] = False  # Fix for displaying negative signs
+
+
+# --- Checklist Step 1: Load Data ---
+def load_data(file_path, use_snapshot=True):
+    print("\n--- 1. Loading Data ---")
+    try:
+        # Typed columns (category/int8/float32); reuses the binary snapshot when the CSV is unchanged
+        df = load_churn(file_path, use_snapshot=use_snapshot)
+    except FileNotFoundError:
+        print(f"Error: File not found at {file_path}")
+        return None
+    print(f"Successfully loaded data from {file_path} ({df.memory_usage(deep=True).sum() / 1e6:.2f} MB in memory)")
+    if df.attrs.get('total_charges_imputed'):
+        print(f"Blank TotalCharges set to 0 for {df.attrs['total_charges_imputed']} tenure=0 customers during parsing.")
+    print("First 5 rows:")
+    print(df.head().to_markdown(index=False))
+    return df
+
+
+def clean_data(df):
+    # --- Checklist Step 2: Initial Inspection ---
+    print("\n--- 2. Initial Inspection ---")
+    print("DataFrame Info:")
+    df.info()
+    print("\nInitial Missing Values:")
+    print(df.isnull().sum())
+
+    # --- Checklist Step 3: Clean TotalCharges ---
+    print("\n--- 3. Cleaning TotalCharges ---")
+    # Convert TotalCharges to numeric, coercing errors (spaces become NaN)
+    df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce')
+
+    # Check how many NaNs were introduced
+    nan_count = df['TotalCharges'].isnull().sum()
+    print(f"Found {nan_count} rows with non-numeric TotalCharges (converted to NaN).")
+
+    # Investigate NaN rows, often related to tenure=0
+    nan_rows = df[df['TotalCharges'].isnull()][['tenure', 'MonthlyCharges', 'TotalCharges']]
+    print("Rows where TotalCharges became NaN:")
+    if not nan_rows.empty:
+        print(nan_rows.to_markdown(index=False))
+        # Impute NaN TotalCharges with 0 where tenure is 0
+        zero_tenure_nan_indices = nan_rows[nan_rows['tenure'] == 0].index
+        if not zero_tenure_nan_indices.empty:
+            df.loc[zero_tenure_nan_indices, 'TotalCharges'] = 0
+            print(f"Imputed {len(zero_tenure_nan_indices)} NaN TotalCharges with 0 for tenure=0 customers.")
+        else:
+            print("No NaN TotalCharges found for tenure=0 customers. Further investigation needed if NaNs remain.")
+    else:
+        print("No rows found where TotalCharges became NaN.")
+
+    # Verify imputation
+    print("\nMissing Values After Cleaning TotalCharges:")
+    print(df.isnull().sum())
+    # Drop any remaining rows with NaN TotalCharges if they exist (shouldn't based on common cases)
+    df.dropna(subset=['TotalCharges'], inplace=True)
+    print(f"DataFrame shape after handling TotalCharges NaN: {df.shape}")
+
+    # --- Checklist Step 4: Convert SeniorCitizen ---
+    print("\n--- 4. Converting SeniorCitizen ---")
+    df['SeniorCitizen'] = df['SeniorCitizen'].map({0: 'No', 1: 'Yes'})
+    print("Converted SeniorCitizen to 'Yes'/'No':")
+    print(df['SeniorCitizen'].value_counts())
+
+    # Add customerID removal - often not useful for analysis itself
+    if 'customerID' in df.columns:
+        print("\nRemoving customerID column.")
+        df = df.drop('customerID', axis=1, errors='ignore')
+    return df
+
+
+def aggregate(df):
+    """A single pass over the data for every figure and summary below."""
+    print("\n--- Aggregating Data ---")
+    agg = compute_aggregates(df, demographic_cols + phone_cols + internet_cols + account_cols, numerical_cols)
+    print(f"Aggregated {agg['rows']} rows into {len(agg['counts'])} count tables and {len(agg['hist'])} distributions.")
+    return agg
+
+
+def print_summaries(agg):
+    # --- Checklist Step 5: Overall Churn Rate ---
+    print("\n--- 5. Overall Churn Rate ---")
+    churn_rate = agg['target_counts'] / agg['target_counts'].sum() * 100
+    print("Overall Churn Rate (%):")
+    print(churn_rate)
+
+    # --- Checklist Step 9: Average Tenure ---
+    avg_tenure = pd.Series({level: agg['box']['tenure'][level]['mean'] for level in agg['target_levels']},
+                           name='tenure')
+    avg_tenure.index.name = 'Churn'
+    print("\nAverage Tenure by Churn Status:")
+    print(avg_tenure)
+
+    # --- Checklist Step 17: Numerical Feature Correlation ---
+    print("\nCorrelation Matrix:")
+    print(agg['corr'])
+
+
+# --- Plot helpers: everything is drawn from the precomputed tables in agg ---
+def _palette(agg):
+    return sns.color_palette('viridis', len(agg['target_levels']))
+
+
+def plot_counts(ax, table, palette):
+    """Grouped bars per category and Churn level (the layout of sns.countplot with hue='Churn')."""
+    x = np.arange(len(table.index))
+    width = 0.8 / len(table.columns)
+    for j, level in enumerate(table.columns):
+        ax.bar(x - 0.4 + width * (j + 0.5), table[level].to_numpy(), width, color=palette[j], label=level)
+    ax.set_xticks(x)
+    ax.set_xticklabels([str(v) for v in table.index])
+    ax.legend(title='Churn')
+
+
+def plot_distribution(ax, agg, col):
+    """Layered histogram plus KDE curve per Churn level (like sns.histplot(hue='Churn', kde=True))."""
+    palette = _palette(agg)
+    edges = agg['hist'][col]['edges']
+    for j, level in enumerate(agg['target_levels']):
+        ax.stairs(agg['hist'][col]['counts'][level], edges, fill=True, alpha=0.5, color=palette[j], label=level)
+        ax.plot(agg['density'][col]['x'], agg['density'][col]['y'][level], color=palette[j])
+    ax.legend(title='Churn')
+
+
+def plot_box(ax, agg, col):
+    """Box plot per Churn level from the precomputed quartiles, whiskers and fliers."""
+    stats = [dict(agg['box'][col][level], label=level) for level in agg['target_levels']]
+    boxes = ax.bxp(stats, showfliers=True, patch_artist=True, widths=0.6)
+    for patch, color in zip(boxes['boxes'], _palette(agg)):
+        patch.set_facecolor(color)
+
+
+# --- Render tasks: each one builds and saves a single figure ---
+def render_churn_distribution(agg, output_path):
+    # --- Checklist Step 6: Overall Churn Visualization ---
+    plt.figure(figsize=(6, 4))
+    plt.bar([str(v) for v in agg['target_levels']], agg['target_counts'].to_numpy(), color=_palette(agg))
+    plt.title('整体客户流失分布')
+    plt.xlabel('是否流失')
+    plt.ylabel('客户数量')
+    plt.tight_layout()
+    plt.savefig(output_path)
+
+
+def _render_count_grid(agg, output_path, cols, title, n_cols, figsize, rotation, rect):
+    n_rows = (len(cols) + n_cols - 1) // n_cols
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=figsize, sharey=True)
+    fig.suptitle(title, fontsize=16)
+    axes = np.atleast_1d(axes).flatten()
+    palette = _palette(agg)
+
+    for i, col in enumerate(cols):
+        plot_counts(axes[i], agg['counts'][col], palette)
+        axes[i].set_title(f'{col} vs Churn')
+        axes[i].set_xlabel(col)
+        axes[i].set_ylabel('客户数量' if i % n_cols == 0 else '')
+        axes[i].tick_params(axis='x', rotation=rotation)
+
+    # Hide any unused subplots
+    for j in range(len(cols), len(axes)):
+        fig.delaxes(axes[j])
+
+    plt.tight_layout(rect=rect)  # Adjust layout to prevent title overlap
+    plt.savefig(output_path)
+
+
+def render_demographic(agg, output_path):
+    # --- Checklist Step 7: Demographic Analysis vs. Churn ---
+    _render_count_grid(agg, output_path, demographic_cols, '人口统计特征与客户流失关系',
+                       len(demographic_cols), (18, 5), 10, [0, 0.03, 1, 0.95])
+
+
+def render_phone(agg, output_path):
+    # --- Checklist Step 10: Phone/MultipleLines Analysis vs. Churn ---
+    _render_count_grid(agg, output_path, phone_cols, '电话服务与客户流失关系',
+                       len(phone_cols), (12, 5), 10, [0, 0.03, 1, 0.95])
+
+
+def render_internet(agg, output_path):
+    # --- Checklist Step 11: Internet Service Analysis vs. Churn ---
+    n_rows = (len(internet_cols) + 2) // 3
+    _render_count_grid(agg, output_path, internet_cols, '互联网服务与客户流失关系',
+                       3, (18, 5 * n_rows), 10, [0, 0.03, 1, 0.97])
+
+
+def render_account(agg, output_path):
+    # --- Checklist Step 12: Account Info Analysis vs. Churn ---
+    # Increased rotation for payment method
+    _render_count_grid(agg, output_path, account_cols, '账户信息与客户流失关系',
+                       3, (18, 5), 15, [0, 0.03, 1, 0.95])
+
+
+def _render_numeric(agg, output_path, col, title, hist_title, box_title, label):
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig.suptitle(title, fontsize=16)
+
+    # Histogram
+    plot_distribution(axes[0], agg, col)
+    axes[0].set_title(hist_title)
+    axes[0].set_xlabel(label)
+    axes[0].set_ylabel('客户数量')
+
+    # Box Plot
+    plot_box(axes[1], agg, col)
+    axes[1].set_title(box_title)
+    axes[1].set_xlabel('是否流失')
+    axes[1].set_ylabel(label)
+
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    plt.savefig(output_path)
+
+
+def render_tenure(agg, output_path):
+    # --- Checklist Step 8 & 9: Tenure Analysis vs. Churn ---
+    _render_numeric(agg, output_path, 'tenure', '客户任期 (Tenure) 与流失关系',
+                    '任期分布 (按是否流失区分)', '任期箱线图 (按是否流失区分)', '任期 (月)')
+
+
+def render_monthlycharges(agg, output_path):
+    # --- Checklist Step 13 & 14: MonthlyCharges Analysis vs. Churn ---
+    _render_numeric(agg, output_path, 'MonthlyCharges', '月度费用 (MonthlyCharges) 与流失关系',
+                    '月度费用分布 (按是否流失区分)', '月度费用箱线图 (按是否流失区分)', '月度费用')
+
+
+def render_totalcharges(agg, output_path):
+    # --- Checklist Step 15 & 16: TotalCharges Analysis vs. Churn ---
+    _render_numeric(agg, output_path, 'TotalCharges', '总费用 (TotalCharges) 与流失关系',
+                    '总费用分布 (按是否流失区分)', '总费用箱线图 (按是否流失区分)', '总费用')
+
+
+def render_correlation(agg, output_path):
+    # --- Checklist Step 18: Numerical Feature Correlation ---
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(agg['corr'], annot=True, cmap='viridis', fmt=".2f", linewidths=.5)
+    plt.title('数值特征相关性热力图')
+    plt.tight_layout()
+    plt.savefig(output_path)
+
+
+RENDER_TASKS = {
+    'churn_distribution.png': render_churn_distribution,
+    'demographic_churn_analysis.png': render_demographic,
+    'tenure_churn_analysis.png': render_tenure,
+    'phone_churn_analysis.png': render_phone,
+    'internet_churn_analysis.png': render_internet,
+    'account_churn_analysis.png': render_account,
+    'monthlycharges_churn_analysis.png': render_monthlycharges,
+    'totalcharges_churn_analysis.png': render_totalcharges,
+    'numerical_correlation_heatmap.png': render_correlation,
+}
+
+# Aggregates shared with the worker processes (sent once per worker, not once per task)
+_WORKER_AGG = None
+
+
+def _init_worker(agg):
+    global _WORKER_AGG
+    _WORKER_AGG = agg
+    configure_style()
+
+
+def _run_task(file_name, output_dir):
+    start = time.perf_counter()
+    RENDER_TASKS[file_name](_WORKER_AGG, os.path.join(output_dir, file_name))
+    plt.close('all')
+    return file_name, time.perf_counter() - start
+
+
+def render_figures(agg, output_dir, workers=None):
+    """Render every figure as an independent task across a process pool; returns {file_name: seconds}."""
+    print("\n--- Rendering Figures ---")
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    timings = {}
+    if workers == 1:
+        _init_worker(agg)
+        results = (_run_task(name, output_dir) for name in RENDER_TASKS)
+        for file_name, seconds in results:
+            timings[file_name] = seconds
+            print(f"Saved plot: {file_name} ({seconds:.2f}s)")
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(RENDER_TASKS)), initializer=_init_worker,
+                                 initargs=(agg,)) as executor:
+            futures = [executor.submit(_run_task, name, output_dir) for name in RENDER_TASKS]
+            for future in futures:
+                file_name, seconds = future.result()
+                timings[file_name] = seconds
+                print(f"Saved plot: {file_name} ({seconds:.2f}s)")
+    print(f"Rendered {len(timings)} figures to {output_dir} in {time.perf_counter() - start:.2f}s "
+          f"(sum of task times {sum(timings.values()):.2f}s, {workers} workers)")
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Telecom customer churn analysis report")
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH, help="Path to customer_churn_telecom_services.csv")
+    parser.add_argument('--output-dir', default='.', help="Directory for the saved figures (default: current directory)")
+    parser.add_argument('--no-snapshot', action='store_true', help="Always parse the CSV instead of the binary snapshot")
+    parser.add_argument('--workers', type=int, default=None, help="Render processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    configure_style()
+    df = load_data(args.data, use_snapshot=not args.no_snapshot)
+    if df is None:
+        return 1
+    df = clean_data(df)
+    agg = aggregate(df)
+    print_summaries(agg)
+    render_figures(agg, args.output_dir, args.workers)
+
+    print("\n--- Analysis Script Completed ---")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,406 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from churn_data import load_churn
+
+# 流失数据的位图索引和分群查询：
+#   - 每个分类列的每个取值对应一个位图，按位打包为 uint64 数组（每个客户 1 位）
+#   - 分群条件由 Equals / & / | / ~ 组合，查询时只做按位运算，计数用 popcount
+#   - 两列的分群立方体（所有取值组合的客户数和流失率）由位图两两相与后批量 popcount 得到
+#   - 索引可保存为 .npz，下次直接加载，不必重新扫描数据
+#
+# 用法示例:
+#   python churn_bitmap.py --where Contract=Month-to-month --where "InternetService=Fiber optic" \
+#       --where "PaymentMethod=Electronic check"
+#   python churn_bitmap.py --where "PaymentMethod!=Mailed check" --where "Contract=One year|Two year"
+#   python churn_bitmap.py --cube Contract InternetService
+#   python churn_bitmap.py --benchmark --scale 300     # 把数据复制 300 倍，对比 pandas 过滤的耗时
+#
+#   from churn_bitmap import BitmapIndex, Equals
+#   index = BitmapIndex.from_frame(load_churn())
+#   index.stats(Equals('Contract', 'Month-to-month') & ~Equals('InternetService', 'No'))
+
+WORD_BITS = 64
+DEFAULT_MAX_LEVELS = 16
+
+# 旧版 numpy 没有 bitwise_count 时，按字节查表计算 popcount
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray, axis: int = -1) -> np.ndarray:
+    """统计 uint64 位图沿 axis 置位的总数。"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=axis, dtype=np.int64)
+    counts = _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape + (8,))
+    return counts.sum(axis=(axis % words.ndim, -1), dtype=np.int64)
+
+
+def pack_mask(mask: np.ndarray) -> np.ndarray:
+    """把布尔数组打包为 uint64 位图（第 i 行对应第 i 位，末尾补 0）。"""
+    n_words = (len(mask) + WORD_BITS - 1) // WORD_BITS
+    packed = np.zeros(n_words * 8, dtype=np.uint8)
+    packed[:(len(mask) + 7) // 8] = np.packbits(mask, bitorder='little')
+    return packed.view('<u8')
+
+
+def unpack_bits(bits: np.ndarray, n_rows: int) -> np.ndarray:
+    """把位图还原为长度为 n_rows 的布尔数组。"""
+    return np.unpackbits(bits.view(np.uint8), count=n_rows, bitorder='little').astype(bool)
+
+
+class Predicate:
+    """分群条件，可用 & (且)、| (或)、~ (非) 组合。"""
+
+    def __and__(self, other: 'Predicate') -> 'Predicate':
+        return And(self, other)
+
+    def __or__(self, other: 'Predicate') -> 'Predicate':
+        return Or(self, other)
+
+    def __invert__(self) -> 'Predicate':
+        return Not(self)
+
+    def evaluate(self, index: 'BitmapIndex') -> np.ndarray:
+        raise NotImplementedError
+
+
+class Equals(Predicate):
+    """列取值等于 value；value 为列表/元组/集合时表示取其中任意一个。"""
+
+    def __init__(self, column: str, value):
+        self.column = column
+        self.values = list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+
+    def evaluate(self, index: 'BitmapIndex') -> np.ndarray:
+        bits = index.bitmap(self.column, self.values[0]).copy()
+        for value in self.values[1:]:
+            np.bitwise_or(bits, index.bitmap(self.column, value), out=bits)
+        return bits
+
+    def __repr__(self) -> str:
+        values = self.values[0] if len(self.values) == 1 else self.values
+        return f'{self.column}={values!r}'
+
+
+class And(Predicate):
+    def __init__(self, *parts: Predicate):
+        self.parts = parts
+
+    def evaluate(self, index: 'BitmapIndex') -> np.ndarray:
+        bits = self.parts[0].evaluate(index)
+        for part in self.parts[1:]:
+            np.bitwise_and(bits, part.evaluate(index), out=bits)
+        return bits
+
+    def __repr__(self) -> str:
+        return '(' + ' & '.join(map(repr, self.parts)) + ')'
+
+
+class Or(Predicate):
+    def __init__(self, *parts: Predicate):
+        self.parts = parts
+
+    def evaluate(self, index: 'BitmapIndex') -> np.ndarray:
+        bits = self.parts[0].evaluate(index)
+        for part in self.parts[1:]:
+            np.bitwise_or(bits, part.evaluate(index), out=bits)
+        return bits
+
+    def __repr__(self) -> str:
+        return '(' + ' | '.join(map(repr, self.parts)) + ')'
+
+
+class Not(Predicate):
+    def __init__(self, part: Predicate):
+        self.part = part
+
+    def evaluate(self, index: 'BitmapIndex') -> np.ndarray:
+        # 与全体行位图相与，清除末尾补齐的位
+        return np.bitwise_and(~self.part.evaluate(index), index.all_rows)
+
+    def __repr__(self) -> str:
+        return f'~{self.part!r}'
+
+
+def _coerce_value(value: str, levels: list):
+    """把命令行中的字符串取值转换为该列取值的类型（如 SeniorCitizen 的取值为 int）。"""
+    if value in levels:
+        return value
+    for level in levels:
+        if isinstance(level, (int, float)) and not isinstance(level, bool):
+            try:
+                return type(level)(value)
+            except ValueError:
+                break
+    return {str(level): level for level in levels}.get(value, value)
+
+
+def parse_condition(text: str, levels: dict = None) -> Predicate:
+    """
+    解析命令行条件：'列=取值'、'列!=取值'，取值可用 | 分隔表示任意一个。
+
+    例如 'Contract=One year|Two year'、'PaymentMethod!=Mailed check'、'SeniorCitizen=1'。
+
+    参数:
+        text (str): 条件文本
+        levels (dict): 可选，BitmapIndex.levels；给出时把取值转换为该列取值的类型
+    """
+    negate = '!=' in text
+    column, _, values = text.partition('!=' if negate else '=')
+    if not values:
+        raise ValueError(f"无法解析条件: {text}（格式为 列=取值 或 列!=取值）")
+    column = column.strip()
+    values = [v.strip() for v in values.split('|')]
+    if levels is not None and column in levels:
+        values = [_coerce_value(v, levels[column]) for v in values]
+    predicate = Equals(column, values)
+    return ~predicate if negate else predicate
+
+
+def _rate(churned: np.ndarray, count: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, churned / np.maximum(count, 1), np.nan)
+
+
+class BitmapIndex:
+    """
+    分类列的位图索引。
+
+    属性:
+        n_rows (int): 行数
+        levels (dict): {列名: 取值列表}
+        bits (dict): {列名: (取值数 × 字数) 的 uint64 位图}
+        target_bits (numpy.ndarray): 流失客户的位图
+        all_rows (numpy.ndarray): 全体行的位图（用于取反）
+    """
+
+    def __init__(self, n_rows: int, levels: dict, bits: dict, target_bits: np.ndarray):
+        self.n_rows = n_rows
+        self.levels = levels
+        self.bits = bits
+        self.target_bits = target_bits
+        self.all_rows = pack_mask(np.ones(n_rows, dtype=bool))
+        self._positions = {col: {value: i for i, value in enumerate(values)} for col, values in levels.items()}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: list = None, target: str = 'Churn', positive='Yes',
+                   max_levels: int = DEFAULT_MAX_LEVELS) -> 'BitmapIndex':
+        """
+        为数据中的分类列建立位图索引。
+
+        参数:
+            df (pandas.DataFrame): 流失数据（load_churn 的输出或普通 DataFrame）
+            columns (list): 需要索引的列，默认为除目标列外的所有 category/字符串/布尔列，
+                以及取值不超过 max_levels 个的整数列（如 SeniorCitizen）
+            target (str): 目标列
+            positive: 目标列中表示流失的取值
+            max_levels (int): 自动选择整数列时允许的最大取值数
+
+        返回:
+            BitmapIndex: 索引
+        """
+        if columns is None:
+            columns = [col for col in df.columns if col != target and (
+                isinstance(df[col].dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(df[col])
+                or pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])
+                or (pd.api.types.is_integer_dtype(df[col]) and df[col].nunique() <= max_levels))]
+
+        levels, bits = {}, {}
+        for col in columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes, values = df[col].cat.codes.to_numpy(), list(df[col].cat.categories)
+            else:
+                codes, uniques = pd.factorize(df[col], sort=True)
+                values = list(uniques)
+            levels[col] = [v.item() if isinstance(v, np.generic) else v for v in values]
+            bits[col] = np.stack([pack_mask(codes == i) for i in range(len(values))]) if values \
+                else np.empty((0, (len(df) + WORD_BITS - 1) // WORD_BITS), dtype='<u8')
+        target_bits = pack_mask((df[target] == positive).to_numpy(dtype=bool, na_value=False))
+        return cls(len(df), levels, bits, target_bits)
+
+    def column_bits(self, column: str) -> np.ndarray:
+        """返回某列所有取值的位图（取值数 × 字数）；列未建立索引时报错并列出可用的列。"""
+        if column not in self.levels:
+            raise KeyError(f"没有为列 {column} 建立索引，可用的列: {list(self.levels)}")
+        return self.bits[column]
+
+    def bitmap(self, column: str, value) -> np.ndarray:
+        """返回某列某个取值的位图；取值不存在时报错，避免拼写错误被当成空分群。"""
+        bits = self.column_bits(column)
+        position = self._positions[column].get(value)
+        if position is None:
+            raise KeyError(f"列 {column} 没有取值 {value!r}，可用的取值: {self.levels[column]}")
+        return bits[position]
+
+    def evaluate(self, predicate: Predicate = None) -> np.ndarray:
+        """返回满足条件的行的位图；predicate 为 None 时为全体行。"""
+        return self.all_rows.copy() if predicate is None else predicate.evaluate(self)
+
+    def count(self, predicate: Predicate = None) -> int:
+        """满足条件的客户数。"""
+        return int(popcount(self.evaluate(predicate)))
+
+    def stats(self, predicate: Predicate = None) -> dict:
+        """
+        返回满足条件的客户数、流失客户数和流失率。
+
+        返回:
+            dict: {'count', 'churned', 'churn_rate'}
+        """
+        bits = self.evaluate(predicate)
+        count = int(popcount(bits))
+        churned = int(popcount(np.bitwise_and(bits, self.target_bits)))
+        return {'count': count, 'churned': churned, 'churn_rate': churned / count if count else float('nan')}
+
+    def rows(self, predicate: Predicate = None) -> np.ndarray:
+        """满足条件的行号（可用于 df.iloc 取出明细）。"""
+        return np.flatnonzero(unpack_bits(self.evaluate(predicate), self.n_rows))
+
+    def cube(self, column_a: str, column_b: str, where: Predicate = None) -> pd.DataFrame:
+        """
+        两列所有取值组合的客户数、流失客户数和流失率。
+
+        参数:
+            column_a, column_b (str): 两个已索引的列
+            where (Predicate): 额外的过滤条件（下钻时使用）
+
+        返回:
+            pandas.DataFrame: 以 (column_a, column_b) 为索引，列为 count/churned/churn_rate
+        """
+        a = self.column_bits(column_a)
+        b = self.column_bits(column_b)
+        if where is not None:
+            a = np.bitwise_and(a, where.evaluate(self))
+        # (取值数A × 取值数B × 字数)，两两相与后一次 popcount
+        joint = np.bitwise_and(a[:, None, :], b[None, :, :])
+        count = popcount(joint).ravel()
+        np.bitwise_and(joint, self.target_bits, out=joint)
+        churned = popcount(joint).ravel()
+        index = pd.MultiIndex.from_product([self.levels[column_a], self.levels[column_b]],
+                                           names=[column_a, column_b])
+        return pd.DataFrame({'count': count, 'churned': churned, 'churn_rate': _rate(churned, count)},
+                            index=index)
+
+    def pair_cubes(self, columns: list = None, where: Predicate = None) -> pd.DataFrame:
+        """
+        所有列对的分群立方体，合并为一张长表。
+
+        返回:
+            pandas.DataFrame: 列为 column_a/value_a/column_b/value_b/count/churned/churn_rate
+        """
+        columns = columns or list(self.levels)
+        frames = []
+        for i, column_a in enumerate(columns):
+            for column_b in columns[i + 1:]:
+                cube = self.cube(column_a, column_b, where).reset_index()
+                cube.columns = ['value_a', 'value_b', 'count', 'churned', 'churn_rate']
+                cube.insert(0, 'column_a', column_a)
+                cube.insert(2, 'column_b', column_b)
+                frames.append(cube)
+        return pd.concat(frames, ignore_index=True)
+
+    def save(self, path: str) -> None:
+        """把索引保存为 .npz（位图原样保存，取值列表存为 JSON）。"""
+        arrays = {f'col_{i}': self.bits[col] for i, col in enumerate(self.levels)}
+        meta = {'n_rows': self.n_rows, 'columns': list(self.levels), 'levels': self.levels}
+        np.savez(path, meta=np.array(json.dumps(meta, ensure_ascii=False)), target=self.target_bits, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'BitmapIndex':
+        """加载 save 保存的索引。"""
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            bits = {col: data[f'col_{i}'] for i, col in enumerate(meta['columns'])}
+            return cls(meta['n_rows'], meta['levels'], bits, data['target'])
+
+
+def benchmark(df: pd.DataFrame, predicate: Predicate, scale: int = 100, repeat: int = 20) -> dict:
+    """
+    把数据复制 scale 倍后，对比 pandas 布尔过滤与位图查询的耗时，并测量两列立方体的耗时。
+
+    返回:
+        dict: {'rows', 'build_seconds', 'pandas_seconds', 'bitmap_seconds', 'cube_seconds'}
+    """
+    big = pd.concat([df] * scale, ignore_index=True)
+
+    start = time.perf_counter()
+    index = BitmapIndex.from_frame(big)
+    build_seconds = time.perf_counter() - start
+
+    def pandas_mask(p: Predicate) -> pd.Series:
+        if isinstance(p, Equals):
+            return big[p.column].isin(p.values)
+        if isinstance(p, Not):
+            return ~pandas_mask(p.part)
+        masks = [pandas_mask(part) for part in p.parts]
+        combined = masks[0]
+        for mask in masks[1:]:
+            combined = combined & mask if isinstance(p, And) else combined | mask
+        return combined
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        selected = big.loc[pandas_mask(predicate), 'Churn']
+        expected = (len(selected), int((selected == 'Yes').sum()))
+    pandas_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = index.stats(predicate)
+    bitmap_seconds = (time.perf_counter() - start) / repeat
+    assert (result['count'], result['churned']) == expected
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        index.cube('Contract', 'PaymentMethod')
+    cube_seconds = (time.perf_counter() - start) / repeat
+
+    print(f"{len(big):,} 行，建立索引 {build_seconds:.2f} 秒")
+    print(f"pandas 过滤: {pandas_seconds * 1e3:.2f} 毫秒，位图查询: {bitmap_seconds * 1e3:.2f} 毫秒"
+          f"（{pandas_seconds / bitmap_seconds:.1f} 倍）")
+    print(f"Contract × PaymentMethod 立方体: {cube_seconds * 1e3:.2f} 毫秒")
+    return {'rows': len(big), 'build_seconds': build_seconds, 'pandas_seconds': pandas_seconds,
+            'bitmap_seconds': bitmap_seconds, 'cube_seconds': cube_seconds}
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="流失数据分群查询（位图索引）")
+    parser.add_argument('--where', action='append', default=[],
+                        help="条件 列=取值 或 列!=取值，取值可用 | 分隔；多个条件为且")
+    parser.add_argument('--cube', nargs=2, metavar=('COLUMN_A', 'COLUMN_B'), help="输出两列的分群立方体")
+    parser.add_argument('--benchmark', action='store_true', help="对比 pandas 过滤与位图查询的耗时")
+    parser.add_argument('--scale', type=int, default=100, help="性能测试时数据复制的倍数")
+    args = parser.parse_args(argv)
+
+    df = load_churn()
+    index = BitmapIndex.from_frame(df)
+    try:
+        conditions = [parse_condition(text, index.levels) for text in args.where]
+    except ValueError as e:
+        print(e)
+        return 1
+    predicate = And(*conditions) if conditions else None
+
+    if args.benchmark:
+        benchmark(df, predicate or Equals('Contract', 'Month-to-month'), scale=args.scale)
+        return 0
+
+    try:
+        if args.cube:
+            print(index.cube(*args.cube, where=predicate).to_string(float_format='{:.2%}'.format))
+        else:
+            stats = index.stats(predicate)
+            print(f"分群: {predicate!r}" if predicate is not None else "分群: 全体客户")
+            print(f"客户数: {stats['count']}，流失: {stats['churned']}，流失率: {stats['churn_rate']:.2%}")
+    except KeyError as e:
+        print(e.args[0])
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
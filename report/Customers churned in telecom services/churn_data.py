@@ -0,0 +1,190 @@
+import argparse
+import os
+import pickle
+import time
+
+import pandas as pd
+
+# 流失数据的类型化加载器：
+#   - 按声明的 schema 直接解析为 category / int8 / int16 / float32 列，
+#     不再先读成字符串列再转换；Yes/No 等取值固定的列只占 1 字节编码
+#   - 解析时修正 TotalCharges：空白值在 tenure=0 时填 0（新客户尚未产生费用）
+#   - 分类列出现 schema 之外的取值时报错，而不是静默变成缺失值
+#   - 解析结果保存为二进制快照（pickle），源文件大小和修改时间不变时直接读取快照
+#
+# 用法示例:
+#   python churn_data.py                # 对比默认 dtype 与类型化加载的内存和耗时，并写出快照
+#   python churn_data.py --rebuild      # 忽略已有快照，重新解析
+#
+#   from churn_data import load_churn
+#   df = load_churn()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV_PATH = os.path.join(SCRIPT_DIR, 'customer_churn_telecom_services.csv')
+DEFAULT_SNAPSHOT_PATH = os.path.join(SCRIPT_DIR, '.churn_cache', 'customer_churn.pkl')
+
+# 快照格式版本，schema 或格式变化时递增，旧快照会自动失效
+SNAPSHOT_VERSION = 1
+
+YES_NO = ['No', 'Yes']
+PHONE_DEPENDENT = ['No', 'No phone service', 'Yes']
+INTERNET_DEPENDENT = ['No', 'No internet service', 'Yes']
+
+# 分类列的取值按字母顺序声明，编码与 LabelEncoder / 排序后的 factorize 一致
+CATEGORIES = {
+    'gender': ['Female', 'Male'],
+    'Partner': YES_NO,
+    'Dependents': YES_NO,
+    'PhoneService': YES_NO,
+    'MultipleLines': PHONE_DEPENDENT,
+    'InternetService': ['DSL', 'Fiber optic', 'No'],
+    'OnlineSecurity': INTERNET_DEPENDENT,
+    'OnlineBackup': INTERNET_DEPENDENT,
+    'DeviceProtection': INTERNET_DEPENDENT,
+    'TechSupport': INTERNET_DEPENDENT,
+    'StreamingTV': INTERNET_DEPENDENT,
+    'StreamingMovies': INTERNET_DEPENDENT,
+    'Contract': ['Month-to-month', 'One year', 'Two year'],
+    'PaperlessBilling': YES_NO,
+    'PaymentMethod': ['Bank transfer (automatic)', 'Credit card (automatic)', 'Electronic check', 'Mailed check'],
+    'Churn': YES_NO,
+}
+
+NUMERIC_DTYPES = {
+    'SeniorCitizen': 'int8',
+    'tenure': 'int16',
+    'MonthlyCharges': 'float32',
+    'TotalCharges': 'float32',
+}
+
+# 与 CSV 列顺序一致的完整 schema
+COLUMNS = ['gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure', 'PhoneService', 'MultipleLines',
+           'InternetService', 'OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport',
+           'StreamingTV', 'StreamingMovies', 'Contract', 'PaperlessBilling', 'PaymentMethod',
+           'MonthlyCharges', 'TotalCharges', 'Churn']
+SCHEMA = {col: pd.CategoricalDtype(CATEGORIES[col]) if col in CATEGORIES else NUMERIC_DTYPES[col]
+          for col in COLUMNS}
+
+
+def source_signature(file_path: str) -> dict:
+    """返回源文件的路径、大小和修改时间，用于判断快照是否仍然有效。"""
+    stat = os.stat(file_path)
+    return {'path': os.path.abspath(file_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def parse_churn_csv(file_path: str = DEFAULT_CSV_PATH) -> pd.DataFrame:
+    """
+    按 SCHEMA 解析流失数据 CSV。
+
+    分类列先由解析器直接构建为 category（只保存一份取值字符串），
+    校验取值后再固定为声明的类别顺序。TotalCharges 的空白值在 tenure=0 时填 0，
+    填充的行数记录在 df.attrs['total_charges_imputed'] 中。
+
+    参数:
+        file_path (str): CSV 文件路径
+
+    返回:
+        pandas.DataFrame: 类型化后的数据
+    """
+    parse_dtypes = {col: 'category' if col in CATEGORIES else dtype for col, dtype in SCHEMA.items()}
+    df = pd.read_csv(file_path, dtype=parse_dtypes, na_values=[' '], engine='c')
+
+    missing = [col for col in COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"{file_path} 缺少列: {missing}")
+
+    for col, levels in CATEGORIES.items():
+        unexpected = sorted(set(df[col].cat.categories) - set(levels))
+        if unexpected:
+            raise ValueError(f"列 {col} 出现 schema 之外的取值: {unexpected}")
+        df[col] = df[col].cat.set_categories(levels)
+
+    zero_tenure = df['TotalCharges'].isna() & (df['tenure'] == 0)
+    df.loc[zero_tenure, 'TotalCharges'] = 0
+    df.attrs['total_charges_imputed'] = int(zero_tenure.sum())
+    return df
+
+
+def read_snapshot(snapshot_path: str, csv_path: str) -> pd.DataFrame:
+    """读取快照；快照不存在、版本不同或源文件已变化时返回 None。"""
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if (snapshot.get('version') != SNAPSHOT_VERSION
+            or snapshot.get('source') != source_signature(csv_path)):
+        return None
+    return snapshot['frame']
+
+
+def write_snapshot(df: pd.DataFrame, snapshot_path: str, csv_path: str) -> None:
+    """把类型化后的数据写为快照（先写临时文件再替换）。"""
+    os.makedirs(os.path.dirname(os.path.abspath(snapshot_path)), exist_ok=True)
+    tmp_path = f'{snapshot_path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': SNAPSHOT_VERSION, 'source': source_signature(csv_path), 'frame': df},
+                    f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot_path)
+
+
+def load_churn(csv_path: str = DEFAULT_CSV_PATH, snapshot_path: str = DEFAULT_SNAPSHOT_PATH,
+               use_snapshot: bool = True, rebuild: bool = False) -> pd.DataFrame:
+    """
+    加载类型化的流失数据：快照有效时直接读取，否则解析 CSV 并写出快照。
+
+    参数:
+        csv_path (str): CSV 文件路径
+        snapshot_path (str): 快照文件路径
+        use_snapshot (bool): 是否读写快照
+        rebuild (bool): 忽略已有快照，重新解析并覆盖
+
+    返回:
+        pandas.DataFrame: 类型化后的数据
+    """
+    if use_snapshot and not rebuild:
+        df = read_snapshot(snapshot_path, csv_path)
+        if df is not None:
+            return df
+    df = parse_churn_csv(csv_path)
+    if use_snapshot:
+        write_snapshot(df, snapshot_path, csv_path)
+    return df
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """DataFrame 实际占用的内存字节数（包括字符串对象本身）。"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="类型化加载流失数据并写出二进制快照")
+    parser.add_argument('--csv', default=DEFAULT_CSV_PATH, help="CSV 文件路径")
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT_PATH, help="快照文件路径")
+    parser.add_argument('--rebuild', action='store_true', help="忽略已有快照，重新解析")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    raw = pd.read_csv(args.csv)
+    raw_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    typed = parse_churn_csv(args.csv)
+    typed_seconds = time.perf_counter() - start
+
+    load_churn(args.csv, args.snapshot, rebuild=args.rebuild)
+    start = time.perf_counter()
+    snapshot = load_churn(args.csv, args.snapshot)
+    snapshot_seconds = time.perf_counter() - start
+
+    print(f"默认 dtype:   {memory_bytes(raw) / 1e6:8.2f} MB，读取 {raw_seconds * 1e3:7.1f} 毫秒")
+    print(f"类型化解析:   {memory_bytes(typed) / 1e6:8.2f} MB，读取 {typed_seconds * 1e3:7.1f} 毫秒"
+          f"（TotalCharges 填 0: {typed.attrs['total_charges_imputed']} 行）")
+    print(f"快照:         {memory_bytes(snapshot) / 1e6:8.2f} MB，读取 {snapshot_seconds * 1e3:7.1f} 毫秒"
+          f"（{os.path.getsize(args.snapshot) / 1e6:.2f} MB 文件）")
+    print(f"内存缩小 {memory_bytes(raw) / memory_bytes(typed):.1f} 倍，共 {len(typed)} 行")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from datetime_parsing import ordered_formats, combine_date_time, format_report_summary
+
 def merge_datetime_columns(file_path: str, date_col: str = 'Date', time_col: str = 'Time', new_col_name: str = 'DateTime', date_format: str = '%d/%m/%y', time_format: str = '%H:%M:%S', separator: str = ',', na_values: list = ['?'], drop_original: bool = True) -> pd.DataFrame:
     """
     读取CSV文件，合并指定的日期和时间列，并返回包含新DateTime列的DataFrame。
@@ -19,6 +21,7 @@ def merge_datetime_columns(file_path: str, date_col: str = 'Date', time_col: str
         pd.DataFrame: 包含合并后的DateTime列的Pandas DataFrame。
                      如果读取或解析过程中发生错误，将引发相应的异常。
                      无法解析的日期时间组合将被转换为 NaT (Not a Time)。
+                     各日期格式匹配的行数记录在 df.attrs['datetime_format_report'] 中。
     """
     try:
         # Checklist item 3: Read CSV with specific dtype for date/time columns
@@ -29,51 +32,17 @@ def merge_datetime_columns(file_path: str, date_col: str = 'Date', time_col: str
             dtype={date_col: str, time_col: str} # 确保作为字符串读取
         )
 
-        # Checklist item 4: Concatenate date and time strings
-        # 使用 .loc 避免 SettingWithCopyWarning，并确保在原始 DataFrame 上操作
-        temp_datetime_str_col = '_temp_datetime_str_' # 临时列名，避免与现有列冲突
-        df[temp_datetime_str_col] = df[date_col] + ' ' + df[time_col]
-
-        # Checklist item 5: Convert concatenated string to datetime objects
-        # 尝试多种日期格式以处理不同格式的日期
-        df[new_col_name] = pd.to_datetime(df[temp_datetime_str_col], errors='coerce')
-        
-        # 检查是否有无法解析的日期时间
-        mask_nat = df[new_col_name].isna()
-        if mask_nat.any():
-            # 尝试使用指定的格式解析那些未成功解析的日期时间
-            full_format = f'{date_format} {time_format}'
-            df.loc[mask_nat, new_col_name] = pd.to_datetime(
-                df.loc[mask_nat, temp_datetime_str_col], 
-                format=full_format, 
-                errors='coerce'
-            )
-            
-            # 尝试其他可能的日期格式
-            alternative_formats = [
-                '%d/%m/%Y %H:%M:%S',  # 带4位年份
-                '%m/%d/%y %H:%M:%S',  # 美式日期格式
-                '%m/%d/%Y %H:%M:%S',  # 美式日期格式带4位年份
-                '%Y-%m-%d %H:%M:%S',  # ISO格式
-                '%d-%m-%y %H:%M:%S',  # 破折号分隔
-                '%d-%m-%Y %H:%M:%S'   # 破折号分隔带4位年份
-            ]
-            
-            for fmt in alternative_formats:
-                # 只对仍然是NaT的行尝试新格式
-                mask_still_nat = df[new_col_name].isna()
-                if not mask_still_nat.any():
-                    break
-                    
-                df.loc[mask_still_nat, new_col_name] = pd.to_datetime(
-                    df.loc[mask_still_nat, temp_datetime_str_col], 
-                    format=fmt, 
-                    errors='coerce'
-                )
+        # Checklist item 4-5: Parse date and time columns into datetime objects
+        # 每个不同的日期只解析一次（约1440行共用一个日期），时间部分按偏移量矢量化相加；
+        # 主格式从样本推断，其余候选格式只作用于仍未解析的去重日期值
+        candidates = ordered_formats(date_format)
+        df[new_col_name], format_report = combine_date_time(
+            df, date_col, time_col, time_format=time_format, candidates=candidates
+        )
+        df.attrs['datetime_format_report'] = format_report
+        print("日期格式匹配情况:")
+        print(format_report_summary(format_report))
 
-        # Checklist item 6: Drop the temporary concatenated string column
-        df.drop(columns=[temp_datetime_str_col], inplace=True)
-        
         # 删除原始的日期和时间列
         if drop_original:
             df.drop(columns=[date_col, time_col], inplace=True)
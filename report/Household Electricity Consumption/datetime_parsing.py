@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+# 候选日期格式（只含日期部分，时间部分单独按时间偏移量解析）
+CANDIDATE_DATE_FORMATS = [
+    '%d/%m/%y',   # 默认格式
+    '%d/%m/%Y',   # 带4位年份
+    '%m/%d/%y',   # 美式日期格式
+    '%m/%d/%Y',   # 美式日期格式带4位年份
+    '%Y-%m-%d',   # ISO格式
+    '%d-%m-%y',   # 破折号分隔
+    '%d-%m-%Y'    # 破折号分隔带4位年份
+]
+
+# 所有候选格式都失败时，最后交给 pandas 自动推断；报告中以此名称记录
+FALLBACK_FORMAT = 'inferred'
+UNPARSED = 'unparsed'
+
+
+def ordered_formats(date_format: str = None, candidates: list = None) -> list:
+    """把指定格式放在候选列表最前面，并去除重复项。"""
+    formats = [date_format] if date_format else []
+    for fmt in (candidates if candidates is not None else CANDIDATE_DATE_FORMATS):
+        if fmt not in formats:
+            formats.append(fmt)
+    return formats
+
+
+def _to_datetime_values(values, fmt: str) -> np.ndarray:
+    """按给定格式解析字符串数组，返回 datetime64[ns] 数组，失败处为 NaT。"""
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), format=fmt, errors='coerce')
+    return parsed.to_numpy(dtype='datetime64[ns]')
+
+
+def infer_date_format(sample, candidates: list = None) -> str:
+    """
+    根据样本推断日期格式：返回能成功解析样本中最多值的候选格式。
+
+    参数:
+        sample: 日期字符串样本（建议使用去重后的值）
+        candidates (list): 候选格式列表，排在前面的格式在得分相同时优先
+
+    返回:
+        str: 推断出的格式；如果没有任何格式能解析样本，返回 None
+    """
+    values = pd.Series(sample, dtype=object).dropna()
+    if values.empty:
+        return None
+
+    best_format, best_hits = None, 0
+    for fmt in ordered_formats(None, candidates):
+        hits = int(pd.notna(_to_datetime_values(values, fmt)).sum())
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+            if hits == len(values):
+                break
+    return best_format
+
+
+def parse_date_column(dates, date_format: str = None, candidates: list = None,
+                      sample_size: int = 1000):
+    """
+    解析日期列：每个不同的日期值只解析一次，再按编码映射回所有行。
+
+    先从去重后的样本中推断主格式（若未指定 date_format），对仍未解析的
+    去重值依次尝试其余候选格式，最后交给 pandas 自动推断。
+
+    参数:
+        dates: 日期字符串序列
+        date_format (str): 已知的主格式；为 None 时从样本推断
+        candidates (list): 候选格式列表，默认为 CANDIDATE_DATE_FORMATS
+        sample_size (int): 用于推断格式的去重样本数量
+
+    返回:
+        tuple: (datetime64[ns] 数组, 格式匹配报告 dict{格式: 行数})
+    """
+    codes, uniques = pd.factorize(pd.Series(dates, copy=False))
+    uniques = np.asarray(uniques, dtype=object)
+    # 每个去重值对应的行数，用于按行统计格式命中情况
+    rows_per_value = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+    primary = date_format or infer_date_format(uniques[:sample_size], candidates)
+    formats = ordered_formats(primary, candidates)
+
+    parsed = np.full(len(uniques), np.datetime64('NaT'), dtype='datetime64[ns]')
+    pending = np.arange(len(uniques))
+    report = {}
+
+    for fmt in formats + [FALLBACK_FORMAT]:
+        if not len(pending):
+            break
+        if fmt == FALLBACK_FORMAT:
+            result = pd.to_datetime(pd.Series(uniques[pending], dtype=object),
+                                    errors='coerce').to_numpy(dtype='datetime64[ns]')
+        else:
+            result = _to_datetime_values(uniques[pending], fmt)
+        ok = pd.notna(result)
+        if ok.any():
+            parsed[pending[ok]] = result[ok]
+            report[fmt] = int(rows_per_value[pending[ok]].sum())
+        pending = pending[~ok]
+
+    unparsed_rows = int(rows_per_value[pending].sum()) + int((codes < 0).sum())
+    if unparsed_rows:
+        report[UNPARSED] = unparsed_rows
+
+    # codes 中的 -1（缺失值）会取到末尾追加的 NaT
+    parsed = np.append(parsed, np.datetime64('NaT', 'ns'))
+    return parsed[codes], report
+
+
+def parse_time_offsets(times, time_format: str = '%H:%M:%S') -> np.ndarray:
+    """
+    把时间字符串（如 '17:24:00'）解析为当天内的时间偏移量。
+
+    一天最多只有 1440 个不同的分钟值，因此同样只解析去重值。
+
+    参数:
+        times: 时间字符串序列
+        time_format (str): 时间格式字符串，默认为 '%H:%M:%S'
+
+    返回:
+        np.ndarray: timedelta64[ns] 数组，无法解析的值为 NaT
+    """
+    codes, uniques = pd.factorize(pd.Series(times, copy=False))
+    clock = _to_datetime_values(np.asarray(uniques, dtype=object), time_format)
+    offsets = clock - clock.astype('datetime64[D]')
+    offsets = np.append(offsets, np.timedelta64('NaT', 'ns'))
+    return offsets[codes]
+
+
+def combine_date_time(df: pd.DataFrame, date_col: str = 'Date', time_col: str = 'Time',
+                      date_format: str = None, time_format: str = '%H:%M:%S',
+                      candidates: list = None):
+    """
+    将日期列与时间列组合为 datetime64[ns] 数组，不再生成临时拼接字符串列。
+
+    参数:
+        df (pd.DataFrame): 包含日期和时间列的数据框
+        date_col (str): 日期列名
+        time_col (str): 时间列名
+        date_format (str): 已知的日期格式；为 None 时从样本推断
+        time_format (str): 时间格式字符串
+        candidates (list): 候选日期格式列表
+
+    返回:
+        tuple: (datetime64[ns] 数组, 格式匹配报告 dict{格式: 行数})
+    """
+    dates, report = parse_date_column(df[date_col], date_format=date_format,
+                                      candidates=candidates)
+    offsets = parse_time_offsets(df[time_col], time_format)
+    return dates + offsets, report
+
+
+def format_report_summary(report: dict) -> str:
+    """把格式匹配报告整理成便于打印的文本。"""
+    total = sum(report.values())
+    if not total:
+        return "  (无数据)"
+    lines = []
+    for fmt, rows in sorted(report.items(), key=lambda item: -item[1]):
+        lines.append(f"  {fmt}: {rows} 行 ({rows / total:.2%})")
+    return '\n'.join(lines)
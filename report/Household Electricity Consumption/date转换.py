@@ -1,76 +1,260 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
-import numpy as np # numpy 通常随 pandas 一起安装，NaT/NaN 处理可能用到
-
-# 1. 导入 pandas (已完成)
-# 2. 定义文件路径
-file_path = ''
-# 3. 定义日期列名
-date_column_name = 'Date'
-
-print(f"开始处理文件: {file_path}")
-print(f"目标列: {date_column_name}")
-try:
-    # 4. 读取 CSV 文件
-    #    注意：根据实际文件分隔符调整 sep 参数 (',' 或 ';')
-    #    low_memory=False 建议用于可能包含混合类型的大文件
-    df = pd.read_csv(file_path, sep=',', low_memory=False)
-    print(f"文件读取成功，共 {len(df)} 行。")
-
-    if date_column_name not in df.columns:
-        print(f"错误: 列 '{date_column_name}' 不在文件中。可用列: {df.columns.tolist()}")
+
+# 批量日期格式转换工具：
+#   把 Date 列中 'dd/mm/yyyy' 格式的日期改写为 'dd/mm/yy'（无法按该格式解析的值保持原样），
+#   同时输出完整的 _processed.csv 和删除了含空值行的 _cleaned.csv。
+#
+# 每个文件按块流式读取，一次读取同时写出两个结果文件；多个文件在进程池中并行处理。
+#
+# 用法示例:
+#   python date转换.py data/*.csv --workers 8
+#   python date转换.py --glob "exports/**/*.csv" --output-dir converted
+#     （指定输出目录时保留输入文件相对于公共上级目录的子目录，如 exports/a/x.csv -> converted/a/x_cleaned.csv）
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def convert_dates(values: pd.Series, input_format: str, output_format: str, cache: dict) -> pd.Series:
+    """
+    转换日期列格式：每个不同的日期字符串只解析一次，结果缓存在 cache 中跨块复用。
+
+    参数:
+        values (pd.Series): 原始日期字符串
+        input_format (str): 原始日期格式，如 '%d/%m/%Y'
+        output_format (str): 目标日期格式，如 '%d/%m/%y'
+        cache (dict): 原始字符串到转换结果的缓存
+
+    返回:
+        pd.Series: 转换后的日期字符串；无法解析的值保持原样，缺失值保持为 NaN
+    """
+    codes, uniques = pd.factorize(values)
+    if not len(uniques):
+        return values
+    missing = [value for value in uniques if value not in cache]
+    if missing:
+        parsed = pd.to_datetime(pd.Series(missing, dtype=object), format=input_format, errors='coerce')
+        formatted = parsed.dt.strftime(output_format)
+        for original, new_value in zip(missing, formatted):
+            cache[original] = original if pd.isna(new_value) else new_value
+    mapped = pd.Series([cache[value] for value in uniques], dtype=object)
+    return pd.Series(mapped.to_numpy()[codes], index=values.index, dtype=object).where(codes >= 0)
+
+
+def output_paths(file_path: str, output_dir: str = None, input_root: str = None) -> tuple:
+    """
+    返回 (_processed.csv, _cleaned.csv) 的输出路径。
+
+    指定 output_dir 和 input_root 时，输出文件放在 output_dir 下与输入文件相对 input_root 相同的子目录中，
+    不同目录下的同名输入文件不会写到同一个输出文件。
+    """
+    base_dir = os.path.dirname(file_path)
+    if output_dir:
+        relative = os.path.relpath(os.path.dirname(os.path.abspath(file_path)), input_root) if input_root else ''
+        base_dir = os.path.normpath(os.path.join(output_dir, relative))
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return (os.path.join(base_dir, f'{stem}_processed.csv'),
+            os.path.join(base_dir, f'{stem}_cleaned.csv'))
+
+
+def process_file(file_path: str, date_column: str = 'Date', input_format: str = '%d/%m/%Y',
+                 output_format: str = '%d/%m/%y', separator: str = ',',
+                 chunksize: int = DEFAULT_CHUNKSIZE, output_dir: str = None, input_root: str = None,
+                 write_processed: bool = True) -> dict:
+    """
+    流式处理单个 CSV 文件：一次读取，同时写出格式转换后的完整文件和去除空值后的文件。
+
+    所有列都按字符串读取，除日期列外的内容原样写回。
+
+    参数:
+        file_path (str): 输入 CSV 文件路径
+        date_column (str): 日期列名
+        input_format (str): 原始日期格式
+        output_format (str): 目标日期格式
+        separator (str): CSV 分隔符
+        chunksize (int): 每块的行数
+        output_dir (str): 输出目录，默认与输入文件相同
+        input_root (str): 指定 output_dir 时，按输入文件相对该目录的路径保留子目录
+        write_processed (bool): 是否写出完整的 _processed.csv
+
+    返回:
+        dict: 处理统计（行数、删除的行数、日期列空值数、字节数、耗时）
+    """
+    start = time.perf_counter()
+    processed_path, cleaned_path = output_paths(file_path, output_dir, input_root)
+    if output_dir:
+        os.makedirs(os.path.dirname(cleaned_path), exist_ok=True)
+
+    stats = {'file': file_path, 'rows': 0, 'cleaned_rows': 0, 'date_nan': 0,
+             'bytes': os.path.getsize(file_path), 'processed_path': processed_path if write_processed else None,
+             'cleaned_path': cleaned_path, 'error': None}
+    cache = {}
+
+    reader = pd.read_csv(file_path, sep=separator, dtype=str, chunksize=chunksize)
+    processed_file = open(processed_path, 'w', encoding='utf-8', newline='') if write_processed else None
+    try:
+        with open(cleaned_path, 'w', encoding='utf-8', newline='') as cleaned_file:
+            for position, chunk in enumerate(reader):
+                if date_column not in chunk.columns:
+                    raise KeyError(f"列 '{date_column}' 不在文件中。可用列: {chunk.columns.tolist()}")
+                chunk[date_column] = convert_dates(chunk[date_column], input_format, output_format, cache)
+
+                header = position == 0
+                if processed_file is not None:
+                    chunk.to_csv(processed_file, index=False, header=header, sep=separator)
+                cleaned = chunk.dropna()
+                cleaned.to_csv(cleaned_file, index=False, header=header, sep=separator)
+
+                stats['rows'] += len(chunk)
+                stats['cleaned_rows'] += len(cleaned)
+                stats['date_nan'] += int(chunk[date_column].isna().sum())
+    finally:
+        if processed_file is not None:
+            processed_file.close()
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def _process_file_safe(file_path: str, options: dict) -> dict:
+    """在子进程中处理文件，出错时返回错误信息而不是让整个批次失败。"""
+    try:
+        return process_file(file_path, **options)
+    except Exception as e:
+        return {'file': file_path, 'rows': 0, 'cleaned_rows': 0, 'date_nan': 0,
+                'bytes': 0, 'seconds': 0.0, 'error': f'{type(e).__name__}: {e}'}
+
+
+def expand_inputs(inputs: list, pattern: str = None) -> list:
+    """展开输入路径和通配符（Windows 命令行不会自动展开），去重并保持顺序。"""
+    candidates = list(inputs or [])
+    if pattern:
+        candidates.append(pattern)
+    files = []
+    for item in candidates:
+        matches = sorted(glob.glob(item, recursive=True)) if glob.has_magic(item) else [item]
+        for path in matches:
+            # 跳过本工具自己生成的输出文件，避免重复运行时再次处理
+            if path.endswith(('_processed.csv', '_cleaned.csv')):
+                continue
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def common_input_root(files: list) -> str:
+    """输入文件所在目录的公共上级目录；无法确定时（如 Windows 上位于不同盘符）返回 None。"""
+    try:
+        return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+    except ValueError:
+        return None
+
+
+def check_output_collisions(files: list, output_dir: str = None, input_root: str = None) -> None:
+    """多个输入文件会写到同一个输出文件时抛出 ValueError（并行写同一文件会互相覆盖）。"""
+    owners = {}
+    for path in files:
+        for output in output_paths(path, output_dir, input_root):
+            key = os.path.normcase(os.path.abspath(output))
+            if key in owners:
+                raise ValueError(f"输入文件 {owners[key]} 和 {path} 会写到同一个输出文件: {output}")
+            owners[key] = path
+
+
+def run_batch(files: list, workers: int = None, **options) -> list:
+    """
+    在进程池中并行处理多个文件，并打印每个文件的行数与吞吐量。
+
+    参数:
+        files (list): 输入文件列表
+        workers (int): 进程数，默认为 CPU 核数
+        **options: 传递给 process_file 的参数；指定 output_dir 而未指定 input_root 时，
+                   以全部输入文件的公共上级目录为 input_root
+
+    返回:
+        list: 每个文件的处理统计；多个输入文件的输出路径相同时抛出 ValueError，不处理任何文件
+    """
+    if options.get('output_dir') and options.get('input_root') is None:
+        options['input_root'] = common_input_root(files)
+    check_output_collisions(files, options.get('output_dir'), options.get('input_root'))
+
+    batch_start = time.perf_counter()
+    results = []
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(files) == 1:
+        for path in files:
+            results.append(_process_file_safe(path, options))
+            _print_result(results[-1])
     else:
-        # 5. 备份原始日期数据
-        original_dates = df[date_column_name].copy()
-        print(f"原始 '{date_column_name}' 列的前5行:\n{original_dates.head()}")
-
-        # 6. 尝试按 'dd/mm/yyyy' 格式转换，无效值转为 NaT
-        converted_dates = pd.to_datetime(df[date_column_name], format='%d/%m/%Y', errors='coerce')
-
-        # 7. 将成功转换的日期格式化为 'dd/mm/yy'，NaT 会变成 NaN
-        formatted_dates = converted_dates.dt.strftime('%d/%m/%y')
-
-        # 8. 将格式化后的日期（包含 NaN）与原始日期合并，用原始值填充 NaN
-        #    这样，只有成功按 'dd/mm/yyyy' 格式转换的日期才会被更新为 'dd/mm/yy'
-        df[date_column_name] = formatted_dates.fillna(original_dates)
-
-        # 9. 打印转换后列的前5行
-        print(f"\n转换后 '{date_column_name}' 列的前5行:\n{df[date_column_name].head()}")
-
-        # 10. 检查转换后是否还存在 NaN 值 (理论上不应存在，除非原始数据就有 NaN)
-        final_nan_count = df[date_column_name].isnull().sum()
-        print(f"\n转换操作完成。")
-        print(f"最终 '{date_column_name}' 列中的 NaN 值数量: {final_nan_count}")
-
-        # (可选) 如果需要保存修改后的文件:
-        output_file_path = file_path.replace('.csv', '_processed.csv')
-        df.to_csv(output_file_path, index=False)
-        print(f"已将修改后的数据保存到: {output_file_path}")
-
-except FileNotFoundError:
-    print(f"错误: 文件未找到于路径 {file_path}")
-except Exception as e:
-    print(f"处理过程中发生错误: {e}")
-
-
-# 11. 去除含有空数据的行
-print("\n开始清理含有空数据的行...")
-original_row_count = len(df)
-print(f"清理前数据行数: {original_row_count}")
-
-# 检查每列的空值数量
-null_counts = df.isnull().sum()
-print("\n各列空值数量:")
-for column, count in null_counts.items():
-    print(f"- {column}: {count}")
-
-# 删除包含任何空值的行
-df_cleaned = df.dropna()
-cleaned_row_count = len(df_cleaned)
-removed_rows = original_row_count - cleaned_row_count
-print(f"\n已删除 {removed_rows} 行含有空值的数据 ({removed_rows/original_row_count:.2%})")
-print(f"清理后数据行数: {cleaned_row_count}")
-
-# 保存清理后的数据
-cleaned_output_path = file_path.replace('.csv', '_cleaned.csv')
-df_cleaned.to_csv(cleaned_output_path, index=False)
-print(f"已将清理后的数据保存到: {cleaned_output_path}")
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            futures = [executor.submit(_process_file_safe, path, options) for path in files]
+            for future in as_completed(futures):
+                results.append(future.result())
+                _print_result(results[-1])
+
+    elapsed = time.perf_counter() - batch_start
+    total_rows = sum(r['rows'] for r in results)
+    total_bytes = sum(r['bytes'] for r in results)
+    failed = [r for r in results if r['error']]
+    print(f"\n共处理 {len(results)} 个文件（失败 {len(failed)} 个），{total_rows} 行，"
+          f"耗时 {elapsed:.2f} 秒")
+    if elapsed > 0:
+        print(f"整体吞吐量: {total_rows / elapsed:,.0f} 行/秒, {total_bytes / elapsed / 1e6:.1f} MB/秒")
+    return results
+
+
+def _print_result(result: dict) -> None:
+    if result['error']:
+        print(f"[失败] {result['file']}: {result['error']}")
+        return
+    removed = result['rows'] - result['cleaned_rows']
+    seconds = max(result['seconds'], 1e-9)
+    print(f"[完成] {result['file']}: {result['rows']} 行, 删除含空值行 {removed} 行, "
+          f"日期列空值 {result['date_nan']}, {result['rows'] / seconds:,.0f} 行/秒, "
+          f"{result['bytes'] / seconds / 1e6:.1f} MB/秒")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="批量转换 CSV 文件的日期格式并删除含空值的行")
+    parser.add_argument('inputs', nargs='*', help="输入 CSV 文件或通配符")
+    parser.add_argument('--glob', dest='pattern', help="额外的输入通配符，支持 ** 递归匹配")
+    parser.add_argument('--date-column', default='Date', help="日期列名，默认为 Date")
+    parser.add_argument('--input-format', default='%d/%m/%Y', help="原始日期格式，默认为 %%d/%%m/%%Y")
+    parser.add_argument('--output-format', default='%d/%m/%y', help="目标日期格式，默认为 %%d/%%m/%%y")
+    parser.add_argument('--sep', default=',', help="CSV 分隔符，默认为 ,")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="每块的行数")
+    parser.add_argument('--workers', type=int, default=None, help="并行进程数，默认为 CPU 核数")
+    parser.add_argument('--output-dir', default=None, help="输出目录，默认与输入文件相同")
+    parser.add_argument('--cleaned-only', action='store_true', help="只写出 _cleaned.csv")
+    args = parser.parse_args(argv)
+
+    files = expand_inputs(args.inputs, args.pattern)
+    if not files:
+        parser.error("没有找到任何输入文件")
+
+    print(f"开始处理 {len(files)} 个文件，目标列: {args.date_column}")
+    try:
+        results = run_batch(
+            files,
+            workers=args.workers,
+            date_column=args.date_column,
+            input_format=args.input_format,
+            output_format=args.output_format,
+            separator=args.sep,
+            chunksize=args.chunksize,
+            output_dir=args.output_dir,
+            write_processed=not args.cleaned_only
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,8 +1,37 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import argparse
+import io
 import os
 
+from datetime_parsing import ordered_formats, combine_date_time, format_report_summary
+from power_stream import DEFAULT_CHUNKSIZE, iter_power_chunks, load_power_data_chunked
+from power_cache import (CACHE_VERSION, append_frame, cache_entry_dir, complete_lines_length,
+                         file_window_digest, load_cached_frame, open_prefix, read_frame, read_last_row, read_meta,
+                         save_cached_frame, source_signature, update_meta)
+from power_store import PowerStore
+from power_anomaly import detect_anomalies
+from power_rollups import (ROLLUP_VERSION, build_histogram, build_rollups, load_rollups,
+                           merge_rollups, read_rollup_meta, save_rollups, update_histogram)
+
+# 清洗后数据的默认缓存目录（与脚本同目录）
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.power_cache')
+
+# 解析/清洗参数，作为缓存键的一部分
+CLEAN_PARAMS = {
+    'date_format': '%d/%m/%y',
+    'time_format': '%H:%M:%S',
+    'separator': ',',
+    'na_values': ['?'],
+    'fill': 'ffill',
+    'float_dtype': 'float32'
+}
+
+# analysis_report.md 中自动生成的数据概要区块的起止标记
+REPORT_SUMMARY_START = '<!-- rollup-summary:start -->'
+REPORT_SUMMARY_END = '<!-- rollup-summary:end -->'
+
 def merge_datetime_columns(file_path: str, date_col: str = 'Date', time_col: str = 'Time', 
                          new_col_name: str = 'DateTime', date_format: str = '%d/%m/%y', 
                          time_format: str = '%H:%M:%S', separator: str = ';', 
@@ -21,7 +50,8 @@ def merge_datetime_columns(file_path: str, date_col: str = 'Date', time_col: str
         na_values (list): 需要识别为缺失值的值列表，默认为['?']
     
     返回:
-        pd.DataFrame: 包含合并后DateTime列的数据框
+        pd.DataFrame: 包含合并后DateTime列的数据框，
+                      各日期格式匹配的行数记录在 df.attrs['datetime_format_report'] 中
     """
     try:
         # 读取CSV文件，确保日期和时间列作为字符串读入
@@ -32,64 +62,39 @@ def merge_datetime_columns(file_path: str, date_col: str = 'Date', time_col: str
             dtype={date_col: str, time_col: str}
         )
         
-        # 创建临时列合并日期和时间字符串
-        temp_datetime_str_col = '_temp_datetime_str_'
-        df[temp_datetime_str_col] = df[date_col] + ' ' + df[time_col]
-        
-        # 尝试将合并的字符串转换为datetime对象
-        df[new_col_name] = pd.to_datetime(df[temp_datetime_str_col], errors='coerce')
-        
-        # 处理无法解析的日期时间
-        mask_nat = df[new_col_name].isna()
-        if mask_nat.any():
-            # 使用指定的格式尝试解析
-            full_format = f'{date_format} {time_format}'
-            df.loc[mask_nat, new_col_name] = pd.to_datetime(
-                df.loc[mask_nat, temp_datetime_str_col], 
-                format=full_format, 
-                errors='coerce'
-            )
-            
-            # 定义其他可能的日期时间格式
-            alternative_formats = [
-                '%d/%m/%Y %H:%M:%S',
-                '%m/%d/%y %H:%M:%S',
-                '%m/%d/%Y %H:%M:%S',
-                '%Y-%m-%d %H:%M:%S',
-                '%d-%m-%y %H:%M:%S',
-                '%d-%m-%Y %H:%M:%S'
-            ]
-            
-            # 尝试使用替代格式解析剩余的NaT值
-            for fmt in alternative_formats:
-                mask_still_nat = df[new_col_name].isna()
-                if not mask_still_nat.any():
-                    break
-                df.loc[mask_still_nat, new_col_name] = pd.to_datetime(
-                    df.loc[mask_still_nat, temp_datetime_str_col], 
-                    format=fmt, 
-                    errors='coerce'
-                )
-
-        # 删除临时列
-        df.drop(columns=[temp_datetime_str_col], inplace=True)
+        # 合并日期和时间：每个不同的日期只解析一次，时间部分按偏移量矢量化相加
+        candidates = ordered_formats(date_format)
+        df[new_col_name], format_report = combine_date_time(
+            df, date_col, time_col, time_format=time_format, candidates=candidates
+        )
+        df.attrs['datetime_format_report'] = format_report
+        print("日期格式匹配情况:")
+        print(format_report_summary(format_report))
         return df
 
     except Exception as e:
         print(f"处理文件时发生错误：{e}")
         raise
 
-def load_power_data(file_path):
+def load_power_data(file_path, chunksize=None):
     """
     加载家庭用电数据并处理日期时间格式。
     
     参数:
         file_path (str): CSV文件路径
+        chunksize (int): 可选，按块流式读取的行数。指定后数值列为 float32
+                         且已跨块前向填充，可显著降低内存峰值
     
     返回:
         pandas.DataFrame: 处理后的数据框，使用datetime作为索引
     """
     try:
+        if chunksize:
+            df = load_power_data_chunked(file_path, chunksize=chunksize)
+            print(f"数据已分块加载自: {file_path}")
+            print("Datetime 索引创建成功。")
+            return df
+
         # 使用merge_datetime_columns函数加载和处理数据
         df = merge_datetime_columns(
             file_path,
@@ -103,6 +108,12 @@ def load_power_data(file_path):
         
         # 将Datetime列设置为索引
         df.set_index('Datetime', inplace=True)
+
+        # 日期或时间无法解析的行没有时间戳，直接丢弃（与分块读取、增量追加的处理一致）
+        unparsed = df.index.isna()
+        if unparsed.any():
+            print(f"丢弃 {int(unparsed.sum())} 行日期时间无法解析的数据。")
+            df = df[~unparsed]
         
         # 删除原始的日期和时间列
         if 'Date' in df.columns and 'Time' in df.columns:
@@ -121,12 +132,14 @@ def load_power_data(file_path):
         return None
 
 
-def preprocess_data(df):
+def preprocess_data(df, float_dtype=float):
     """
     对用电数据进行预处理，包括处理缺失值和数据类型转换。
     
     参数:
         df (pandas.DataFrame): 原始数据框
+        float_dtype: 数值列统一转换的浮点类型，默认为 float (float64)；
+                     分块加载的数据可传入 'float32' 以避免再复制一份 float64
     
     返回:
         pandas.DataFrame: 预处理后的数据框
@@ -154,27 +167,261 @@ def preprocess_data(df):
                 print(f"警告: 列 '{col}' 无法转换为数值类型。")
         # 将数值列统一转换为float类型
         elif pd.api.types.is_numeric_dtype(df_filled[col]):
-            df_filled[col] = df_filled[col].astype(float)
+            df_filled[col] = df_filled[col].astype(float_dtype, copy=False)
 
     print("\n数据类型:")
     print(df_filled.dtypes)
     print("数据预处理完成。")
     return df_filled
 
-def explore_and_visualize(df, save_dir):
+def load_clean_power_data(file_path, cache_dir=DEFAULT_CACHE_DIR, chunksize=None, use_cache=True):
+    """
+    加载并预处理家庭用电数据，优先使用列式二进制缓存。
+
+    缓存按源文件路径、大小、修改时间以及解析/清洗参数区分，源文件变化后自动失效。
+    缓存中数值列为 float32，索引为 int64 时间戳，命中时无需任何字符串解析。
+
+    参数:
+        file_path (str): CSV文件路径
+        cache_dir (str): 缓存目录，默认为脚本目录下的 .power_cache
+        chunksize (int): 可选，缓存未命中时按块流式读取的行数
+        use_cache (bool): 是否读写缓存，默认为 True
+
+    返回:
+        pandas.DataFrame: 预处理后的数据框（float32 列，Datetime 索引）；加载失败时返回 None
+    """
+    params = CLEAN_PARAMS
+    if use_cache and os.path.exists(file_path):
+        cached = load_cached_frame(cache_dir, file_path, params)
+        if cached is not None:
+            print(f"已从缓存加载清洗后的数据: {len(cached)} 行")
+            return cached
+
+    return _rebuild_clean_power_data(file_path, cache_dir, chunksize, use_cache)
+
+
+def _append_state(file_path, consumed_bytes):
+    """记录缓存已读取到源文件的哪个字节位置，以及表头和首尾窗口摘要，供增量追加使用。"""
+    with open(file_path, 'rb') as f:
+        header = f.readline().decode('utf-8')
+    return {
+        'consumed_bytes': consumed_bytes,
+        'header': header,
+        'digest': file_window_digest(file_path, consumed_bytes)
+    }
+
+
+def _sort_by_time(df):
+    """按时间稳定排序（缓存和 PowerStore 的二分查找要求索引有序）；已有序时原样返回。"""
+    if df.index.is_monotonic_increasing:
+        return df
+    print("数据中有时间乱序的行，按时间重新排序。")
+    return df.sort_index(kind='stable')
+
+
+def _rebuild_clean_power_data(file_path, cache_dir, chunksize=None, use_cache=True):
+    """
+    完整解析源文件、预处理并（可选）写入缓存。
+
+    只解析到最后一个换行符为止：文件正在写入时末尾不完整的一行不读取，
+    记录的已读取位置也停在该行之前，下次增量刷新时整行读入。
+    """
+    # 在解析前记录源文件签名，避免解析期间文件被修改导致缓存与内容不符
+    source = source_signature(file_path) if os.path.exists(file_path) else None
+    consumed = None if source is None else complete_lines_length(file_path, source['size'])
+    if consumed is None or consumed == source['size']:
+        df = load_power_data(file_path, chunksize=chunksize)
+    else:
+        print(f"源文件末尾有 {source['size'] - consumed} 字节不完整的行，留到下次刷新。")
+        with open_prefix(file_path, consumed) as f:
+            df = load_power_data(f, chunksize=chunksize)
+    if df is None:
+        return None
+    df = preprocess_data(df, float_dtype=CLEAN_PARAMS['float_dtype'])
+    df = _sort_by_time(df)
+
+    if use_cache and source is not None:
+        entry_dir = save_cached_frame(cache_dir, file_path, CLEAN_PARAMS, df, source=source,
+                                      extra_meta={'append_state': _append_state(file_path, consumed)})
+        print(f"清洗后的数据已写入缓存: {entry_dir}")
+    return df
+
+
+def _refresh_rollups(file_path, cache_dir, entry_dir, old_source, source, new_df):
+    """增量更新汇总结果：只对新数据计算汇总，再与已有汇总合并。"""
+    rollup_params = dict(CLEAN_PARAMS, rollups=ROLLUP_VERSION)
+    rollup_dir = cache_entry_dir(cache_dir, file_path, rollup_params)
+    rollup_meta = read_rollup_meta(rollup_dir)
+    if rollup_meta is None or rollup_meta.get('source') != old_source:
+        print("没有与缓存对应的汇总结果，将在下次加载汇总时重新计算。")
+        return
+
+    rollups = load_rollups(rollup_dir, rollup_meta)
+    if new_df is not None:
+        histogram = update_histogram(rollups['histogram'], new_df['Global_active_power'])
+        rollups = merge_rollups(rollups, build_rollups(new_df))
+        if histogram is None:
+            print("新数据超出原有直方图范围，重新计算直方图。")
+            histogram = build_histogram(read_frame(entry_dir)['Global_active_power'])
+        rollups['histogram'] = histogram
+    save_rollups(rollup_dir, rollups, meta={'source': source, 'params': rollup_params})
+    print("汇总结果已增量更新。")
+
+
+def refresh_power_data(file_path, cache_dir=DEFAULT_CACHE_DIR, chunksize=DEFAULT_CHUNKSIZE, rebuild=False):
+    """
+    增量刷新清洗后的数据缓存：只解析源文件末尾新追加的行。
+
+    根据缓存记录的已读取字节位置定位新数据，用缓存中最后一行的值继续前向填充，
+    把新行追加到各列文件末尾，并以合并方式增量更新小时/日/周/月汇总和直方图。
+    如果缓存不存在，或源文件不是单纯在末尾追加（被截断，或开头/已读取位置附近的内容被修改），
+    则执行完整重建。为使每次刷新的 I/O 只与新增数据量有关，不会校验整个历史，
+    历史中间的行被修改时需要传入 rebuild=True（命令行 --rebuild）强制重建。
+
+    参数:
+        file_path (str): CSV文件路径
+        cache_dir (str): 缓存目录
+        chunksize (int): 解析新数据时每块的行数
+        rebuild (bool): 忽略已有缓存，执行完整重建
+
+    返回:
+        dict: {'mode': 'full'/'append'/'noop', 'new_rows': 新增行数}
+    """
+    entry_dir = cache_entry_dir(cache_dir, file_path, CLEAN_PARAMS)
+    meta = read_meta(entry_dir)
+    source = source_signature(file_path)
+    state = (meta or {}).get('append_state')
+
+    if rebuild or meta is None or meta.get('version') != CACHE_VERSION or state is None or not meta['rows']:
+        print("执行完整重建。" if rebuild else "没有可追加的已有缓存，执行完整加载。")
+        df = _rebuild_clean_power_data(file_path, cache_dir, chunksize)
+        return {'mode': 'full', 'new_rows': 0 if df is None else len(df)}
+
+    if meta.get('source') == source:
+        print("源文件没有新数据。")
+        return {'mode': 'noop', 'new_rows': 0}
+
+    consumed = state['consumed_bytes']
+    # 只比对开头和已读取位置之前的固定窗口，刷新的 I/O 只与新增数据量有关
+    if source['size'] < consumed or file_window_digest(file_path, consumed) != state['digest']:
+        print("源文件已被修改或截断（不是在末尾追加），执行完整重建。")
+        df = _rebuild_clean_power_data(file_path, cache_dir, chunksize)
+        return {'mode': 'full', 'new_rows': 0 if df is None else len(df)}
+
+    # 只读取新增字节，并且只处理其中完整的行；不完整的最后一行留到下次刷新
+    with open(file_path, 'rb') as f:
+        f.seek(consumed)
+        tail = f.read(source['size'] - consumed)
+    tail = tail[:tail.rfind(b'\n') + 1]
+    if not tail.strip():
+        print("源文件没有新的完整数据行。")
+        return {'mode': 'noop', 'new_rows': 0}
+
+    last_row = read_last_row(entry_dir, meta)
+    chunks = list(iter_power_chunks(
+        io.BytesIO(state['header'].encode('utf-8') + tail), chunksize=chunksize,
+        new_col_name=meta.get('index_name') or 'Datetime',
+        date_format=CLEAN_PARAMS['date_format'], time_format=CLEAN_PARAMS['time_format'],
+        separator=CLEAN_PARAMS['separator'], na_values=CLEAN_PARAMS['na_values'],
+        float_dtype=CLEAN_PARAMS['float_dtype'], carry=last_row
+    ))
+    new_df = pd.concat(chunks) if chunks else None
+    if new_df is not None:
+        # 去掉时间不晚于已存储最后一行的数据，避免重复追加
+        new_df = _sort_by_time(new_df[new_df.index > last_row.name])
+
+    new_state = {
+        'consumed_bytes': consumed + len(tail),
+        'header': state['header'],
+        'digest': file_window_digest(file_path, consumed + len(tail))
+    }
+    if new_df is None or new_df.empty:
+        update_meta(entry_dir, {'source': source, 'append_state': new_state})
+        _refresh_rollups(file_path, cache_dir, entry_dir, meta.get('source'), source, None)
+        print("新数据均已存在于缓存中。")
+        return {'mode': 'noop', 'new_rows': 0}
+
+    append_frame(entry_dir, new_df, {'source': source, 'append_state': new_state})
+    print(f"已向缓存追加 {len(new_df)} 行新数据。")
+    _refresh_rollups(file_path, cache_dir, entry_dir, meta.get('source'), source, new_df)
+    return {'mode': 'append', 'new_rows': len(new_df)}
+
+
+def open_power_store(file_path, cache_dir=DEFAULT_CACHE_DIR, refresh=True):
+    """
+    打开清洗后数据的内存映射存储，用于按时间范围快速查询。
+
+    参数:
+        file_path (str): CSV文件路径
+        cache_dir (str): 缓存目录
+        refresh (bool): 打开前是否先增量刷新缓存（缓存不存在时会完整构建）
+
+    返回:
+        PowerStore: 可通过 query(start, end) 获取零拷贝切片的存储对象
+
+    示例:
+        store = open_power_store(file_path)
+        week = store.query('2007-02-01', '2007-02-08', columns=['Global_active_power'])
+    """
+    if refresh:
+        refresh_power_data(file_path, cache_dir=cache_dir)
+    return PowerStore(cache_entry_dir(cache_dir, file_path, CLEAN_PARAMS))
+
+
+def load_power_rollups(file_path, df=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    读取或计算多粒度汇总结果（小时/日/周/月的 sum/count/min/max/mean 及直方图）。
+
+    汇总结果与清洗后数据使用相同的失效规则：源文件或参数变化后自动重新计算。
+
+    参数:
+        file_path (str): CSV文件路径
+        df (pandas.DataFrame): 预处理后的数据框；缓存未命中时用于计算汇总
+        cache_dir (str): 缓存目录
+
+    返回:
+        dict: power_rollups.build_rollups 格式的汇总结果
+    """
+    params = dict(CLEAN_PARAMS, rollups=ROLLUP_VERSION)
+    rollup_dir = cache_entry_dir(cache_dir, file_path, params)
+    source = source_signature(file_path) if os.path.exists(file_path) else None
+
+    meta = read_rollup_meta(rollup_dir)
+    if meta is not None and source is not None and meta.get('source') == source:
+        print("已从缓存加载汇总结果。")
+        return load_rollups(rollup_dir, meta)
+
+    if df is None:
+        df = load_clean_power_data(file_path, cache_dir=cache_dir)
+    print("计算小时/日/周/月汇总...")
+    rollups = build_rollups(df)
+    if source is not None:
+        save_rollups(rollup_dir, rollups, meta={'source': source, 'params': params})
+        print(f"汇总结果已写入: {rollup_dir}")
+    return rollups
+
+
+def explore_and_visualize(df, save_dir, rollups=None):
     """
     进行探索性数据分析并创建可视化图表。
+
+    所有图表都从多粒度汇总结果绘制，不再对分钟级原始数据重复重采样。
     
     参数:
-        df (pandas.DataFrame): 预处理后的数据框
+        df (pandas.DataFrame): 预处理后的数据框；提供 rollups 时可以为 None
         save_dir (str): 保存图表的目录
+        rollups (dict): 可选，load_power_rollups/build_rollups 的汇总结果
     """
     print("\n开始探索性分析与可视化...")
+    if rollups is None:
+        rollups = build_rollups(df)
+    daily = rollups['day']
+    monthly = rollups['month']
 
     # 1. 绘制每日总有功功率时序图
     print("绘制每日总有功功率...")
     plt.figure(figsize=(15, 6))
-    df['Global_active_power'].resample('D').sum().plot(
+    daily[('Global_active_power', 'sum')].plot(
         title='Daily Global Active Power (Resampled Daily Sum)'
     )
     plt.ylabel('Global Active Power (kilowatt)')
@@ -189,9 +436,9 @@ def explore_and_visualize(df, save_dir):
     # 2. 绘制分项用电量时序图
     print("绘制每日分项计量...")
     plt.figure(figsize=(15, 6))
-    df['Sub_metering_1'].resample('D').sum().plot(label='Kitchen', alpha=0.8)
-    df['Sub_metering_2'].resample('D').sum().plot(label='Laundry Room', alpha=0.8)
-    df['Sub_metering_3'].resample('D').sum().plot(label='Water Heater & AC', alpha=0.8)
+    daily[('Sub_metering_1', 'sum')].plot(label='Kitchen', alpha=0.8)
+    daily[('Sub_metering_2', 'sum')].plot(label='Laundry Room', alpha=0.8)
+    daily[('Sub_metering_3', 'sum')].plot(label='Water Heater & AC', alpha=0.8)
     plt.title('Daily Sub-metering (Resampled Daily Sum)')
     plt.ylabel('Energy (watt-hour)')
     plt.xlabel('Date')
@@ -203,10 +450,12 @@ def explore_and_visualize(df, save_dir):
     print(f"图表已保存至: {save_path_2}")
     plt.show()
 
-    # 3. 绘制总有功功率分布直方图
+    # 3. 绘制总有功功率分布直方图（使用预先计算的分箱计数）
     print("绘制Global Active Power Distribution...")
+    histogram = rollups['histogram']
     plt.figure(figsize=(10, 6))
-    df['Global_active_power'].hist(bins=100, alpha=0.7)
+    plt.bar(histogram['left'], histogram['count'], width=histogram['right'] - histogram['left'],
+            align='edge', alpha=0.7)
     plt.title('Global Active Power Distribution')
     plt.xlabel('Global Active Power (kilowatt)')
     plt.ylabel('Frequency')
@@ -220,7 +469,9 @@ def explore_and_visualize(df, save_dir):
     # 4. 绘制每月平均总有功功率柱状图
     print("绘制Monthly Average Global Active Power...")
     plt.figure(figsize=(12, 6))
-    df['Global_active_power'].resample('M').mean().plot(
+    monthly_mean = monthly[('Global_active_power', 'mean')]
+    monthly_mean.index = monthly_mean.index.strftime('%Y-%m')
+    monthly_mean.plot(
         kind='bar',
         title='Monthly Average Global Active Power'
     )
@@ -237,20 +488,83 @@ def explore_and_visualize(df, save_dir):
     print("探索性分析与可视化完成。")
 
 
+def update_analysis_report(rollups, report_path):
+    """
+    根据汇总结果更新 analysis_report.md 中的数据概要区块。
+
+    只替换 REPORT_SUMMARY_START 与 REPORT_SUMMARY_END 之间的内容，报告其余部分保持不变。
+
+    参数:
+        rollups (dict): 多粒度汇总结果
+        report_path (str): analysis_report.md 的路径
+    """
+    daily = rollups['day']
+    monthly = rollups['month']
+    gap = 'Global_active_power'
+    minutes = int(monthly[(gap, 'count')].sum())
+    daily_sum = daily[(gap, 'sum')]
+    monthly_mean = monthly[(gap, 'mean')].dropna()
+    sub_totals = {
+        name: monthly[(col, 'sum')].sum()
+        for col, name in (('Sub_metering_1', '厨房'), ('Sub_metering_2', '洗衣房'),
+                          ('Sub_metering_3', '热水器和空调'))
+    }
+    sub_total = sum(sub_totals.values()) or 1.0
+
+    lines = [
+        REPORT_SUMMARY_START,
+        f"*   时间范围: {daily.index.min():%Y-%m-%d} 至 {daily.index.max():%Y-%m-%d}，"
+        f"共 {len(daily)} 天、{minutes} 条分钟级记录。",
+        f"*   分钟级总有功功率均值: {monthly[(gap, 'sum')].sum() / max(minutes, 1):.3f} 千瓦，"
+        f"最大值: {monthly[(gap, 'max')].max():.3f} 千瓦。",
+        f"*   每日总有功功率之和最高的一天: {daily_sum.idxmax():%Y-%m-%d} ({daily_sum.max():.1f})。",
+        f"*   月平均总有功功率最高的月份: {monthly_mean.idxmax():%Y-%m} ({monthly_mean.max():.3f} 千瓦)，"
+        f"最低的月份: {monthly_mean.idxmin():%Y-%m} ({monthly_mean.min():.3f} 千瓦)。",
+        "*   分项计量用电占比: " + "，".join(
+            f"{name} {total / sub_total:.1%}" for name, total in sub_totals.items()) + "。",
+        REPORT_SUMMARY_END
+    ]
+    summary = '\n'.join(lines)
+
+    with open(report_path, encoding='utf-8') as f:
+        content = f.read()
+    if REPORT_SUMMARY_START in content and REPORT_SUMMARY_END in content:
+        head = content[:content.index(REPORT_SUMMARY_START)]
+        tail = content[content.index(REPORT_SUMMARY_END) + len(REPORT_SUMMARY_END):]
+        content = head + summary + tail
+    else:
+        content = content.rstrip('\n') + '\n\n## 数据概要\n\n' + summary + '\n'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    print(f"报告数据概要已更新: {report_path}")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="家庭用电数据分析")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="忽略已有缓存，完整重新解析源文件（历史数据中间被修改时使用）")
+    args = parser.parse_args()
+
     # 设置文件路径
     script_dir = os.path.dirname(__file__)
     file_path = os.path.join(script_dir, 'household_power_consumption.csv')
     
     try:
-        # 加载数据
-        power_df = load_power_data(file_path)
+        # 源文件在末尾追加了新数据时只解析新增部分，然后加载并预处理数据（命中缓存时跳过 CSV 解析）
+        if os.path.exists(file_path):
+            refresh_power_data(file_path, rebuild=args.rebuild)
+        processed_df = load_clean_power_data(file_path)
 
-        if power_df is not None:
-            # 预处理数据
-            processed_df = preprocess_data(power_df)
+        if processed_df is not None:
+            # 一次计算多粒度汇总，之后的图表和报告都从汇总结果读取
+            rollups = load_power_rollups(file_path, processed_df)
             # 进行探索性分析和可视化
-            explore_and_visualize(processed_df, script_dir)
+            explore_and_visualize(processed_df, script_dir, rollups)
+            update_analysis_report(rollups, os.path.join(script_dir, 'analysis_report.md'))
+            # 按时段统计回放全部数据，标记尖峰和长时间不变的读数
+            anomalies = detect_anomalies(processed_df)
+            print(f"检测到 {int(anomalies['spike'].sum())} 个尖峰读数，"
+                  f"{int(anomalies['flatline'].sum())} 个长时间不变的读数")
         else:
             print("数据加载失败，无法继续分析。")
     except Exception as e:
@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+
+MINUTE_NS = 60 * 10**9
+MINUTES_PER_DAY = 1440
+
+
+class TimeOfDayAnomalyDetector:
+    """
+    按一天中的时段在线检测用电读数的尖峰（spike）和长时间不变（flatline）。
+
+    每个时段（默认 15 分钟一个，共 96 个）维护 Welford 累加器（样本数、均值、M2），
+    新读数先与所属时段的历史均值/标准差比较，再以 O(1) 代价更新累加器：
+        - spike: 该时段已有至少 min_samples 个样本，且 |x - 均值| > z_threshold * 标准差
+        - flatline: 连续 flatline_samples 个有效读数的变化都不超过 flatline_tolerance
+
+    update() 逐条处理实时读数；replay() 以矢量化方式回放历史数据，
+    结果与逐条调用 update() 相同（在浮点误差范围内），两者可以交替使用，状态连续。
+    缺失值（NaN）不参与统计，也不会打断 flatline 计数。
+    """
+
+    def __init__(self, bucket_minutes: int = 15, z_threshold: float = 4.0, min_samples: int = 30,
+                 flatline_samples: int = 120, flatline_tolerance: float = 1e-6, min_std: float = 1e-3):
+        if MINUTES_PER_DAY % bucket_minutes:
+            raise ValueError(f"bucket_minutes 必须能整除 {MINUTES_PER_DAY}，当前为 {bucket_minutes}")
+        self.bucket_minutes = bucket_minutes
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.flatline_samples = flatline_samples
+        self.flatline_tolerance = flatline_tolerance
+        self.min_std = min_std
+
+        n_buckets = MINUTES_PER_DAY // bucket_minutes
+        self.count = np.zeros(n_buckets, dtype='int64')
+        self.mean = np.zeros(n_buckets, dtype='float64')
+        self.m2 = np.zeros(n_buckets, dtype='float64')
+        self.last_value = np.nan
+        self.run_length = 0
+
+    def bucket_of(self, timestamps_ns) -> np.ndarray:
+        """把 int64 纳秒时间戳映射为时段编号。"""
+        minute_of_day = (np.asarray(timestamps_ns, dtype='int64') // MINUTE_NS) % MINUTES_PER_DAY
+        return (minute_of_day // self.bucket_minutes).astype('int16')
+
+    def update(self, timestamp, value: float) -> dict:
+        """
+        处理一条实时读数（O(1)）。
+
+        参数:
+            timestamp: 读数时间
+            value (float): 读数
+
+        返回:
+            dict: 包含 expected/std/zscore/spike/flatline 的检测结果
+        """
+        ts_ns = int(pd.Timestamp(timestamp).to_datetime64().astype('datetime64[ns]').astype('int64'))
+        bucket = int(self.bucket_of(ts_ns))
+        result = {'timestamp': pd.Timestamp(ts_ns), 'value': value, 'bucket': bucket,
+                  'expected': np.nan, 'std': np.nan, 'zscore': np.nan,
+                  'spike': False, 'flatline': False}
+        if value is None or np.isnan(value):
+            return result
+
+        n, mean = self.count[bucket], self.mean[bucket]
+        if n:
+            std = np.sqrt(self.m2[bucket] / (n - 1)) if n > 1 else 0.0
+            zscore = (value - mean) / max(std, self.min_std)
+            result.update(expected=mean, std=std, zscore=zscore,
+                          spike=bool(n >= self.min_samples and abs(zscore) > self.z_threshold))
+
+        # Welford 更新
+        n += 1
+        delta = value - mean
+        mean += delta / n
+        self.count[bucket] = n
+        self.mean[bucket] = mean
+        self.m2[bucket] += delta * (value - mean)
+
+        if abs(value - self.last_value) <= self.flatline_tolerance:
+            self.run_length += 1
+        else:
+            self.run_length = 1
+        self.last_value = value
+        result['flatline'] = self.run_length >= self.flatline_samples
+        return result
+
+    def replay(self, timestamps, values) -> pd.DataFrame:
+        """
+        矢量化回放一批按时间排序的读数，并更新检测器状态。
+
+        每条读数只与它之前（包括之前批次和本批次中更早）的同时段读数比较。
+        实现方式：按时段稳定排序后，用组内前缀和得到每条读数之前本批次的
+        均值和 M2，再与已有累加器按 Chan 并行公式合并，无需逐条循环。
+
+        参数:
+            timestamps: 时间戳（DatetimeIndex、datetime64 数组或 int64 纳秒）
+            values: 读数数组
+
+        返回:
+            pandas.DataFrame: 以时间为索引，包含 value/bucket/expected/std/zscore/spike/flatline 列
+        """
+        ts_ns = np.asarray(pd.DatetimeIndex(timestamps).to_numpy(dtype='datetime64[ns]')).view('int64')
+        x = np.asarray(values, dtype='float64')
+        buckets = self.bucket_of(ts_ns)
+        n_rows = len(x)
+
+        expected = np.full(n_rows, np.nan)
+        std = np.full(n_rows, np.nan)
+        zscore = np.full(n_rows, np.nan)
+        spike = np.zeros(n_rows, dtype=bool)
+        flatline = np.zeros(n_rows, dtype=bool)
+
+        valid = np.flatnonzero(~np.isnan(x))
+        if len(valid):
+            self._replay_stats(valid, buckets[valid], x[valid], expected, std, zscore, spike)
+            flatline[valid] = self._replay_flatline(x[valid])
+
+        return pd.DataFrame({
+            'value': x, 'bucket': buckets, 'expected': expected, 'std': std,
+            'zscore': zscore, 'spike': spike, 'flatline': flatline
+        }, index=pd.DatetimeIndex(ts_ns.view('datetime64[ns]'), name='Datetime'))
+
+    def _replay_stats(self, positions, buckets, x, expected, std, zscore, spike) -> None:
+        # int16 上的稳定排序使用基数排序，代价为 O(n)
+        order = np.argsort(buckets, kind='stable')
+        b = buckets[order]
+        xs = x[order]
+        m = len(xs)
+
+        starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, m]))
+        k = np.arange(m) - starts[group]          # 本批次中同时段、更早的读数个数
+
+        n0 = self.count[b].astype('float64')
+        mean0 = self.mean[b]
+        m2_0 = self.m2[b]
+        # 以已有均值（无历史时用组内第一个值）为偏移量计算前缀和，保证数值稳定
+        shift = np.where(n0 > 0, mean0, xs[starts][group])
+        d = xs - shift
+        cs1 = np.cumsum(d)
+        cs2 = np.cumsum(d * d)
+        base1 = (cs1 - d)[starts][group]
+        base2 = (cs2 - d * d)[starts][group]
+        s1 = cs1 - d - base1                      # 组内之前读数的偏移量之和（不含当前）
+        s2 = cs2 - d * d - base2
+
+        n, mean, m2 = self._combine(n0, mean0, m2_0, k, shift, s1, s2)
+        sample_std = np.sqrt(np.where(n > 1, m2 / np.maximum(n - 1, 1), 0.0))
+        z = (xs - mean) / np.maximum(sample_std, self.min_std)
+        has_history = n > 0
+
+        target = positions[order]
+        expected[target] = np.where(has_history, mean, np.nan)
+        std[target] = np.where(has_history, sample_std, np.nan)
+        zscore[target] = np.where(has_history, z, np.nan)
+        spike[target] = (n >= self.min_samples) & (np.abs(z) > self.z_threshold)
+
+        # 用每组全部读数更新累加器
+        ends = np.r_[starts[1:], m] - 1
+        k_all = (k[ends] + 1).astype('float64')
+        s1_all = cs1[ends] - base1[ends]
+        s2_all = cs2[ends] - base2[ends]
+        gb = b[starts]
+        n_new, mean_new, m2_new = self._combine(n0[starts], mean0[starts], m2_0[starts],
+                                                k_all, shift[starts], s1_all, s2_all)
+        self.count[gb] = n_new.astype('int64')
+        self.mean[gb] = mean_new
+        self.m2[gb] = m2_new
+
+    @staticmethod
+    def _combine(n0, mean0, m2_0, k, shift, s1, s2):
+        """按 Chan 并行公式合并已有累加器 (n0, mean0, m2_0) 与 k 个偏移量和为 s1、平方和为 s2 的读数。"""
+        safe_k = np.maximum(k, 1)
+        mean_b = shift + s1 / safe_k
+        m2_b = np.maximum(s2 - s1 * s1 / safe_k, 0.0)
+        n = n0 + k
+        safe_n = np.maximum(n, 1)
+        delta = mean_b - mean0
+        mean = np.where(k > 0, mean0 + delta * k / safe_n, mean0)
+        m2 = np.where(k > 0, m2_0 + m2_b + delta * delta * n0 * k / safe_n, m2_0)
+        return n, mean, m2
+
+    def _replay_flatline(self, x) -> np.ndarray:
+        previous = np.r_[self.last_value, x[:-1]]
+        breaks = ~(np.abs(x - previous) <= self.flatline_tolerance)
+        idx = np.arange(len(x))
+        last_break = np.maximum.accumulate(np.where(breaks, idx, -1))
+        run = np.where(last_break >= 0, idx - last_break + 1, self.run_length + idx + 1)
+        self.run_length = int(run[-1])
+        self.last_value = float(x[-1])
+        return run >= self.flatline_samples
+
+    def stream(self, readings):
+        """
+        处理实时读数迭代器，只产出被标记为异常的读数。
+
+        参数:
+            readings: 产出 (timestamp, value) 的可迭代对象
+
+        返回:
+            generator: 逐条产出异常检测结果 dict
+        """
+        for timestamp, value in readings:
+            result = self.update(timestamp, value)
+            if result['spike'] or result['flatline']:
+                yield result
+
+
+def detect_anomalies(df: pd.DataFrame, column: str = 'Global_active_power',
+                     detector: TimeOfDayAnomalyDetector = None, **kwargs) -> pd.DataFrame:
+    """
+    对预处理后的数据（或流式加载的一个数据块）批量回放异常检测。
+
+    参数:
+        df (pandas.DataFrame): 以 Datetime 为索引的数据框，如 preprocess_data 或 iter_power_chunks 的输出
+        column (str): 检测的列，默认为'Global_active_power'
+        detector (TimeOfDayAnomalyDetector): 可选，已有的检测器（分块处理时传入同一个以保持状态）
+        **kwargs: 新建检测器时的参数
+
+    返回:
+        pandas.DataFrame: 只包含被标记为 spike 或 flatline 的行
+    """
+    detector = detector or TimeOfDayAnomalyDetector(**kwargs)
+    flags = detector.replay(df.index, df[column].to_numpy())
+    return flags[flags['spike'] | flags['flatline']]
@@ -0,0 +1,308 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# 缓存格式版本，格式变化时递增，旧缓存会自动失效
+CACHE_VERSION = 3
+META_FILE = 'meta.json'
+# 增量追加时校验的窗口大小：源文件开头和已读取位置之前各取这么多字节求摘要
+APPEND_CHECK_WINDOW = 1 << 20
+INDEX_FILE = 'index.i8'
+
+
+def source_signature(file_path: str) -> dict:
+    """返回源文件的路径、大小和修改时间，用于判断缓存是否仍然有效。"""
+    stat = os.stat(file_path)
+    return {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+
+def cache_entry_dir(cache_dir: str, file_path: str, params: dict) -> str:
+    """
+    计算某个源文件 + 解析/清洗参数组合对应的缓存目录。
+
+    同一源文件、同一组参数始终对应同一目录；文件大小和修改时间记录在
+    meta.json 中，读取时比对，不一致即视为失效。
+    """
+    key_source = json.dumps({'path': os.path.abspath(file_path), 'params': params,
+                             'version': CACHE_VERSION}, sort_keys=True)
+    key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, key)
+
+
+def _column_file(position: int) -> str:
+    return f'col_{position:02d}.bin'
+
+
+def _index_ns(df: pd.DataFrame, after: int = None) -> np.ndarray:
+    """
+    把索引转换为 int64 纳秒，并检查其中没有 NaT 且按时间非递减排列。
+
+    PowerStore 用二分查找定位时间范围，依赖这一点；NaT 会以 int64 最小值写入，
+    乱序的行会让范围查询静默返回错误的切片，因此在写入缓存前拒绝。
+
+    参数:
+        df (pandas.DataFrame): 以 DatetimeIndex 为索引的数据框
+        after (int): 可选，已存储的最后一个时间戳，新数据不能早于它
+    """
+    index = df.index.to_numpy(dtype='datetime64[ns]')
+    if np.isnat(index).any():
+        raise ValueError("索引中有 NaT，不能写入缓存")
+    index = index.view('int64')
+    if (len(index) and after is not None and index[0] < after) or (np.diff(index) < 0).any():
+        raise ValueError("索引没有按时间排序，不能写入缓存")
+    return index
+
+
+def write_frame(entry_dir: str, df: pd.DataFrame, meta: dict = None) -> None:
+    """
+    将以 DatetimeIndex 为索引的数据框按列写为二进制文件。
+
+    索引存为 int64（自 1970-01-01 起的纳秒数），每列按其自身 dtype 存为一个
+    连续的二进制文件，列名和 dtype 记录在 meta.json 中。先写入临时目录再
+    整体替换，避免中断时留下不完整的缓存。索引必须已按时间排序且不含 NaT，否则抛出 ValueError。
+
+    参数:
+        entry_dir (str): 缓存目录
+        df (pandas.DataFrame): 要写入的数据框
+        meta (dict): 额外写入 meta.json 的信息（如源文件签名、参数）
+    """
+    index = _index_ns(df)
+    tmp_dir = f'{entry_dir}.tmp-{os.getpid()}'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    index.tofile(os.path.join(tmp_dir, INDEX_FILE))
+
+    columns = []
+    for position, col in enumerate(df.columns):
+        values = np.ascontiguousarray(df[col].to_numpy())
+        values.tofile(os.path.join(tmp_dir, _column_file(position)))
+        columns.append({'name': col, 'file': _column_file(position), 'dtype': values.dtype.str})
+
+    full_meta = dict(meta or {})
+    full_meta.update({
+        'version': CACHE_VERSION,
+        'rows': len(df),
+        'index_name': df.index.name,
+        'columns': columns
+    })
+    _write_meta(tmp_dir, full_meta)
+
+    if os.path.exists(entry_dir):
+        shutil.rmtree(entry_dir)
+    os.rename(tmp_dir, entry_dir)
+
+
+def _write_meta(entry_dir: str, meta: dict) -> None:
+    """先写临时文件再替换，保证 meta.json 始终完整。"""
+    tmp_path = os.path.join(entry_dir, f'{META_FILE}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(entry_dir, META_FILE))
+
+
+def update_meta(entry_dir: str, updates: dict) -> dict:
+    """更新缓存目录 meta.json 中的部分字段，返回更新后的元信息。"""
+    meta = read_meta(entry_dir)
+    meta.update(updates)
+    _write_meta(entry_dir, meta)
+    return meta
+
+
+def read_meta(entry_dir: str) -> dict:
+    """读取缓存目录的 meta.json，不存在或损坏时返回 None。"""
+    try:
+        with open(os.path.join(entry_dir, META_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_frame(entry_dir: str, meta: dict = None) -> pd.DataFrame:
+    """从缓存目录读取数据框（按列直接读取二进制文件，不涉及字符串解析）。"""
+    meta = meta or read_meta(entry_dir)
+    rows = meta['rows']
+    index = np.fromfile(os.path.join(entry_dir, INDEX_FILE), dtype='int64', count=rows)
+    data = {
+        col['name']: np.fromfile(os.path.join(entry_dir, col['file']), dtype=np.dtype(col['dtype']),
+                                 count=rows)
+        for col in meta['columns']
+    }
+    return pd.DataFrame(data, index=pd.DatetimeIndex(index.view('datetime64[ns]'),
+                                                     name=meta.get('index_name')))
+
+
+def read_last_row(entry_dir: str, meta: dict = None) -> pd.Series:
+    """只读取缓存中最后一行（每列一个值），用于增量追加时的前向填充。"""
+    meta = meta or read_meta(entry_dir)
+    rows = meta['rows']
+    values = {}
+    for col in meta['columns']:
+        dtype = np.dtype(col['dtype'])
+        values[col['name']] = np.fromfile(os.path.join(entry_dir, col['file']), dtype=dtype,
+                                          count=1, offset=(rows - 1) * dtype.itemsize)[0]
+    last_ns = np.fromfile(os.path.join(entry_dir, INDEX_FILE), dtype='int64',
+                          count=1, offset=(rows - 1) * 8)[0]
+    return pd.Series(values, name=pd.Timestamp(last_ns))
+
+
+def append_frame(entry_dir: str, df: pd.DataFrame, meta_updates: dict = None) -> dict:
+    """
+    把新数据追加到已有缓存的各列文件末尾，并更新 meta.json。
+
+    追加前会先把各文件截断到 meta.json 记录的行数，因此即使上一次追加在
+    写完部分列后中断，也不会留下错位的数据。新数据必须按时间排序、不含 NaT，
+    且不早于已存储的最后一行，否则抛出 ValueError。
+
+    参数:
+        entry_dir (str): 缓存目录
+        df (pandas.DataFrame): 新数据，列名和顺序需与缓存一致
+        meta_updates (dict): 需要同时更新的元信息（如新的源文件签名）
+
+    返回:
+        dict: 更新后的元信息
+    """
+    meta = read_meta(entry_dir)
+    names = [col['name'] for col in meta['columns']]
+    if list(df.columns) != names:
+        raise ValueError(f"追加数据的列 {list(df.columns)} 与缓存的列 {names} 不一致")
+
+    rows = meta['rows']
+    last_ns = None
+    if rows:
+        last_ns = int(np.fromfile(os.path.join(entry_dir, INDEX_FILE), dtype='int64',
+                                  count=1, offset=(rows - 1) * 8)[0])
+    files = [(INDEX_FILE, _index_ns(df, after=last_ns))]
+    for col in meta['columns']:
+        files.append((col['file'], df[col['name']].to_numpy(dtype=np.dtype(col['dtype']))))
+
+    for file_name, values in files:
+        path = os.path.join(entry_dir, file_name)
+        with open(path, 'r+b') as f:
+            f.truncate(rows * values.dtype.itemsize)
+            f.seek(0, os.SEEK_END)
+            np.ascontiguousarray(values).tofile(f)
+
+    meta.update(meta_updates or {})
+    meta['rows'] = rows + len(df)
+    _write_meta(entry_dir, meta)
+    return meta
+
+
+def file_window_digest(file_path: str, end: int, window: int = APPEND_CHECK_WINDOW) -> str:
+    """
+    计算文件开头和 end 之前各 window 字节的 SHA1，用于确认文件只是在末尾追加了内容。
+
+    只读取两个固定大小的窗口，每次增量刷新的 I/O 与历史数据量无关；
+    代价是只发现表头附近和已读取位置附近的修改，历史中间某行被改动时不会察觉
+    （此时可用 power_analysis.py --rebuild 强制完整重建）。
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(min(window, end)))
+        f.seek(max(end - window, 0))
+        digest.update(f.read(end - max(end - window, 0)))
+    return digest.hexdigest()
+
+
+def complete_lines_length(file_path: str, size: int, block: int = 65536) -> int:
+    """返回文件前 size 字节中最后一个换行符之后的位置（即完整行的总字节数），没有换行符时为 0。"""
+    with open(file_path, 'rb') as f:
+        end = size
+        while end > 0:
+            start = max(end - block, 0)
+            f.seek(start)
+            position = f.read(end - start).rfind(b'\n')
+            if position >= 0:
+                return start + position + 1
+            end = start
+    return 0
+
+
+class _PrefixReader(io.RawIOBase):
+    """只读取文件前 length 字节的只读流（供 pandas.read_csv 读取完整的行）。"""
+
+    def __init__(self, file_path: str, length: int):
+        self.name = file_path
+        self._file = open(file_path, 'rb')
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def open_prefix(file_path: str, length: int) -> io.BufferedReader:
+    """打开文件，只允许读取前 length 字节。"""
+    return io.BufferedReader(_PrefixReader(file_path, length))
+
+
+def load_cached_frame(cache_dir: str, file_path: str, params: dict) -> pd.DataFrame:
+    """
+    读取有效的缓存；缓存不存在、版本不符或源文件已变化时返回 None。
+
+    参数:
+        cache_dir (str): 缓存根目录
+        file_path (str): 源 CSV 文件路径
+        params (dict): 解析/清洗参数
+
+    返回:
+        pandas.DataFrame 或 None
+    """
+    entry_dir = cache_entry_dir(cache_dir, file_path, params)
+    meta = read_meta(entry_dir)
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return None
+    if meta.get('source') != source_signature(file_path):
+        print("源文件已变化，缓存失效。")
+        return None
+    try:
+        return read_frame(entry_dir, meta)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"读取缓存失败，将重新解析: {e}")
+        return None
+
+
+def save_cached_frame(cache_dir: str, file_path: str, params: dict, df: pd.DataFrame,
+                      source: dict = None, extra_meta: dict = None) -> str:
+    """
+    把清洗后的数据框写入缓存，并记录源文件签名与参数。
+
+    参数:
+        cache_dir (str): 缓存根目录
+        file_path (str): 源 CSV 文件路径
+        params (dict): 解析/清洗参数
+        df (pandas.DataFrame): 清洗后的数据框
+        source (dict): 解析前获取的源文件签名；默认在写入时重新获取
+        extra_meta (dict): 额外写入 meta.json 的信息
+
+    返回:
+        str: 缓存目录路径
+    """
+    entry_dir = cache_entry_dir(cache_dir, file_path, params)
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = dict(extra_meta or {})
+    meta.update({'source': source or source_signature(file_path), 'params': params})
+    write_frame(entry_dir, df, meta=meta)
+    return entry_dir
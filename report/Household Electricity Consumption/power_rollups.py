@@ -0,0 +1,209 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from power_cache import read_frame, write_frame
+
+# 共用的直方图/核密度计算位于上一级目录（report/distribution.py）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from distribution import bin_counts, histogram_frame, histogram_kde
+
+# 汇总粒度（由细到粗）；各粒度的标签均为时间段起点，周从周一开始
+GRAINS = ['hour', 'day', 'week', 'month']
+STATS = ['sum', 'count', 'min', 'max', 'mean']
+ROLLUP_VERSION = 1
+META_FILE = 'rollups.json'
+
+HOUR_NS = 3600 * 10**9
+DAY_NS = 24 * HOUR_NS
+
+
+def _grain_keys(hour_ns: np.ndarray, grain: str) -> np.ndarray:
+    """把小时起点（int64 纳秒）映射为指定粒度的时间段起点。"""
+    if grain == 'hour':
+        return hour_ns
+    if grain == 'day':
+        return hour_ns // DAY_NS * DAY_NS
+    if grain == 'week':
+        days = hour_ns // DAY_NS
+        # 1970-01-01 是周四，(days + 3) % 7 为距离本周一的天数
+        return (days - (days + 3) % 7) * DAY_NS
+    if grain == 'month':
+        months = hour_ns.view('datetime64[ns]').astype('datetime64[M]')
+        return months.astype('datetime64[ns]').view('int64')
+    raise ValueError(f"未知的汇总粒度: {grain}")
+
+
+def _full_range(keys: np.ndarray, grain: str) -> np.ndarray:
+    """生成从最早到最晚时间段的完整标签序列，使缺失的时间段也出现在结果中。"""
+    if not len(keys):
+        return keys
+    start, end = keys.min(), keys.max()
+    if grain == 'month':
+        months = np.arange(start.view('datetime64[ns]').astype('datetime64[M]'),
+                           end.view('datetime64[ns]').astype('datetime64[M]') + 1)
+        return months.astype('datetime64[ns]').view('int64')
+    step = {'hour': HOUR_NS, 'day': DAY_NS, 'week': 7 * DAY_NS}[grain]
+    return np.arange(start, end + step, step, dtype='int64')
+
+
+def _combine(partial: pd.DataFrame, keys: np.ndarray, grain: str) -> pd.DataFrame:
+    """
+    把细粒度的 sum/count/min/max 合并到更粗的粒度，并计算 mean。
+
+    sum 和 count 相加，min/max 取极值，因此不需要再次扫描原始数据。
+    """
+    grouped = partial.groupby(keys, sort=True)
+    parts = []
+    for stat, how in (('sum', 'sum'), ('count', 'sum'), ('min', 'min'), ('max', 'max')):
+        cols = [col for col in partial.columns if col[1] == stat]
+        parts.append(getattr(grouped[cols], how)())
+    return _finish(_complete(pd.concat(parts, axis=1), grain))
+
+
+def _complete(out: pd.DataFrame, grain: str) -> pd.DataFrame:
+    """补齐缺失的时间段：sum/count 记为 0，min/max 为 NaN（与 resample 的结果一致）。"""
+    out = out.reindex(_full_range(np.asarray(out.index, dtype='int64'), grain))
+    fill_cols = [col for col in out.columns if col[1] in ('sum', 'count')]
+    out[fill_cols] = out[fill_cols].fillna(0)
+    return out
+
+
+def _finish(out: pd.DataFrame) -> pd.DataFrame:
+    """补充 mean 列、统一列顺序，并把 int64 标签转换为 DatetimeIndex。"""
+    measures = list(dict.fromkeys(col[0] for col in out.columns))
+    for col in measures:
+        count = out[(col, 'count')]
+        out[(col, 'mean')] = (out[(col, 'sum')] / count).where(count > 0)
+    out = out[[(col, stat) for col in measures for stat in STATS]]
+    out.columns = pd.MultiIndex.from_tuples(out.columns, names=['column', 'stat'])
+    out.index = pd.DatetimeIndex(np.asarray(out.index, dtype='int64').view('datetime64[ns]'),
+                                 name='Datetime')
+    return out.astype('float64')
+
+
+def build_rollups(df: pd.DataFrame, hist_column: str = 'Global_active_power', bins: int = 100) -> dict:
+    """
+    一次扫描原始分钟级数据，计算所有数值列在小时/日/周/月粒度上的 sum/count/min/max/mean。
+
+    只有小时粒度直接扫描原始数据，更粗的粒度都由小时汇总结果合并得到；
+    直方图也在同一次加载中计算，之后绘图无需再访问原始数据。
+
+    参数:
+        df (pandas.DataFrame): 预处理后、以 Datetime 为索引的数据框
+        hist_column (str): 需要计算直方图的列，默认为'Global_active_power'
+        bins (int): 直方图分箱数，默认为 100
+
+    返回:
+        dict: {'hour'/'day'/'week'/'month': 以 (列名, 统计量) 为列的数据框,
+               'histogram': 包含 left/right/count 列的数据框}
+    """
+    numeric = df.select_dtypes(include='number')
+    index_ns = df.index.to_numpy(dtype='datetime64[ns]').view('int64')
+    hour_keys = index_ns // HOUR_NS * HOUR_NS
+
+    hourly = numeric.groupby(hour_keys, sort=True).agg(['sum', 'count', 'min', 'max'])
+    hourly = _complete(hourly.astype('float64'), 'hour')
+
+    hour_ns = np.asarray(hourly.index, dtype='int64')
+    rollups = {'hour': _finish(hourly.copy())}
+    for grain in GRAINS[1:]:
+        rollups[grain] = _combine(hourly, _grain_keys(hour_ns, grain), grain)
+
+    rollups['histogram'] = build_histogram(numeric[hist_column], bins=bins)
+    return rollups
+
+
+def merge_rollups(old: dict, new: dict) -> dict:
+    """
+    把新数据的汇总结果合并进已有汇总结果（增量更新）。
+
+    两者重叠的时间段（如追加数据开始时尚未结束的那一天/那个月）按
+    sum/count 相加、min/max 取极值的方式合并，其余时间段直接拼接，
+    因此代价只与新数据量和汇总表大小有关，与原始历史数据无关。
+
+    直方图需要原始数值，由调用方使用 update_histogram 单独更新。
+
+    参数:
+        old (dict): 已有的汇总结果
+        new (dict): 新数据的汇总结果（使用 build_rollups 计算）
+
+    返回:
+        dict: 合并后的汇总结果（不含 'histogram'）
+    """
+    merged = {}
+    for grain in GRAINS:
+        partial = pd.concat([old[grain], new[grain]])
+        partial = partial[[col for col in partial.columns if col[1] != 'mean']]
+        keys = partial.index.to_numpy(dtype='datetime64[ns]').view('int64')
+        merged[grain] = _combine(partial, keys, grain)
+    return merged
+
+
+def update_histogram(histogram: pd.DataFrame, values: pd.Series) -> pd.DataFrame:
+    """
+    用原有分箱边界为新数据计数并累加到已有直方图上。
+
+    新数据超出原有分箱范围时返回 None，此时需要基于完整数据重新计算直方图。
+    """
+    data = values.dropna().to_numpy(dtype='float64')
+    edges = np.append(histogram['left'].to_numpy(), histogram['right'].iloc[-1])
+    if len(data) and (data.min() < edges[0] or data.max() > edges[-1]):
+        return None
+    counts = bin_counts(data, edges)[0]
+    return histogram.assign(count=histogram['count'].to_numpy() + counts)
+
+
+def build_histogram(values: pd.Series, bins: int = 100) -> pd.DataFrame:
+    """计算与 Series.hist(bins=...) 相同分箱的直方图表（一次 bincount，不计算密度曲线）。"""
+    return histogram_frame(histogram_kde(values.to_numpy(dtype='float64'), bins=bins, kde=False))
+
+
+def save_rollups(rollup_dir: str, rollups: dict, meta: dict = None) -> None:
+    """
+    持久化汇总结果：每个粒度按列写为二进制文件，直方图和元信息写为 JSON。
+
+    参数:
+        rollup_dir (str): 汇总结果目录
+        rollups (dict): build_rollups 的返回值
+        meta (dict): 额外记录的信息（如源文件签名、参数）
+    """
+    os.makedirs(rollup_dir, exist_ok=True)
+    for grain in GRAINS:
+        flat = rollups[grain].copy()
+        flat.columns = [f'{col}|{stat}' for col, stat in flat.columns]
+        write_frame(os.path.join(rollup_dir, grain), flat)
+
+    payload = dict(meta or {})
+    payload['version'] = ROLLUP_VERSION
+    payload['histogram'] = rollups['histogram'].to_dict(orient='list')
+    with open(os.path.join(rollup_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+
+
+def read_rollup_meta(rollup_dir: str) -> dict:
+    """读取汇总结果的元信息，不存在或版本不符时返回 None。"""
+    try:
+        with open(os.path.join(rollup_dir, META_FILE), encoding='utf-8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if payload.get('version') != ROLLUP_VERSION:
+        return None
+    return payload
+
+
+def load_rollups(rollup_dir: str, meta: dict = None) -> dict:
+    """读取 save_rollups 写出的汇总结果。"""
+    meta = meta or read_rollup_meta(rollup_dir)
+    rollups = {}
+    for grain in GRAINS:
+        flat = read_frame(os.path.join(rollup_dir, grain))
+        flat.columns = pd.MultiIndex.from_tuples([tuple(col.split('|', 1)) for col in flat.columns],
+                                                 names=['column', 'stat'])
+        rollups[grain] = flat
+    rollups['histogram'] = pd.DataFrame(meta['histogram'])
+    return rollups
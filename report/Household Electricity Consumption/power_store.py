@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from power_cache import INDEX_FILE, read_meta
+
+
+def _to_ns(value) -> int:
+    """把时间（字符串、datetime、Timestamp 或 int64 纳秒）转换为 int64 纳秒。"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).to_datetime64().astype('datetime64[ns]').astype('int64'))
+
+
+class PowerStore:
+    """
+    基于内存映射的家庭用电数据时间范围查询。
+
+    数据来自 power_cache 写出的列式缓存目录：index.i8 为排好序的 int64 时间戳
+    （power_cache 写入时保证有序且不含 NaT），
+    每个测量列（Global_active_power、Voltage、Sub_metering_1..3 等）为一个连续的
+    二进制文件。打开时只映射文件，不读取内容；查询时通过二分查找定位时间范围，
+    返回的是内存映射数组的切片（零拷贝），只有实际访问的页面才会从磁盘读入。
+
+    打开后如果缓存被追加了新数据，需要调用 reload() 才能看到新行。
+    """
+
+    def __init__(self, entry_dir: str):
+        self.entry_dir = entry_dir
+        self.reload()
+
+    def reload(self) -> None:
+        """重新读取 meta.json 并映射各列文件。"""
+        meta = read_meta(self.entry_dir)
+        if meta is None:
+            raise FileNotFoundError(f"缓存目录中没有有效的 meta.json: {self.entry_dir}")
+        self.meta = meta
+        self.rows = meta['rows']
+        self.index_name = meta.get('index_name') or 'Datetime'
+        self.index = self._map(INDEX_FILE, np.dtype('int64'))
+        self._columns = {col['name']: self._map(col['file'], np.dtype(col['dtype']))
+                         for col in meta['columns']}
+
+    def _map(self, file_name: str, dtype: np.dtype) -> np.ndarray:
+        if not self.rows:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.entry_dir, file_name), dtype=dtype, mode='r',
+                         shape=(self.rows,))
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns)
+
+    @property
+    def start(self) -> pd.Timestamp:
+        return pd.Timestamp(int(self.index[0])) if self.rows else None
+
+    @property
+    def end(self) -> pd.Timestamp:
+        return pd.Timestamp(int(self.index[-1])) if self.rows else None
+
+    def locate(self, start=None, end=None) -> tuple:
+        """
+        用二分查找定位半开区间 [start, end) 对应的行号范围。
+
+        参数:
+            start: 起始时间（包含），None 表示从头开始
+            end: 结束时间（不包含），None 表示到末尾
+
+        返回:
+            tuple: (起始行号, 结束行号)
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.index, _to_ns(start), side='left'))
+        hi = self.rows if end is None else int(np.searchsorted(self.index, _to_ns(end), side='left'))
+        return lo, max(lo, hi)
+
+    def query(self, start=None, end=None, columns: list = None) -> dict:
+        """
+        查询 [start, end) 时间范围内的数据，返回零拷贝的数组切片。
+
+        参数:
+            start: 起始时间（包含）
+            end: 结束时间（不包含）
+            columns (list): 需要的列，默认为全部列
+
+        返回:
+            dict: {索引名: datetime64[ns] 数组, 列名: 数值数组, ...}，均为内存映射视图
+        """
+        lo, hi = self.locate(start, end)
+        result = {self.index_name: self.index[lo:hi].view('datetime64[ns]')}
+        for name in (columns or self.columns):
+            if name not in self._columns:
+                raise KeyError(f"列 '{name}' 不存在，可用列: {self.columns}")
+            result[name] = self._columns[name][lo:hi]
+        return result
+
+    def query_frame(self, start=None, end=None, columns: list = None) -> pd.DataFrame:
+        """与 query 相同，但返回以时间为索引的 DataFrame（会复制所选范围的数据）。"""
+        data = self.query(start, end, columns)
+        index = pd.DatetimeIndex(data.pop(self.index_name), name=self.index_name)
+        return pd.DataFrame({name: np.array(values) for name, values in data.items()}, index=index)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __repr__(self) -> str:
+        return (f"PowerStore(rows={self.rows}, start={self.start}, end={self.end}, "
+                f"columns={self.columns})")
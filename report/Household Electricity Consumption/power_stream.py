@@ -0,0 +1,135 @@
+import pandas as pd
+
+from datetime_parsing import (combine_date_time, infer_date_format, ordered_formats,
+                              format_report_summary)
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def iter_power_chunks(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                      date_col: str = 'Date', time_col: str = 'Time',
+                      new_col_name: str = 'Datetime', date_format: str = '%d/%m/%y',
+                      time_format: str = '%H:%M:%S', separator: str = ',',
+                      na_values: list = ['?'], float_dtype: str = 'float32',
+                      format_report: dict = None, carry: pd.Series = None):
+    """
+    按固定行数分块读取家庭用电数据，逐块产出可直接使用的数据框。
+
+    每个数据块都会完成日期时间解析（设为索引）、数值列降精度为 float_dtype，
+    并执行前向填充。日期或时间无法解析（NaT）的行在前向填充之前丢弃。上一块最后一行的有效值会带入下一块，
+    因此结果与对整个文件执行 ffill() 一致，而内存峰值只与块大小有关。
+
+    参数:
+        file_path: CSV文件路径或已打开的文件对象
+        chunksize (int): 每块的行数，默认为 200000
+        date_col (str): 日期列名，默认为'Date'
+        time_col (str): 时间列名，默认为'Time'
+        new_col_name (str): 日期时间索引名，默认为'Datetime'
+        date_format (str): 优先尝试的日期格式，默认为'%d/%m/%y'
+        time_format (str): 时间格式字符串，默认为'%H:%M:%S'
+        separator (str): CSV分隔符，默认为','
+        na_values (list): 需要识别为缺失值的值列表，默认为['?']
+        float_dtype (str): 数值列的目标类型，默认为'float32'
+        format_report (dict): 可选，用于累计各日期格式匹配行数的字典
+        carry (pandas.Series): 可选，读取之前的最后一行有效值（如增量追加时已存储的最后一行），
+                               用于填充第一块开头的缺失值
+
+    返回:
+        generator: 逐块产出以 Datetime 为索引的 pandas.DataFrame
+    """
+    reader = pd.read_csv(
+        file_path,
+        sep=separator,
+        na_values=na_values,
+        dtype={date_col: str, time_col: str},
+        chunksize=chunksize
+    )
+
+    candidates = ordered_formats(date_format)
+    primary_format = None
+    # carry: 上一块每列最后一个有效值，用于跨块前向填充
+
+    for chunk in reader:
+        if primary_format is None:
+            # 只在第一块上推断一次日期格式，后续块直接沿用
+            primary_format = infer_date_format(chunk[date_col].drop_duplicates(), candidates)
+
+        datetimes, chunk_report = combine_date_time(
+            chunk, date_col, time_col, date_format=primary_format,
+            time_format=time_format, candidates=candidates
+        )
+        if format_report is not None:
+            for fmt, rows in chunk_report.items():
+                format_report[fmt] = format_report.get(fmt, 0) + rows
+
+        values = chunk.drop(columns=[date_col, time_col])
+        values = values.apply(pd.to_numeric, errors='coerce').astype(float_dtype)
+        values.index = pd.DatetimeIndex(datetimes, name=new_col_name)
+        values = values[values.index.notna()]
+        if values.empty:
+            continue
+
+        values = values.ffill()
+        if carry is not None:
+            # ffill 之后只有块首的连续缺失值还未填充，用上一块的最后有效值补齐
+            values = values.fillna(carry)
+        carry = values.iloc[-1]
+
+        yield values
+
+
+def stream_power_data(file_path: str, sink, chunksize: int = DEFAULT_CHUNKSIZE, **kwargs) -> dict:
+    """
+    以流式方式处理家庭用电数据，并把每个数据块直接写入 sink。
+
+    参数:
+        file_path (str): CSV文件路径
+        sink: 接收数据块的目标。可以是可调用对象（每块调用一次 sink(df)），
+              也可以是输出 CSV 文件路径（逐块追加写入）
+        chunksize (int): 每块的行数，默认为 200000
+        **kwargs: 传递给 iter_power_chunks 的其他参数
+
+    返回:
+        dict: 处理统计信息，包括块数、行数和日期格式匹配情况
+    """
+    format_report = {}
+    stats = {'chunks': 0, 'rows': 0, 'format_report': format_report}
+
+    for chunk in iter_power_chunks(file_path, chunksize=chunksize,
+                                   format_report=format_report, **kwargs):
+        if callable(sink):
+            sink(chunk)
+        else:
+            chunk.to_csv(sink, mode='w' if stats['chunks'] == 0 else 'a',
+                         header=stats['chunks'] == 0)
+        stats['chunks'] += 1
+        stats['rows'] += len(chunk)
+
+    print(f"流式处理完成: {stats['chunks']} 块, {stats['rows']} 行")
+    print("日期格式匹配情况:")
+    print(format_report_summary(format_report))
+    return stats
+
+
+def load_power_data_chunked(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE, **kwargs) -> pd.DataFrame:
+    """
+    分块读取并拼接为一个完整的数据框（数值列为 float32，已前向填充）。
+
+    与一次性读取相比，不会产生临时字符串列和 float64 副本。
+
+    参数:
+        file_path (str): CSV文件路径
+        chunksize (int): 每块的行数，默认为 200000
+        **kwargs: 传递给 iter_power_chunks 的其他参数
+
+    返回:
+        pandas.DataFrame: 以 Datetime 为索引的数据框
+    """
+    format_report = {}
+    chunks = list(iter_power_chunks(file_path, chunksize=chunksize,
+                                    format_report=format_report, **kwargs))
+    df = pd.concat(chunks) if chunks else pd.DataFrame()
+    df.attrs['datetime_format_report'] = format_report
+    print("日期格式匹配情况:")
+    print(format_report_summary(format_report))
+    return df
@@ -0,0 +1,345 @@
+import argparse
+import csv
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# 只依赖 NumPy 的流失模型推理格式：
+#   - 导出：把 churn_training 保存的随机森林（所有树的 特征/阈值/左右子节点/叶子概率 节点数组）
+#     或 Dense 网络（各层权重矩阵和激活函数），连同预处理参数（分类取值表、中位数、均值和标准差）
+#     写入一个 .npz 文件；只有导出时才需要 scikit-learn / TensorFlow
+#   - 推理：本模块只导入 NumPy，所有树对整批样本同时逐层下降（每一步是一次数组索引），
+#     预测结果与原模型一致（随机森林逐位相同，Dense 网络在 float32 舍入范围内相同）
+#
+# 用法示例:
+#   python churn_compiled.py                 # 导出 .churn_models 下的所有模型并与原模型比对
+#   python churn_compiled.py --benchmark     # 对比冷启动（新进程导入 + 加载 + 评分）耗时
+#
+#   from churn_compiled import CompiledChurnModel
+#   model = CompiledChurnModel.load('.churn_models/churn_rf.npz')
+#   model.score_records([{'gender': 'Female', 'SeniorCitizen': '0', ...}])
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_DIR = os.path.join(SCRIPT_DIR, '.churn_models')
+DEFAULT_CSV_PATH = os.path.join(os.path.dirname(SCRIPT_DIR), 'Customers churned in telecom services',
+                                'customer_churn_telecom_services.csv')
+FORMAT_VERSION = 2
+BATCH_SIZE = 8192
+ACTIVATIONS = {
+    'linear': lambda z: z,
+    'relu': lambda z: np.maximum(z, 0),
+    'sigmoid': lambda z: 1 / (1 + np.exp(-z)),
+    'tanh': np.tanh,
+}
+
+
+def _float32_floor(values: np.ndarray) -> np.ndarray:
+    """
+    把 float64 阈值转换为不大于它的最大 float32。
+
+    scikit-learn 的树在 float32 特征上比较 x <= threshold（threshold 为 float64）；
+    对任意 float32 的 x，这与 x <= floor32(threshold) 完全等价，因此推理可全程使用 float32。
+    """
+    rounded = values.astype(np.float32)
+    too_large = rounded.astype(np.float64) > values
+    rounded[too_large] = np.nextafter(rounded[too_large], np.float32(-np.inf))
+    return rounded
+
+
+def export_forest(model) -> dict:
+    """
+    把随机森林的所有树拼接为一组扁平节点数组。
+
+    叶子节点的左右子节点指向自身、特征为 0，逐层下降时叶子保持不动，无需分支判断。
+
+    返回:
+        dict: {'roots', 'feature', 'threshold', 'left', 'right', 'leaf_proba', 'is_leaf'}（节点数组）
+              及 'max_depth'
+    """
+    roots, features, thresholds, lefts, rights, probas, leaves = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        is_leaf = tree.children_left < 0
+        ids = np.arange(offset, offset + n_nodes)
+        roots.append(offset)
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(_float32_floor(np.where(is_leaf, 0.0, tree.threshold)))
+        lefts.append(np.where(is_leaf, ids, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, ids, tree.children_right + offset).astype(np.int32))
+        # 与 DecisionTreeClassifier.predict_proba 相同的归一化方式
+        value = tree.value[:, 0, :]
+        probas.append(value[:, 1] / value.sum(axis=1))
+        leaves.append(is_leaf)
+        max_depth = max(max_depth, tree.max_depth)
+        offset += n_nodes
+    return {'roots': np.array(roots, dtype=np.int32), 'feature': np.concatenate(features),
+            'threshold': np.concatenate(thresholds), 'left': np.concatenate(lefts),
+            'right': np.concatenate(rights), 'leaf_proba': np.concatenate(probas),
+            'is_leaf': np.concatenate(leaves), 'max_depth': np.array(max_depth)}
+
+
+def export_mlp(model) -> tuple:
+    """
+    导出 Keras Dense 网络的权重（Dropout 在推理时不起作用，直接跳过）。
+
+    返回:
+        tuple: (数组字典 {'W0', 'b0', 'W1', ...}, 各层激活函数名列表)
+    """
+    arrays, activations = {}, []
+    for layer in model.layers:
+        weights = layer.get_weights()
+        if not weights:
+            continue
+        activation = layer.get_config().get('activation', 'linear')
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"不支持的激活函数: {activation}")
+        position = len(activations)
+        arrays[f'W{position}'] = weights[0].astype(np.float32)
+        arrays[f'b{position}'] = weights[1].astype(np.float32)
+        activations.append(activation)
+    return arrays, activations
+
+
+def export_bundle(bundle_path: str, output_path: str) -> str:
+    """
+    把 churn_training 保存的模型导出为只依赖 NumPy 的 .npz 文件。
+
+    返回:
+        str: 输出文件路径
+    """
+    from churn_training import load_bundle
+    from churn_data import NUMERIC_DTYPES  # churn_training 已把 CHURN_DIR 加入 sys.path
+    bundle = load_bundle(bundle_path)
+    preprocessor = bundle['preprocessor']
+    meta = {
+        'version': FORMAT_VERSION,
+        'kind': bundle['kind'],
+        'feature_names': preprocessor.feature_names_,
+        # 训练数据中以 float32 存储的数值列，推理时先舍入到 float32，与训练输入一致
+        'float32_columns': [col for col in preprocessor.feature_names_ if NUMERIC_DTYPES.get(col) == 'float32'],
+        'categories': {col: [str(v) for v in encoder.classes_] for col, encoder in preprocessor.encoders_.items()},
+        'medians': {col: float(value) for col, value in preprocessor.medians_.items()},
+    }
+    arrays = {'scaler_mean': preprocessor.scaler_.mean_, 'scaler_scale': preprocessor.scaler_.scale_}
+    if bundle['kind'] == 'random_forest':
+        arrays.update({f'tree_{key}': value for key, value in export_forest(bundle['model']).items()})
+    else:
+        layers, meta['activations'] = export_mlp(bundle['model'])
+        arrays.update(layers)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    np.savez(output_path, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+    return output_path
+
+
+def _to_float(value) -> float:
+    if value is None:
+        return math.nan
+    if isinstance(value, str):
+        value = value.strip()
+        return float(value) if value else math.nan
+    return float(value)
+
+
+class CompiledChurnModel:
+    """加载导出的 .npz 文件，只用 NumPy 完成预处理和预测。"""
+
+    def __init__(self, meta: dict, arrays: dict):
+        self.kind = meta['kind']
+        self.feature_names = meta['feature_names']
+        self.categories = meta['categories']
+        self.medians = meta['medians']
+        self.float32_columns = meta['float32_columns']
+        self.activations = meta.get('activations', [])
+        self.arrays = arrays
+        self._codes = {col: {value: i for i, value in enumerate(values)} for col, values in self.categories.items()}
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledChurnModel':
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != FORMAT_VERSION:
+                raise ValueError(f"{path} 的格式版本为 {meta.get('version')}，需要 {FORMAT_VERSION}")
+            return cls(meta, {key: data[key] for key in data.files if key != 'meta'})
+
+    def transform_records(self, records: list) -> np.ndarray:
+        """
+        与 ChurnPreprocessor.transform 相同的预处理：分类取值编码、中位数填充、标准化。
+
+        TotalCharges 为空白且 tenure=0 时视为 0，MonthlyCharges/TotalCharges 舍入到 float32（与 churn_data 一致）。
+        缺少字段时抛出 KeyError，分类取值未在训练数据中出现时抛出 ValueError。
+        """
+        X = np.empty((len(records), len(self.feature_names)))
+        for position, col in enumerate(self.feature_names):
+            if col in self._codes:
+                codes = self._codes[col]
+                try:
+                    X[:, position] = [codes[str(record[col])] for record in records]
+                except KeyError as e:
+                    if all(col in record for record in records):
+                        raise ValueError(f"列 {col} 出现训练数据中没有的取值: {e.args[0]!r}") from None
+                    raise
+            else:
+                X[:, position] = [_to_float(record[col]) for record in records]
+                if col in self.float32_columns:
+                    X[:, position] = X[:, position].astype(np.float32)
+        if 'TotalCharges' in self.feature_names and 'tenure' in self.feature_names:
+            total = X[:, self.feature_names.index('TotalCharges')]
+            total[np.isnan(total) & (X[:, self.feature_names.index('tenure')] == 0)] = 0
+        for position, col in enumerate(self.feature_names):
+            if col in self.medians:
+                column = X[:, position]
+                column[np.isnan(column)] = self.medians[col]
+        X -= self.arrays['scaler_mean']
+        X /= self.arrays['scaler_scale']
+        return X.astype(np.float32)
+
+    def _forest_proba(self, X: np.ndarray) -> np.ndarray:
+        a = self.arrays
+        feature, threshold, left, right = a['tree_feature'], a['tree_threshold'], a['tree_left'], a['tree_right']
+        roots, is_leaf, leaf_proba = a['tree_roots'], a['tree_is_leaf'], a['tree_leaf_proba']
+        # 在展平的特征矩阵上用 take 取值，比二维花式索引快
+        flat = np.ascontiguousarray(X).ravel()
+        row_base = (np.arange(len(X), dtype=np.int64) * X.shape[1])[None, :]
+        # (树数 × 样本数) 的当前节点，所有树、所有样本同时下降一层
+        node = np.repeat(roots[:, None], len(X), axis=1)
+        for depth in range(int(a['tree_max_depth'])):
+            go_left = flat.take(row_base + feature.take(node)) <= threshold.take(node)
+            node = np.where(go_left, left.take(node), right.take(node))
+            if depth % 4 == 3 and is_leaf.take(node).all():
+                break
+        # 按树的顺序累加后再平均，与 RandomForestClassifier.predict_proba 的计算顺序一致
+        total = np.zeros(len(X))
+        for proba in leaf_proba.take(node):
+            total += proba
+        return total / len(roots)
+
+    def _mlp_proba(self, X: np.ndarray) -> np.ndarray:
+        z = X
+        for position, activation in enumerate(self.activations):
+            z = ACTIVATIONS[activation](z @ self.arrays[f'W{position}'] + self.arrays[f'b{position}'])
+        return z[:, 0].astype(np.float64)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """对预处理后的 float32 特征矩阵返回流失概率，按 BATCH_SIZE 分块以限制内存。"""
+        X = np.asarray(X, dtype=np.float32)
+        predict = self._forest_proba if self.kind == 'random_forest' else self._mlp_proba
+        if len(X) <= BATCH_SIZE:
+            return predict(X)
+        return np.concatenate([predict(X[start:start + BATCH_SIZE]) for start in range(0, len(X), BATCH_SIZE)])
+
+    def score_records(self, records: list) -> np.ndarray:
+        return self.predict_proba(self.transform_records(records))
+
+
+def read_records(csv_path: str = DEFAULT_CSV_PATH) -> list:
+    """用 csv 模块读取客户记录（不导入 pandas）。"""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def verify(bundle_path: str, compiled_path: str, records: list, frame=None) -> dict:
+    """
+    比较原模型与导出模型在同一批记录上的预处理结果和预测概率。
+
+    参数:
+        bundle_path (str): 原模型
+        compiled_path (str): 导出的 .npz
+        records (list): 字符串形式的客户记录
+        frame (pandas.DataFrame): 可选，与 records 逐行对应的训练数据（churn_data.load_churn 的输出）；
+            给出时还比较原模型在训练输入上的特征和概率，确认推理输入与训练时一致
+
+    返回:
+        dict: {'features_equal', 'max_abs_diff', 'identical', 'labels_equal'}，
+              给出 frame 时另有 'training_features_equal', 'training_max_abs_diff'
+    """
+    from churn_scoring import ChurnScorer, records_to_frame
+    scorer = ChurnScorer(bundle_path)
+    compiled = CompiledChurnModel.load(compiled_path)
+    X = scorer.preprocessor.transform(records_to_frame(records))
+    expected = scorer.predict_matrix(X)
+    X_compiled = compiled.transform_records(records)
+    actual = compiled.score_records(records)
+    result = {'features_equal': bool(np.array_equal(X, X_compiled)),
+              'max_abs_diff': float(np.abs(expected - actual).max()),
+              'identical': bool(np.array_equal(expected, actual)),
+              'labels_equal': bool(np.array_equal(expected >= 0.5, actual >= 0.5))}
+    if frame is not None:
+        X_train = scorer.preprocessor.transform(frame)
+        result.update(training_features_equal=bool(np.array_equal(X_train, X_compiled)),
+                      training_max_abs_diff=float(np.abs(scorer.predict_matrix(X_train) - actual).max()))
+    return result
+
+
+_COLD_START = {
+    'compiled': ("import churn_compiled as c; m = c.CompiledChurnModel.load({model!r}); "
+                 "m.score_records(c.read_records()[:{rows}])"),
+    'original': ("import churn_compiled as c, churn_scoring as s; m = s.ChurnScorer({bundle!r}); "
+                 "m.score_records(c.read_records()[:{rows}])"),
+}
+
+
+def cold_start(bundle_path: str, compiled_path: str, rows: int = 1000, repeat: int = 3) -> dict:
+    """
+    在新进程中测量 "导入 + 加载模型 + 评分 rows 条记录" 的总耗时（取最小值）。
+
+    返回:
+        dict: {'compiled': 秒, 'original': 秒}
+    """
+    results = {}
+    for name, template in _COLD_START.items():
+        code = template.format(model=compiled_path, bundle=bundle_path, rows=rows)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=SCRIPT_DIR, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - start)
+        results[name] = min(timings)
+    return results
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="导出只依赖 NumPy 的流失模型并验证")
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR, help="churn_training 保存模型的目录")
+    parser.add_argument('--benchmark', action='store_true', help="对比冷启动耗时")
+    parser.add_argument('--rows', type=int, default=1000, help="冷启动测试评分的记录数")
+    args = parser.parse_args(argv)
+
+    bundles = sorted(name for name in os.listdir(args.model_dir) if name.endswith('.joblib')) \
+        if os.path.isdir(args.model_dir) else []
+    if not bundles:
+        print(f"{args.model_dir} 下没有模型，请先运行 churn_training.py")
+        return 1
+
+    # churn_data 位于流失数据目录（与 CSV 同目录），只在验证时需要 pandas
+    sys.path.insert(0, os.path.dirname(DEFAULT_CSV_PATH))
+    from churn_data import load_churn
+    records = read_records()
+    frame = load_churn()
+    for name in bundles:
+        bundle_path = os.path.join(args.model_dir, name)
+        compiled_path = os.path.splitext(bundle_path)[0] + '.npz'
+        export_bundle(bundle_path, compiled_path)
+        check = verify(bundle_path, compiled_path, records, frame)
+        print(f"{name} → {os.path.basename(compiled_path)}（{os.path.getsize(compiled_path) / 1e6:.2f} MB）："
+              f"特征一致 {check['features_equal']}，概率逐位相同 {check['identical']}，"
+              f"最大差异 {check['max_abs_diff']:.2e}，预测标签一致 {check['labels_equal']}")
+        print(f"  与训练输入（load_churn）比较：特征一致 {check['training_features_equal']}，"
+              f"最大概率差异 {check['training_max_abs_diff']:.2e}")
+        if args.benchmark:
+            timings = cold_start(bundle_path, compiled_path, args.rows)
+            print(f"  冷启动（导入 + 加载 + 评分 {args.rows} 条）: 原模型 {timings['original']:.2f} 秒，"
+                  f"NumPy 版 {timings['compiled']:.2f} 秒")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
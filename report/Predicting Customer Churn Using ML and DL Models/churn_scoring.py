@@ -0,0 +1,345 @@
+import argparse
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from churn_training import CHURN_DIR, DEFAULT_MODEL_DIR, load_bundle
+from churn_data import NUMERIC_DTYPES  # churn_training 已把 CHURN_DIR 加入 sys.path
+
+# 流失评分服务：
+#   - 启动时加载一次 churn_training 保存的预处理（编码器、标准化）和模型
+#   - 接受与 customer_churn_telecom_services.csv 相同字段的客户记录（字符串或数值均可）
+#   - 并发的单条请求由后台线程合并为小批量（最多 max_batch_size 条，或等待 max_wait_ms），
+#     一次向量化预测后再分发结果
+#   - 本地 HTTP 接口：POST /score（单条记录或记录列表），GET /health
+#   - 自带延迟/吞吐量测试（p50/p99、每秒行数），可完全离线运行
+#
+# 用法示例:
+#   python churn_training.py                       # 先训练并保存模型
+#   python churn_scoring.py --port 8765            # 启动服务
+#   curl -X POST localhost:8765/score -d '{"gender": "Female", "SeniorCitizen": 0, ...}'
+#   python churn_scoring.py --benchmark            # 在随机端口上启动服务并测试
+
+DEFAULT_BUNDLE_PATH = os.path.join(DEFAULT_MODEL_DIR, 'churn_rf.joblib')
+DEFAULT_CSV_PATH = os.path.join(CHURN_DIR, 'customer_churn_telecom_services.csv')
+NUMERIC_COLUMNS = ['SeniorCitizen', 'tenure', 'MonthlyCharges', 'TotalCharges']
+THRESHOLD = 0.5
+
+
+def records_to_frame(records: list) -> pd.DataFrame:
+    """
+    把客户记录转换为 DataFrame，数值字段按 CSV 的方式解析。
+
+    与 churn_data 一致：TotalCharges 为空白且 tenure=0 时视为 0，浮点字段按 NUMERIC_DTYPES 取 float32。
+    数值字段为空白时视为缺失（之后由预处理填充中位数），非空且不是数值时抛出 ValueError
+    （与 churn_compiled 的解析一致）。
+    """
+    df = pd.DataFrame.from_records(records)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            values = df[col].replace(r'^\s*$', np.nan, regex=True)
+            numeric = pd.to_numeric(values, errors='coerce')
+            invalid = numeric.isna() & values.notna()
+            if invalid.any():
+                raise ValueError(f'{col} 不是数值: {values[invalid].iloc[0]!r}')
+            # 与训练数据（churn_data.load_churn）相同的精度：MonthlyCharges/TotalCharges 为 float32；
+            # 整数列保持 float64（整数值精确，且允许缺失）
+            if pd.api.types.is_float_dtype(NUMERIC_DTYPES[col]):
+                numeric = numeric.astype(NUMERIC_DTYPES[col])
+            df[col] = numeric
+    if 'TotalCharges' in df.columns and 'tenure' in df.columns:
+        df.loc[df['TotalCharges'].isna() & (df['tenure'] == 0), 'TotalCharges'] = 0
+    return df
+
+
+class ChurnScorer:
+    """加载一次预处理和模型，对一批客户记录做向量化预测。"""
+
+    def __init__(self, bundle_path: str = DEFAULT_BUNDLE_PATH):
+        bundle = load_bundle(bundle_path)
+        self.kind = bundle['kind']
+        self.preprocessor = bundle['preprocessor']
+        self.model = bundle['model']
+
+    def predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """对预处理后的特征矩阵返回流失概率。"""
+        if self.kind == 'keras':
+            # 直接调用模型比 model.predict 少了每次调用的批处理开销，小批量时快得多
+            return self.model(X, training=False).numpy()[:, 0].astype('float64')
+        return self.model.predict_proba(X)[:, 1]
+
+    def score_frame(self, df: pd.DataFrame) -> np.ndarray:
+        return self.predict_matrix(self.preprocessor.transform(df))
+
+    def score_records(self, records: list) -> np.ndarray:
+        """
+        对客户记录列表返回流失概率。
+
+        缺少字段时抛出 KeyError，数值字段不是数值或分类字段取值未在训练数据中出现时抛出 ValueError。
+        """
+        return self.score_frame(records_to_frame(records))
+
+
+class MicroBatcher:
+    """
+    把并发的单条评分请求合并为小批量。
+
+    后台线程取到第一条请求后，继续收集请求直到达到 max_batch_size 或等待超过 max_wait_ms，
+    然后一次调用 score_batch。批中有无效记录时逐条重试，只让无效的请求失败。
+    """
+
+    def __init__(self, score_batch, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, record: dict) -> Future:
+        future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def score(self, record: dict, timeout: float = None) -> float:
+        return self.submit(record).result(timeout)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            closing = False
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            self._process(batch)
+            if closing:
+                return
+
+    def _process(self, batch: list) -> None:
+        records = [record for record, _ in batch]
+        try:
+            scores = self.score_batch(records)
+        except Exception:
+            for record, future in batch:
+                try:
+                    future.set_result(float(self.score_batch([record])[0]))
+                except Exception as e:
+                    future.set_exception(e)
+        else:
+            for (_, future), score in zip(batch, scores):
+                future.set_result(float(score))
+        self.batches += 1
+        self.rows += len(batch)
+
+
+def _result(probability: float) -> dict:
+    return {'churn_probability': probability, 'churn': probability >= THRESHOLD}
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """POST /score 接受单条记录（经 MicroBatcher 合并）或记录列表（直接整批预测）。"""
+
+    protocol_version = 'HTTP/1.1'  # 保持连接，客户端不必每个请求重新建立 TCP 连接
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._send_json(404, {'error': f'未知路径: {self.path}'})
+        batcher = self.server.batcher
+        self._send_json(200, {'status': 'ok', 'model': self.server.scorer.kind, 'batches': batcher.batches,
+                              'rows': batcher.rows})
+
+    def do_POST(self):
+        if self.path != '/score':
+            return self._send_json(404, {'error': f'未知路径: {self.path}'})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if isinstance(body, dict):
+                payload = _result(self.server.batcher.score(body))
+            elif isinstance(body, list) and all(isinstance(record, dict) for record in body):
+                payload = [_result(float(p)) for p in self.server.scorer.score_records(body)] if body else []
+            else:
+                return self._send_json(400, {'error': '请求体必须是一条记录（JSON 对象）或记录列表'})
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send_json(400, {'error': f'{type(e).__name__}: {e}'})
+        self._send_json(200, payload)
+
+    def _send_json(self, status: int, payload) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(scorer: ChurnScorer, host: str = '127.0.0.1', port: int = 0, max_batch_size: int = 64,
+                max_wait_ms: float = 2.0) -> ThreadingHTTPServer:
+    """创建评分服务（尚未开始处理请求），port 为 0 时使用随机空闲端口。"""
+    server = ThreadingHTTPServer((host, port), ScoringHandler)
+    server.daemon_threads = True
+    server.scorer = scorer
+    server.batcher = MicroBatcher(scorer.score_records, max_batch_size, max_wait_ms)
+    return server
+
+
+def start_server(scorer: ChurnScorer, host: str = '127.0.0.1', port: int = 0, max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0) -> tuple:
+    """
+    在后台线程中启动评分服务。
+
+    返回:
+        tuple: (server, base_url)；用完后调用 stop_server(server)
+    """
+    server = make_server(scorer, host, port, max_batch_size, max_wait_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def stop_server(server: ThreadingHTTPServer) -> None:
+    server.shutdown()
+    server.server_close()
+    server.batcher.close()
+
+
+def load_sample_records(csv_path: str = DEFAULT_CSV_PATH, limit: int = None) -> list:
+    """按原始 CSV 的字符串形式读取客户记录（去掉 Churn 列），用于测试。"""
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, nrows=limit)
+    return df.drop(columns=['Churn']).to_dict('records')
+
+
+def _percentiles(latencies: list) -> dict:
+    values = np.array(latencies) * 1e3
+    return {'p50_ms': float(np.percentile(values, 50)), 'p99_ms': float(np.percentile(values, 99)),
+            'mean_ms': float(values.mean())}
+
+
+def _load_test(base_url: str, records: list, clients: int, requests_per_client: int) -> dict:
+    host, port = base_url.rsplit('//', 1)[1].split(':')
+    latencies = [[] for _ in range(clients)]
+
+    def client(i: int) -> None:
+        connection = http.client.HTTPConnection(host, int(port))
+        for j in range(requests_per_client):
+            body = json.dumps(records[(i * requests_per_client + j) % len(records)])
+            start = time.perf_counter()
+            connection.request('POST', '/score', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            latencies[i].append(time.perf_counter() - start)
+            if response.status != 200:
+                raise RuntimeError(f'评分请求失败: HTTP {response.status}')
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    all_latencies = [value for values in latencies for value in values]
+    return dict(_percentiles(all_latencies), rows_per_sec=len(all_latencies) / seconds)
+
+
+def benchmark(scorer: ChurnScorer, records: list, clients: int = 16, requests_per_client: int = 100,
+              max_batch_size: int = 64, max_wait_ms: float = 2.0) -> pd.DataFrame:
+    """
+    测量评分延迟和吞吐量：
+        1. 进程内整批评分，不同批大小下的每秒行数
+        2. 通过 HTTP 并发发送单条请求，对比不合并（批大小 1）与微批量合并
+
+    返回:
+        pandas.DataFrame: 每种配置一行，列为 p50_ms/p99_ms/mean_ms/rows_per_sec
+    """
+    rows = {}
+    for batch_size in (1, 16, 256, len(records)):
+        batch = records[:batch_size]
+        latencies = []
+        repeat = max(3, 2000 // batch_size)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            scorer.score_records(batch)
+            latencies.append(time.perf_counter() - start)
+        rows[f'进程内 批大小 {batch_size}'] = dict(_percentiles(latencies),
+                                               rows_per_sec=batch_size / np.median(latencies))
+
+    for label, size in (('HTTP 不合并', 1), (f'HTTP 微批量 ≤{max_batch_size}', max_batch_size)):
+        server, base_url = start_server(scorer, max_batch_size=size, max_wait_ms=max_wait_ms)
+        try:
+            rows[f'{label}（{clients} 个并发客户端）'] = _load_test(base_url, records, clients, requests_per_client)
+            batcher = server.batcher
+            rows[f'{label}（{clients} 个并发客户端）']['mean_batch'] = batcher.rows / max(batcher.batches, 1)
+        finally:
+            stop_server(server)
+
+    results = pd.DataFrame.from_dict(rows, orient='index')
+    print(results.to_string(float_format='{:,.2f}'.format))
+    return results
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="流失评分服务")
+    parser.add_argument('--bundle', default=DEFAULT_BUNDLE_PATH, help="churn_training 保存的模型文件")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+    parser.add_argument('--port', type=int, default=8765, help="监听端口")
+    parser.add_argument('--max-batch-size', type=int, default=64, help="微批量的最大行数")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help="凑批时最长等待的毫秒数")
+    parser.add_argument('--benchmark', action='store_true', help="运行延迟/吞吐量测试")
+    parser.add_argument('--clients', type=int, default=16, help="测试时的并发客户端数")
+    parser.add_argument('--requests', type=int, default=100, help="测试时每个客户端的请求数")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.bundle):
+        print(f"找不到模型文件 {args.bundle}，请先运行 churn_training.py")
+        return 1
+    start = time.perf_counter()
+    scorer = ChurnScorer(args.bundle)
+    print(f"已加载 {scorer.kind} 模型，耗时 {time.perf_counter() - start:.2f} 秒")
+
+    if args.benchmark:
+        benchmark(scorer, load_sample_records(), args.clients, args.requests, args.max_batch_size,
+                  args.max_wait_ms)
+        return 0
+
+    server = make_server(scorer, args.host, args.port, args.max_batch_size, args.max_wait_ms)
+    print(f"评分服务已启动: http://{args.host}:{server.server_address[1]}/score")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,359 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401  启用 HalvingGridSearchCV
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import HalvingGridSearchCV, StratifiedKFold, train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CHURN_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'Customers churned in telecom services')
+sys.path.insert(0, CHURN_DIR)
+
+from churn_data import load_churn  # noqa: E402
+
+# 可复用的流失预测训练流程（对应 notebook 中的预处理、随机森林和 Dense 网络）：
+#   - 预处理（中位数填充、每个分类列一个 LabelEncoder、StandardScaler）只拟合一次，
+#     连同转换后的特征矩阵按数据哈希缓存到磁盘，数据不变时直接复用
+#   - 随机森林超参数用逐次减半搜索（HalvingGridSearchCV）：先用少量样本评估全部候选，
+#     只把表现最好的一部分带到下一轮；各候选 × 各折在所有 CPU 核上并行
+#   - 输出每个候选的耗时和得分；Dense 网络按验证集损失提前停止
+#   - 按分组（如地区）分别训练时，预处理只做一次，各组只取对应的行
+#
+# 用法示例:
+#   python churn_training.py                      # 搜索随机森林超参数并保存模型
+#   python churn_training.py --group Contract     # 按某一列分组分别训练
+#   python churn_training.py --mlp                # 训练 notebook 中的 Dense 网络（需要 TensorFlow）
+
+TARGET = 'Churn'
+DEFAULT_CACHE_DIR = os.path.join(SCRIPT_DIR, '.churn_training_cache')
+DEFAULT_MODEL_DIR = os.path.join(SCRIPT_DIR, '.churn_models')
+# 预处理逻辑变化时递增，旧缓存会自动失效
+PREPROCESS_VERSION = 1
+
+DEFAULT_PARAM_GRID = {
+    'max_depth': [None, 8, 12, 16],
+    'min_samples_leaf': [1, 3, 10],
+    'max_features': ['sqrt', 0.5],
+}
+
+
+class ChurnPreprocessor:
+    """
+    notebook 中的预处理步骤：数值列用中位数填充，每个分类列一个 LabelEncoder，
+    再对全部特征做 StandardScaler。目标列单独用一个 LabelEncoder 编码。
+    """
+
+    def __init__(self, target: str = TARGET):
+        self.target = target
+
+    def fit(self, df: pd.DataFrame) -> 'ChurnPreprocessor':
+        features = df.drop(columns=[self.target])
+        self.feature_names_ = list(features.columns)
+        self.categorical_ = [col for col in self.feature_names_ if not pd.api.types.is_numeric_dtype(features[col])
+                             or pd.api.types.is_bool_dtype(features[col])]
+        self.medians_ = features.median(numeric_only=True)
+        self.encoders_ = {col: LabelEncoder().fit(np.asarray(features[col], dtype=object))
+                          for col in self.categorical_}
+        self.scaler_ = StandardScaler().fit(self._encode(features))
+        self.target_encoder_ = LabelEncoder().fit(np.asarray(df[self.target], dtype=object))
+        return self
+
+    def _encode(self, features: pd.DataFrame) -> np.ndarray:
+        X = np.empty((len(features), len(self.feature_names_)))
+        for position, col in enumerate(self.feature_names_):
+            if col in self.encoders_:
+                X[:, position] = self.encoders_[col].transform(np.asarray(features[col], dtype=object))
+            else:
+                X[:, position] = features[col].fillna(self.medians_.get(col)).to_numpy(dtype='float64')
+        return X
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        把客户记录转换为模型输入（列顺序与训练时一致，多余的列被忽略）。
+
+        返回:
+            numpy.ndarray: (行数 × 特征数) 的 float32 矩阵（随机森林内部也使用 float32）
+        """
+        return self.scaler_.transform(self._encode(df[self.feature_names_])).astype(np.float32)
+
+    def transform_target(self, df: pd.DataFrame) -> np.ndarray:
+        return self.target_encoder_.transform(np.asarray(df[self.target], dtype=object))
+
+
+def data_hash(df: pd.DataFrame) -> str:
+    """按内容（列名、dtype 和所有值）计算 DataFrame 的哈希，用作预处理缓存的键。"""
+    digest = hashlib.sha256()
+    digest.update(repr([(col, str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    digest.update(f'version={PREPROCESS_VERSION}'.encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def preprocess(df: pd.DataFrame, cache_dir: str = DEFAULT_CACHE_DIR, use_cache: bool = True) -> dict:
+    """
+    拟合预处理并转换数据；相同数据再次调用时直接从磁盘缓存读取。
+
+    返回:
+        dict: {'preprocessor', 'X', 'y', 'hash', 'cached', 'seconds'}
+    """
+    start = time.perf_counter()
+    key = data_hash(df)
+    cache_path = os.path.join(cache_dir, f'preprocess-{key[:16]}.joblib')
+    if use_cache and os.path.exists(cache_path):
+        entry = joblib.load(cache_path)
+        if entry.get('hash') == key:
+            return dict(entry, cached=True, seconds=time.perf_counter() - start)
+
+    preprocessor = ChurnPreprocessor().fit(df)
+    entry = {'preprocessor': preprocessor, 'X': preprocessor.transform(df),
+             'y': preprocessor.transform_target(df), 'hash': key}
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{cache_path}.tmp'
+        joblib.dump(entry, tmp_path)
+        os.replace(tmp_path, cache_path)
+    return dict(entry, cached=False, seconds=time.perf_counter() - start)
+
+
+def halving_search(X: np.ndarray, y: np.ndarray, param_grid: dict = None, n_estimators: int = 100,
+                   cv: int = 5, factor: int = 3, n_jobs: int = -1, scoring: str = 'roc_auc',
+                   random_state: int = 42) -> HalvingGridSearchCV:
+    """
+    随机森林超参数的逐次减半搜索。
+
+    第一轮用少量样本评估全部候选，每轮保留得分最高的 1/factor 个候选、样本数乘以 factor。
+    每棵森林单线程训练，并行发生在 候选 × 折 这一层（n_jobs=-1 时占满所有核）。
+
+    参数:
+        X, y: 训练数据
+        param_grid (dict): 超参数网格，默认为 DEFAULT_PARAM_GRID
+        n_estimators (int): 每个候选的树数量
+        cv (int): 交叉验证折数（分层抽样）
+        factor (int): 每轮淘汰比例
+        n_jobs (int): 并行进程数，-1 表示所有核
+        scoring (str): 评分指标
+
+    返回:
+        HalvingGridSearchCV: 已拟合的搜索对象（best_estimator_ 已在全部训练数据上重新拟合）
+    """
+    search = HalvingGridSearchCV(
+        RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, n_jobs=1),
+        param_grid or DEFAULT_PARAM_GRID, factor=factor, scoring=scoring, n_jobs=n_jobs,
+        cv=StratifiedKFold(cv, shuffle=True, random_state=random_state), random_state=random_state)
+    return search.fit(X, y)
+
+
+def candidate_times(search: HalvingGridSearchCV) -> pd.DataFrame:
+    """
+    每个候选每一轮的样本数、得分和耗时。
+
+    candidate_seconds 为该候选在所有折上的训练 + 评分耗时之和（即单核上的墙钟时间）。
+    """
+    results = search.cv_results_
+    n_splits = search.n_splits_
+    return pd.DataFrame({
+        'iter': results['iter'],
+        'n_resources': results['n_resources'],
+        'params': [str(params) for params in results['params']],
+        'mean_test_score': results['mean_test_score'],
+        'fit_seconds': results['mean_fit_time'] * n_splits,
+        'candidate_seconds': (results['mean_fit_time'] + results['mean_score_time']) * n_splits,
+    }).sort_values(['iter', 'mean_test_score'], ascending=[True, False], ignore_index=True)
+
+
+def fit_and_evaluate(X: np.ndarray, y: np.ndarray, test_size: float = 0.2, random_state: int = 537,
+                     **search_options) -> dict:
+    """
+    按 notebook 的方式划分训练/测试集，在训练集上搜索超参数，在测试集上评估最佳模型。
+
+    返回:
+        dict: {'model', 'search', 'candidates', 'accuracy', 'report', 'search_seconds'}
+    """
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    start = time.perf_counter()
+    search = halving_search(X_train, y_train, **search_options)
+    search_seconds = time.perf_counter() - start
+    y_pred = search.best_estimator_.predict(X_test)
+    return {'model': search.best_estimator_, 'search': search, 'candidates': candidate_times(search),
+            'accuracy': accuracy_score(y_test, y_pred),
+            'report': classification_report(y_test, y_pred, zero_division=0),
+            'search_seconds': search_seconds}
+
+
+def train(df: pd.DataFrame, cache_dir: str = DEFAULT_CACHE_DIR, use_cache: bool = True, **options) -> dict:
+    """
+    完整训练流程：预处理（带缓存）→ 超参数搜索 → 测试集评估。
+
+    返回:
+        dict: fit_and_evaluate 的返回值，另加 'preprocessor' 和 'preprocess'（预处理耗时及是否命中缓存）
+    """
+    prepared = preprocess(df, cache_dir, use_cache)
+    result = fit_and_evaluate(prepared['X'], prepared['y'], **options)
+    result.update(preprocessor=prepared['preprocessor'],
+                  preprocess={'cached': prepared['cached'], 'seconds': prepared['seconds']})
+    return result
+
+
+def train_by_group(df: pd.DataFrame, group_column: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                   use_cache: bool = True, min_rows: int = 200, **options) -> dict:
+    """
+    按 group_column 的取值（如地区）分别训练。
+
+    预处理在全部数据上只拟合和转换一次，各组直接取特征矩阵中对应的行，
+    因此各组模型的特征编码一致，也不会重复编码。行数少于 min_rows 的组被跳过。
+
+    返回:
+        dict: {组取值: train 的返回值}
+    """
+    prepared = preprocess(df, cache_dir, use_cache)
+    groups = df[group_column].to_numpy()
+    results = {}
+    for value in pd.unique(groups):
+        rows = np.flatnonzero(groups == value)
+        if len(rows) < min_rows:
+            print(f"跳过 {group_column}={value}：只有 {len(rows)} 行")
+            continue
+        result = fit_and_evaluate(prepared['X'][rows], prepared['y'][rows], **options)
+        result.update(preprocessor=prepared['preprocessor'],
+                      preprocess={'cached': prepared['cached'], 'seconds': prepared['seconds']})
+        results[value] = result
+    return results
+
+
+def build_mlp(n_features: int):
+    """notebook 中的 Dense 网络：64 → Dropout(0.3) → 32 → Dropout(0.3) → 1 (sigmoid)。"""
+    # 只有训练 Dense 网络时才导入 TensorFlow
+    from tensorflow.keras.layers import Dense, Dropout, Input
+    from tensorflow.keras.models import Sequential
+    model = Sequential([
+        Input(shape=(n_features,)),
+        Dense(64, activation='relu'),
+        Dropout(0.3),
+        Dense(32, activation='relu'),
+        Dropout(0.3),
+        Dense(1, activation='sigmoid')
+    ])
+    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def train_mlp(X: np.ndarray, y: np.ndarray, test_size: float = 0.2, random_state: int = 537,
+              max_epochs: int = 100, batch_size: int = 32, patience: int = 5) -> dict:
+    """
+    训练 Dense 网络：验证集损失连续 patience 轮不下降时停止，并恢复最佳权重。
+
+    返回:
+        dict: {'model', 'accuracy', 'epochs', 'seconds'}
+    """
+    from tensorflow import keras
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    keras.utils.set_random_seed(random_state)
+    model = build_mlp(X.shape[1])
+    start = time.perf_counter()
+    history = model.fit(X_train, y_train, validation_data=(X_test, y_test), epochs=max_epochs,
+                        batch_size=batch_size, verbose=0,
+                        callbacks=[keras.callbacks.EarlyStopping(patience=patience, restore_best_weights=True)])
+    seconds = time.perf_counter() - start
+    y_pred = (model.predict(X_test, verbose=0)[:, 0] > 0.5).astype('int32')
+    return {'model': model, 'accuracy': accuracy_score(y_test, y_pred),
+            'epochs': len(history.history['loss']), 'seconds': seconds}
+
+
+def save_bundle(path: str, preprocessor: ChurnPreprocessor, model) -> None:
+    """
+    保存预处理和模型，供评分服务加载。
+
+    随机森林与预处理一起存为 joblib 文件；Keras 模型另存为同名 .keras 文件。
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    bundle = {'version': PREPROCESS_VERSION, 'preprocessor': preprocessor}
+    if hasattr(model, 'predict_proba'):
+        bundle.update(kind='random_forest', model=model)
+    else:
+        keras_path = os.path.splitext(path)[0] + '.keras'
+        model.save(keras_path)
+        bundle.update(kind='keras', model_file=os.path.basename(keras_path))
+    joblib.dump(bundle, path)
+
+
+def load_bundle(path: str) -> dict:
+    """
+    加载 save_bundle 保存的预处理和模型。
+
+    返回:
+        dict: {'kind': 'random_forest'|'keras', 'preprocessor', 'model'}
+    """
+    bundle = joblib.load(path)
+    if bundle['kind'] == 'keras':
+        from tensorflow import keras
+        bundle['model'] = keras.models.load_model(os.path.join(os.path.dirname(path), bundle['model_file']))
+    return bundle
+
+
+def print_result(name: str, result: dict, top: int = 5) -> None:
+    candidates = result['candidates']
+    print(f"\n=== {name} ===")
+    print(f"逐次减半搜索: {len(candidates)} 次候选评估，{candidates['iter'].max() + 1} 轮，"
+          f"墙钟 {result['search_seconds']:.2f} 秒（各候选耗时之和 {candidates['candidate_seconds'].sum():.2f} 秒）")
+    last = candidates[candidates['iter'] == candidates['iter'].max()]
+    print(f"最后一轮的候选（前 {top} 个）:")
+    print(last.head(top).to_string(index=False, float_format='{:.4f}'.format))
+    print(f"最佳参数: {result['search'].best_params_}")
+    print(f"测试集准确率: {result['accuracy']:.4f}")
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="流失预测训练流程")
+    parser.add_argument('--group', default=None, help="按该列的取值分别训练（如地区）")
+    parser.add_argument('--cv', type=int, default=5, help="交叉验证折数")
+    parser.add_argument('--factor', type=int, default=3, help="逐次减半每轮保留 1/factor 的候选")
+    parser.add_argument('--n-estimators', type=int, default=100, help="每个候选的树数量")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="并行进程数，-1 表示所有核")
+    parser.add_argument('--no-cache', action='store_true', help="不读写预处理缓存")
+    parser.add_argument('--mlp', action='store_true', help="训练 Dense 网络而不是随机森林")
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR, help="模型保存目录")
+    args = parser.parse_args(argv)
+
+    df = load_churn()
+    use_cache = not args.no_cache
+    search_options = {'cv': args.cv, 'factor': args.factor, 'n_estimators': args.n_estimators,
+                      'n_jobs': args.n_jobs}
+
+    prepared = preprocess(df, use_cache=use_cache)
+    print(f"预处理: {'命中缓存' if prepared['cached'] else '拟合并写入缓存'}，{prepared['seconds'] * 1e3:.1f} 毫秒"
+          f"（{prepared['X'].shape[0]} 行 × {prepared['X'].shape[1]} 个特征）")
+
+    if args.mlp:
+        result = train_mlp(prepared['X'], prepared['y'])
+        print(f"Dense 网络: {result['epochs']} 轮后提前停止，{result['seconds']:.2f} 秒，"
+              f"测试集准确率 {result['accuracy']:.4f}")
+        save_bundle(os.path.join(args.model_dir, 'churn_mlp.joblib'), prepared['preprocessor'], result['model'])
+        return 0
+
+    if args.group:
+        results = train_by_group(df, args.group, use_cache=use_cache, **search_options)
+        for value, result in results.items():
+            print_result(f'{args.group}={value}', result)
+        return 0
+
+    result = train(df, use_cache=use_cache, **search_options)
+    print_result('全部客户', result)
+    print(result['report'])
+    path = os.path.join(args.model_dir, 'churn_rf.joblib')
+    save_bundle(path, result['preprocessor'], result['model'])
+    print(f"模型已保存到: {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    # 通过模块名调用，保存的 ChurnPreprocessor 才能在其他脚本中用 churn_training 加载（而不是 __main__）
+    import churn_training
+    raise SystemExit(churn_training.main())
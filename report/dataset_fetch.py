@@ -0,0 +1,270 @@
+import codecs
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+# 各 kaggle数据库提取.py 共用的数据集获取层：
+#   - 内容寻址的本地缓存：转码后的文件按 SHA256 存放在 objects/ 下，
+#     refs/ 记录 "数据集 + 文件" 当前对应的对象、源文件签名和输出文件签名
+#   - 离线模式：只从本地镜像目录或缓存读取，不导入 kagglehub、不访问网络
+#   - latin1 → UTF-8 按块流式转码，不再先读成 DataFrame 再写回 CSV
+#   - 输出文件与缓存记录一致时直接跳过下载和重写
+#
+# 镜像目录结构与 kagglehub 下载目录相同：<mirror>/<owner>/<dataset>/<文件>
+#
+# 环境变量:
+#   DATASET_CACHE_DIR   缓存目录，默认为 ~/.cache/sql_learning/datasets
+#   DATASET_MIRROR_DIR  本地镜像目录
+#   DATASET_OFFLINE     设为 1 时启用离线模式
+
+DEFAULT_CACHE_DIR = os.environ.get('DATASET_CACHE_DIR') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'sql_learning', 'datasets')
+BLOCK_SIZE = 1 << 20
+
+
+def _env_offline() -> bool:
+    return os.environ.get('DATASET_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+def _signature(path: str) -> dict:
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def file_sha256(path: str) -> str:
+    """按块计算文件的 SHA256。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _object_path(cache_dir: str, sha256: str) -> str:
+    return os.path.join(cache_dir, 'objects', sha256[:2], sha256)
+
+
+def _ref_path(cache_dir: str, handle: str, file_path: str) -> str:
+    safe_handle = handle.replace('/', '__')
+    return os.path.join(cache_dir, 'refs', safe_handle, f'{file_path}.json')
+
+
+def _read_ref(path: str) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_ref(path: str, ref: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(ref, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def transcode_stream(src, dst, src_encoding: str = 'latin1', dst_encoding: str = 'utf-8') -> dict:
+    """
+    按块把二进制流从 src_encoding 流式转码为 dst_encoding，同时计算两侧的 SHA256。
+
+    使用增量解码器，多字节字符跨块时也能正确处理；内存占用与文件大小无关。
+    src 可以是普通文件，也可以是 zipfile 打开的压缩包成员（边解压边转码）。
+
+    返回:
+        dict: {'source_sha256', 'sha256', 'size'}（size 为输出字节数）
+    """
+    decoder = codecs.getincrementaldecoder(src_encoding)()
+    encoder = codecs.getincrementalencoder(dst_encoding)()
+    src_digest, dst_digest = hashlib.sha256(), hashlib.sha256()
+    size = 0
+    while True:
+        block = src.read(BLOCK_SIZE)
+        final = not block
+        src_digest.update(block)
+        data = encoder.encode(decoder.decode(block, final=final), final=final)
+        dst_digest.update(data)
+        dst.write(data)
+        size += len(data)
+        if final:
+            break
+    return {'source_sha256': src_digest.hexdigest(), 'sha256': dst_digest.hexdigest(), 'size': size}
+
+
+def transcode_file(src_path: str, dst_path: str, src_encoding: str = 'latin1',
+                   dst_encoding: str = 'utf-8') -> dict:
+    """按块把文件从 src_encoding 转码为 dst_encoding，返回值同 transcode_stream。"""
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        return transcode_stream(src, dst, src_encoding, dst_encoding)
+
+
+def store_object(cache_dir: str, src, encoding: str = 'latin1') -> dict:
+    """
+    把二进制流转码后按 SHA256 存入缓存的 objects/ 目录。
+
+    返回:
+        dict: transcode_stream 的返回值
+    """
+    objects_dir = os.path.join(cache_dir, 'objects')
+    os.makedirs(objects_dir, exist_ok=True)
+    tmp_path = os.path.join(objects_dir, f'.tmp-{os.getpid()}-{threading.get_ident()}')
+    with open(tmp_path, 'wb') as dst:
+        info = transcode_stream(src, dst, encoding)
+    object_path = _object_path(cache_dir, info['sha256'])
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    os.replace(tmp_path, object_path)
+    return info
+
+
+def write_output(cache_dir: str, ref: dict, output_path: str) -> None:
+    """把 ref 指向的缓存对象复制到 output_path（先写临时文件再替换），并记录输出文件签名。"""
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp_output = f'{output_path}.tmp'
+    shutil.copyfile(_object_path(cache_dir, ref['sha256']), tmp_output)
+    os.replace(tmp_output, output_path)
+    ref['output'] = _signature(output_path)
+    _write_ref(_ref_path(cache_dir, ref['handle'], ref['file_path']), ref)
+
+
+def read_ref(cache_dir: str, handle: str, file_path: str) -> dict:
+    """读取 "数据集 + 文件" 的缓存记录，不存在时返回空字典。"""
+    return _read_ref(_ref_path(cache_dir, handle, file_path))
+
+
+def output_is_current(ref: dict, output_path: str, encoding: str) -> bool:
+    """输出文件的签名与上次写出时一致（且编码设置相同），视为仍是缓存中的同一对象。"""
+    output = ref.get('output')
+    return (ref.get('encoding') == encoding and output is not None
+            and os.path.exists(output_path) and output == _signature(output_path))
+
+
+def locate_source(handle: str, file_path: str, mirror_dir: str = None, offline: bool = False) -> str:
+    """
+    找到数据集原始文件：优先使用本地镜像，否则（非离线模式下）通过 kagglehub 下载。
+
+    参数:
+        handle (str): 数据集引用路径（所有者/数据集名称）
+        file_path (str): 数据集中的文件路径
+        mirror_dir (str): 本地镜像目录
+        offline (bool): 是否禁止访问网络
+
+    返回:
+        str: 原始文件的本地路径
+    """
+    if mirror_dir:
+        candidate = os.path.join(mirror_dir, *handle.split('/'), file_path)
+        if os.path.exists(candidate):
+            return candidate
+    if offline:
+        raise FileNotFoundError(f"离线模式下在镜像目录中找不到 {handle}/{file_path}")
+
+    # 只有确实需要下载时才导入 kagglehub
+    import kagglehub
+    dataset_dir = kagglehub.dataset_download(handle)
+    source = os.path.join(dataset_dir, file_path)
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"数据集 {handle} 中没有文件 {file_path}")
+    return source
+
+
+def fetch_dataset_file(handle: str, file_path: str, output_path: str, encoding: str = 'latin1',
+                       cache_dir: str = None, mirror_dir: str = None, offline: bool = None,
+                       force: bool = False) -> dict:
+    """
+    获取数据集中的一个文件，转码为 UTF-8 后写到 output_path。
+
+    处理顺序：
+        1. 输出文件与缓存记录一致 → 直接返回（status='current'），不访问镜像和网络
+        2. 镜像或下载得到原始文件；原始文件签名与缓存记录一致且对象存在 → 复用缓存对象
+        3. 否则流式转码原始文件，按 SHA256 存入缓存
+        4. 把缓存对象复制到 output_path（先写临时文件再替换）
+
+    参数:
+        handle (str): 数据集引用路径（所有者/数据集名称）
+        file_path (str): 数据集中的文件路径
+        output_path (str): 输出文件路径
+        encoding (str): 原始文件编码，默认为 latin1
+        cache_dir (str): 缓存目录
+        mirror_dir (str): 本地镜像目录，默认读取 DATASET_MIRROR_DIR
+        offline (bool): 离线模式，默认读取 DATASET_OFFLINE
+        force (bool): 忽略缓存记录，重新转码并写出
+
+    返回:
+        dict: {'status': 'current'|'cached'|'fetched', 'path', 'sha256', 'size', 'seconds'}
+    """
+    start = time.perf_counter()
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    mirror_dir = mirror_dir or os.environ.get('DATASET_MIRROR_DIR')
+    offline = _env_offline() if offline is None else offline
+    ref = {} if force else read_ref(cache_dir, handle, file_path)
+
+    def result(status: str) -> dict:
+        return {'status': status, 'path': output_path, 'sha256': ref['sha256'], 'size': ref['size'],
+                'seconds': time.perf_counter() - start}
+
+    if output_is_current(ref, output_path, encoding):
+        return result('current')
+
+    source_path = locate_source(handle, file_path, mirror_dir, offline)
+    source = _signature(source_path)
+    status = 'cached'
+    if not (ref.get('encoding') == encoding and ref.get('source') == source
+            and os.path.exists(_object_path(cache_dir, ref.get('sha256', '')))):
+        with open(source_path, 'rb') as src:
+            info = store_object(cache_dir, src, encoding)
+        ref = {'handle': handle, 'file_path': file_path, 'encoding': encoding, 'source': source,
+               'source_sha256': info['source_sha256'], 'sha256': info['sha256'], 'size': info['size']}
+        status = 'fetched'
+
+    write_output(cache_dir, ref, output_path)
+    return result(status)
+
+
+def verify_output(output_path: str, handle: str, file_path: str, cache_dir: str = None) -> bool:
+    """重新计算输出文件的 SHA256，并与缓存记录比对。"""
+    ref = read_ref(cache_dir or DEFAULT_CACHE_DIR, handle, file_path)
+    return bool(ref) and os.path.exists(output_path) and file_sha256(output_path) == ref['sha256']
+
+
+def preview_csv(path: str, rows: int = 5):
+    """只读取前几行用于预览（不加载整个文件）。"""
+    import pandas as pd
+    return pd.read_csv(path, nrows=rows)
+
+
+def add_fetch_arguments(parser) -> None:
+    """为各获取脚本添加统一的命令行参数。"""
+    parser.add_argument('--offline', action='store_true', default=None,
+                        help="离线模式：只从镜像目录或缓存读取")
+    parser.add_argument('--mirror-dir', default=None, help="本地镜像目录")
+    parser.add_argument('--cache-dir', default=None, help="缓存目录")
+    parser.add_argument('--force', action='store_true', help="忽略缓存记录，重新转码并写出")
+
+
+def run_fetch_script(handle: str, file_path: str, output_path: str, argv: list = None,
+                     encoding: str = 'latin1') -> dict:
+    """各 kaggle数据库提取.py 的公共入口：解析参数、获取文件并打印预览。"""
+    import argparse
+    parser = argparse.ArgumentParser(description=f"获取数据集 {handle} 中的 {file_path}")
+    add_fetch_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        info = fetch_dataset_file(handle, file_path, output_path, encoding=encoding,
+                                  cache_dir=args.cache_dir, mirror_dir=args.mirror_dir,
+                                  offline=args.offline, force=args.force)
+    except FileNotFoundError as e:
+        print(f"获取数据集失败: {e}")
+        return None
+    if info['status'] == 'current':
+        print(f"数据集已是最新，跳过下载和写出: {output_path}")
+    else:
+        # 打印前5条记录，用于预览数据集内容
+        print("First 5 records:", preview_csv(output_path))
+        print(f"数据集已保存到: {output_path}（{'来自缓存' if info['status'] == 'cached' else '重新转码'}，"
+              f"{info['size'] / 1e6:.2f} MB，{info['seconds']:.2f} 秒）")
+    return info
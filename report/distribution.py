@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+
+# 各报告共用的分布计算：直方图 + 核密度曲线，不再在原始数据上逐点计算 KDE
+#   - 一次矢量化遍历完成分箱：分组编码 × 分箱编号合并成一个整数后做一次 bincount，
+#     按 hue（如 Churn）分组的直方图在同一遍中得到；分箱结果与 np.histogram 完全一致
+#   - 核密度在等距网格上计算：数据先线性分配到相邻网格点，再用 FFT 与高斯核做卷积，
+#     耗时为 O(N + G·log G)，而逐点 KDE 为 O(N·G)
+#   - 带宽与 seaborn（scipy.stats.gaussian_kde）的默认值相同：Scott 规则 σ·n^(-1/5)
+#   - 密度曲线按 "每个直方图分箱的期望计数" 缩放，可直接与直方图叠加（同 histplot(kde=True)）
+#
+# 用法示例:
+#   dist = histogram_kde(df['tenure'], groups=df['Churn'], bins=30)
+#   plot_histogram_kde(ax, dist)
+
+DEFAULT_BINS = 30
+DEFAULT_GRID = 512
+# 高斯核截断到 ±KERNEL_SIGMAS 个带宽之外的部分可忽略
+KERNEL_SIGMAS = 8
+
+
+def _group_codes(values: np.ndarray, groups, levels: list) -> tuple:
+    """把分组列转换为整数编码（缺失为 -1）和取值列表；groups 为 None 时编码为 None，全部数据为一组。"""
+    if groups is None:
+        return None, [None] if levels is None else list(levels)
+    groups = np.asarray(groups)
+    if levels is not None and np.issubdtype(groups.dtype, np.integer):
+        return groups.astype(np.int64, copy=False), list(levels)
+    codes, uniques = pd.factorize(pd.Series(groups), sort=True)
+    if levels is None:
+        return codes.astype(np.int64), list(uniques)
+    lookup = {level: i for i, level in enumerate(levels)}
+    remap = np.array([lookup.get(level, -1) for level in uniques] + [-1], dtype=np.int64)
+    return remap[codes], list(levels)
+
+
+def bin_counts(values: np.ndarray, edges: np.ndarray, codes: np.ndarray = None, n_groups: int = 1) -> np.ndarray:
+    """
+    用一次 bincount 计算等宽分箱的分组直方图。
+
+    分箱规则与 np.histogram 相同：左闭右开，最后一个分箱包含右端点，范围外和 NaN 的值不计数。
+
+    参数:
+        values (numpy.ndarray): 数值
+        edges (numpy.ndarray): 等宽分箱边界
+        codes (numpy.ndarray): 可选，每个值的分组编码（0..n_groups-1，负数表示不计数）
+        n_groups (int): 分组数
+
+    返回:
+        numpy.ndarray: (n_groups, 分箱数) 的计数
+    """
+    values = np.asarray(values, dtype='float64')
+    bins = len(edges) - 1
+    lo, hi = edges[0], edges[-1]
+    if codes is None:
+        # 不分组时 np.histogram 的等宽分箱路径已是一次遍历
+        return np.histogram(values, bins=bins, range=(lo, hi))[0][None, :]
+    keep = (values >= lo) & (values <= hi) & (codes >= 0)
+    data = values[keep]
+    # 与 np.histogram 相同：先按比例计算分箱编号，再用边界比较修正浮点误差
+    index = ((data - lo) * (bins / (hi - lo))).astype(np.intp)
+    index[index == bins] -= 1
+    index -= data < edges[index]
+    index += (data >= edges[index + 1]) & (index != bins - 1)
+    index += codes[keep] * bins
+    return np.bincount(index, minlength=n_groups * bins).reshape(n_groups, bins)
+
+
+def linear_binning(values: np.ndarray, lo: float, hi: float, grid_size: int,
+                   codes: np.ndarray = None, n_groups: int = 1) -> np.ndarray:
+    """
+    把每个值按距离线性分配到相邻的两个网格点上（网格为 lo..hi 的 grid_size 个等距点）。
+
+    返回:
+        numpy.ndarray: (n_groups, grid_size) 的网格权重，每组权重之和等于该组的值个数
+    """
+    values = np.asarray(values, dtype='float64')
+    keep = (values >= lo) & (values <= hi)
+    if codes is not None:
+        keep &= codes >= 0
+    position = (values[keep] - lo) * ((grid_size - 1) / (hi - lo))
+    left = np.minimum(position.astype(np.intp), grid_size - 2)
+    frac = position - left
+    if codes is not None:
+        left = left + codes[keep] * grid_size
+    size = n_groups * grid_size
+    weights = np.bincount(left, weights=1 - frac, minlength=size)
+    weights[1:] += np.bincount(left, weights=frac, minlength=size)[:-1]
+    return weights.reshape(n_groups, grid_size)
+
+
+def scott_bandwidth(n: np.ndarray, std: np.ndarray) -> np.ndarray:
+    """Scott 规则带宽 σ·n^(-1/5)（与 seaborn/scipy 的默认值相同）。"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(n > 1, std * np.asarray(n, dtype='float64') ** (-1 / 5), np.nan)
+
+
+def fft_kde(weights: np.ndarray, step: float, bandwidth: np.ndarray) -> np.ndarray:
+    """
+    用 FFT 把网格权重与高斯核做卷积，得到各组的概率密度。
+
+    参数:
+        weights (numpy.ndarray): (n_groups, grid_size) 的网格权重（linear_binning 的输出）
+        step (float): 网格间距
+        bandwidth (numpy.ndarray): 每组的带宽；无效（NaN 或 0）的组返回全 0
+
+    返回:
+        numpy.ndarray: (n_groups, grid_size) 的密度（积分为 1，超出网格的部分被截掉）
+    """
+    n_groups, grid_size = weights.shape
+    bandwidth = np.asarray(bandwidth, dtype='float64').reshape(n_groups)
+    valid = np.isfinite(bandwidth) & (bandwidth > 0)
+    density = np.zeros((n_groups, grid_size))
+    if not valid.any():
+        return density
+
+    # 核的半宽：超出网格长度的部分不会影响网格内的结果
+    radius = int(min(grid_size - 1, np.ceil(KERNEL_SIGMAS * bandwidth[valid].max() / step)))
+    size = 1 << int(np.ceil(np.log2(grid_size + radius + 1)))
+    offsets = np.arange(size, dtype='float64')
+    offsets = np.where(offsets <= size // 2, offsets, offsets - size) * step
+    h = bandwidth[valid][:, None]
+    kernels = np.exp(-0.5 * (offsets[None, :] / h) ** 2) / (h * np.sqrt(2 * np.pi))
+    kernels[:, np.abs(offsets) > radius * step] = 0
+
+    totals = weights[valid].sum(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(weights[valid], n=size) * np.fft.rfft(kernels, n=size)
+    smooth = np.fft.irfft(spectrum, n=size)[:, :grid_size]
+    density[valid] = np.clip(smooth, 0, None) / totals
+    return density
+
+
+def histogram_kde(values, groups=None, levels: list = None, bins: int = DEFAULT_BINS,
+                  grid_size: int = DEFAULT_GRID, value_range: tuple = None, kde: bool = True) -> dict:
+    """
+    计算（可按 hue 分组的）直方图和核密度曲线，结果可直接用于绘图。
+
+    所有组共用同一组分箱边界（同 seaborn 的 common_bins），范围默认为全部数据的最小值到最大值；
+    密度曲线只在该范围内计算（同 histplot 中 KDE 的 cut=0）。
+
+    参数:
+        values: 数值（Series 或数组），NaN 被忽略
+        groups: 可选，分组列（如 Churn），与 values 等长；也可以是已编码的整数数组（需同时给出 levels）
+        levels (list): 可选，分组取值及其顺序，默认为分组列排序后的取值
+        bins (int): 直方图分箱数
+        grid_size (int): 密度曲线的网格点数
+        value_range (tuple): 可选，(最小值, 最大值)
+        kde (bool): 是否计算密度曲线
+
+    返回:
+        dict: {
+            'levels': 分组取值列表（不分组时为 [None]）,
+            'edges': 分箱边界,
+            'counts': (组数, 分箱数) 的计数,
+            'n': 每组的有效值个数,
+            'x': 密度曲线网格（kde=False 时为 None）,
+            'density': (组数, 网格点数) 的曲线，已按 "每个分箱的计数" 缩放,
+            'bandwidth': 每组的带宽
+        }
+    """
+    values = np.asarray(values, dtype='float64')
+    codes, levels = _group_codes(values, groups, levels)
+    n_groups = len(levels)
+
+    # 先去掉缺失值（和不属于任何组的行），之后的分箱、统计量和网格权重都在压缩后的数组上计算
+    valid = ~np.isnan(values) if codes is None else ~np.isnan(values) & (codes >= 0)
+    data = values[valid]
+    codes = None if codes is None else codes[valid]
+    if value_range is None:
+        value_range = (data.min(), data.max()) if len(data) else (0.0, 1.0)
+    lo, hi = float(value_range[0]), float(value_range[1])
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    if data.min(initial=lo) < lo or data.max(initial=hi) > hi:
+        inside = (data >= lo) & (data <= hi)
+        data = data[inside]
+        codes = None if codes is None else codes[inside]
+
+    edges = np.linspace(lo, hi, bins + 1)
+    counts = bin_counts(data, edges, codes, n_groups)
+    result = {'levels': levels, 'edges': edges, 'counts': counts, 'n': counts.sum(axis=1),
+              'x': None, 'density': None, 'bandwidth': None}
+    if not kde:
+        return result
+
+    # 各组的标准差由一次 bincount 得到的和与平方和计算（减去 lo 以降低舍入误差）
+    shifted = data - lo
+    group = np.zeros(len(data), dtype=np.intp) if codes is None else codes
+    n = np.bincount(group, minlength=n_groups).astype('float64')
+    total = np.bincount(group, weights=shifted, minlength=n_groups)
+    squares = np.bincount(group, weights=shifted * shifted, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (squares - total * total / n) / (n - 1)
+    bandwidth = scott_bandwidth(n, np.sqrt(np.clip(variance, 0, None)))
+
+    x = np.linspace(lo, hi, grid_size)
+    weights = linear_binning(data, lo, hi, grid_size, codes, n_groups)
+    density = fft_kde(weights, x[1] - x[0], bandwidth)
+    result.update(x=x, density=density * n[:, None] * (edges[1] - edges[0]), bandwidth=bandwidth)
+    return result
+
+
+def histogram_frame(result: dict, level=None) -> pd.DataFrame:
+    """把一组直方图转换为 left/right/count 表（家庭用电汇总中保存的直方图格式）。"""
+    row = result['levels'].index(level)
+    edges = result['edges']
+    return pd.DataFrame({'left': edges[:-1], 'right': edges[1:], 'count': result['counts'][row]})
+
+
+def plot_histogram_kde(ax, result: dict, colors: list = None, alpha: float = None, legend_title: str = None) -> None:
+    """
+    在 ax 上绘制 histogram_kde 的结果：每组一层直方图和一条密度曲线。
+
+    分组时各层半透明叠加并显示图例（同 histplot(hue=..., kde=True)），不分组时为不透明的单层直方图。
+    """
+    grouped = result['levels'] != [None]
+    if colors is None:
+        colors = [f'C{i}' for i in range(len(result['levels']))]
+    if alpha is None:
+        alpha = 0.5 if grouped else 0.75
+    for row, level in enumerate(result['levels']):
+        label = str(level) if grouped else None
+        ax.stairs(result['counts'][row], result['edges'], fill=True, alpha=alpha, color=colors[row], label=label)
+        ax.stairs(result['counts'][row], result['edges'], color=colors[row], linewidth=0.5)
+        if result['density'] is not None:
+            ax.plot(result['x'], result['density'][row], color=colors[row])
+    if grouped:
+        ax.legend(title=legend_title)
@@ -0,0 +1,435 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from dataset_fetch import (DEFAULT_CACHE_DIR, BLOCK_SIZE, fetch_dataset_file, file_sha256,
+                           output_is_current, read_ref, store_object, write_output)
+
+# 一条命令并发获取项目用到的全部数据集：
+#   - 各数据集在线程池中并发下载（以 I/O 为主，线程即可）
+#   - 压缩包先下载到 <缓存>/downloads/<数据集>.zip.part，中断后再次运行时用 HTTP Range 续传
+#   - 下载完成后校验大小（Content-Length）和可选的 SHA256，再改名为 .zip
+#   - 从压缩包中边解压边转码为 UTF-8，存入 dataset_fetch 的内容寻址缓存，再写到各脚本目录
+#   - 有本地镜像时（--mirror-dir / --offline）直接使用 dataset_fetch 的镜像逻辑
+#   - --refresh 时先用 HEAD 请求比对服务器上压缩包的 ETag / Last-Modified / 大小，
+#     与上次下载时记录的不同才重新下载，否则沿用已有的压缩包和输出
+#
+# 用法示例:
+#   python fetch_all.py                    # 获取全部数据集
+#   python fetch_all.py recipes churn      # 只获取指定数据集
+#   python fetch_all.py --refresh          # 检查服务器上的数据集是否有更新，有更新时重新下载
+#   python fetch_all.py --self-test        # 用本地 HTTP 替身服务器离线验证下载、续传和校验
+
+REPORT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASE_URL = 'https://www.kaggle.com/api/v1/datasets/download/'
+
+# 已注册的数据集；sha256 / size 为压缩包的期望值，未知时为 None（只校验 Content-Length）
+REGISTRY = {
+    'recipes': {
+        'handle': 'prajwaldongre/collection-of-recipes-around-the-world',
+        'file_path': 'Receipes from around the world.csv',
+        'output': os.path.join(REPORT_DIR, 'recipe analyze', 'recipes_data.csv'),
+        'encoding': 'latin1', 'sha256': None, 'size': None
+    },
+    'load_curve': {
+        'handle': 'shivamsoni017/load-curve-graphs',
+        'file_path': 'unique_dates_csv.csv',
+        'output': os.path.join(REPORT_DIR, 'load curve', 'unique_dates_output.csv'),
+        'encoding': 'latin1', 'sha256': None, 'size': None
+    },
+    'household': {
+        'handle': 'thedevastator/240000-household-electricity-consumption-records',
+        'file_path': 'household_power_consumption.csv',
+        'output': os.path.join(REPORT_DIR, 'Household Electricity Consumption', 'household_power_consumption.csv'),
+        'encoding': 'latin1', 'sha256': None, 'size': None
+    },
+    'churn': {
+        'handle': 'kapturovalexander/customers-churned-in-telecom-services',
+        'file_path': 'customer_churn_telecom_services.csv',
+        'output': os.path.join(REPORT_DIR, 'Customers churned in telecom services',
+                               'customer_churn_telecom_services.csv'),
+        'encoding': 'latin1', 'sha256': None, 'size': None
+    }
+}
+
+
+class DownloadError(Exception):
+    """下载失败或校验不通过。"""
+
+
+# 用于判断服务器上的压缩包是否变化的字段（HTTP 校验器和大小）
+VALIDATOR_KEYS = ('etag', 'last_modified', 'size')
+
+
+def _validators(headers, size: int = None) -> dict:
+    """从响应头中取出 ETag、Last-Modified，加上文件大小。"""
+    return {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified'), 'size': size}
+
+
+def remote_validators(url: str, headers: dict = None, timeout: float = 60.0) -> dict:
+    """
+    用 HEAD 请求获取服务器上文件的 ETag、Last-Modified 和大小（不下载内容）。
+
+    返回:
+        dict: {'etag', 'last_modified', 'size'}，服务器未提供的字段为 None；
+              服务器不支持 HEAD 时返回 None
+    """
+    request = urllib.request.Request(url, headers=dict(headers or {}), method='HEAD')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            length = response.headers.get('Content-Length')
+            return _validators(response.headers, int(length) if length is not None else None)
+    except urllib.error.HTTPError as e:
+        if e.code in (405, 501):
+            return None
+        raise DownloadError(f"检查 {url} 失败: HTTP {e.code}") from e
+
+
+def same_remote(recorded: dict, remote: dict) -> bool:
+    """两组校验器中双方都有的字段全部相同（且至少有一个可比较的字段）时，认为文件没有变化。"""
+    if not recorded or not remote:
+        return False
+    keys = [key for key in VALIDATOR_KEYS if recorded.get(key) is not None and remote.get(key) is not None]
+    return bool(keys) and all(recorded[key] == remote[key] for key in keys)
+
+
+def _auth_headers() -> dict:
+    """读取 Kaggle 凭据（环境变量或 ~/.kaggle/kaggle.json），生成 Basic 认证头。"""
+    username, key = os.environ.get('KAGGLE_USERNAME'), os.environ.get('KAGGLE_KEY')
+    if not (username and key):
+        try:
+            with open(os.path.join(os.path.expanduser('~'), '.kaggle', 'kaggle.json'), encoding='utf-8') as f:
+                credentials = json.load(f)
+            username, key = credentials.get('username'), credentials.get('key')
+        except (OSError, ValueError):
+            return {}
+    token = base64.b64encode(f'{username}:{key}'.encode('utf-8')).decode('ascii')
+    return {'Authorization': f'Basic {token}'}
+
+
+def download_resumable(url: str, dest_path: str, expected_size: int = None, expected_sha256: str = None,
+                       headers: dict = None, timeout: float = 60.0) -> dict:
+    """
+    下载文件到 dest_path，支持断点续传。
+
+    数据先写入 dest_path + '.part'；已有 .part 时发送 Range 请求续传，服务器不支持 Range
+    （返回 200）时从头下载。完成后校验大小和 SHA256，通过后才改名为 dest_path。
+
+    参数:
+        url (str): 下载地址
+        dest_path (str): 目标文件路径
+        expected_size (int): 期望的字节数（可选）
+        expected_sha256 (str): 期望的 SHA256（可选）
+        headers (dict): 额外的请求头（如认证）
+        timeout (float): 连接超时秒数
+
+    返回:
+        dict: {'bytes': 本次下载的字节数, 'resumed_from': 续传起点, 'size': 文件总大小,
+               'validators': 响应中的 ETag / Last-Modified 和文件大小，供 --refresh 比对}
+    """
+    part_path = f'{dest_path}.part'
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if expected_size is not None and offset > expected_size:
+        os.remove(part_path)
+        offset = 0
+
+    request = urllib.request.Request(url, headers=dict(headers or {}))
+    if offset:
+        request.add_header('Range', f'bytes={offset}-')
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            # 请求范围超出文件大小：.part 可能已经完整，交给下面的校验判断
+            response = None
+        else:
+            raise DownloadError(f"下载 {url} 失败: HTTP {e.code}") from e
+
+    downloaded = 0
+    total = offset
+    response_headers = {}
+    if response is not None:
+        response_headers = response.headers
+        with response:
+            if offset and response.status != 206:
+                offset = 0
+            length = response.headers.get('Content-Length')
+            total = offset + int(length) if length is not None else None
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for block in iter(lambda: response.read(BLOCK_SIZE), b''):
+                    f.write(block)
+                    downloaded += len(block)
+
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise DownloadError(f"下载不完整: {url} 期望 {total} 字节，实际 {size} 字节（再次运行将续传）")
+    if expected_size is not None and size != expected_size:
+        os.remove(part_path)
+        raise DownloadError(f"大小校验失败: {url} 期望 {expected_size} 字节，实际 {size} 字节")
+    if expected_sha256 is not None and file_sha256(part_path) != expected_sha256:
+        os.remove(part_path)
+        raise DownloadError(f"SHA256 校验失败: {url}")
+    os.replace(part_path, dest_path)
+    return {'bytes': downloaded, 'resumed_from': offset, 'size': size,
+            'validators': _validators(response_headers, size)}
+
+
+def _archive_path(cache_dir: str, handle: str) -> str:
+    return os.path.join(cache_dir, 'downloads', f"{handle.replace('/', '__')}.zip")
+
+
+def fetch_registered(name: str, spec: dict, cache_dir: str = None, base_url: str = DEFAULT_BASE_URL,
+                     mirror_dir: str = None, offline: bool = False, force: bool = False,
+                     refresh: bool = False) -> dict:
+    """
+    获取一个已注册的数据集文件。
+
+    参数:
+        name (str): 数据集名称
+        spec (dict): REGISTRY 中的配置
+        cache_dir (str): 缓存目录
+        base_url (str): 下载地址前缀，完整地址为 base_url + handle
+        mirror_dir (str): 本地镜像目录，有镜像文件时不下载
+        offline (bool): 离线模式，只使用镜像或缓存
+        force (bool): 忽略缓存记录，重新下载并写出
+        refresh (bool): 先用 HEAD 请求检查服务器上的压缩包，与上次下载时记录的校验器不同
+                        （或没有记录）时重新下载；使用镜像或离线时不适用
+
+    返回:
+        dict: {'name', 'status', 'path', 'sha256', 'size', 'downloaded', 'seconds'}
+    """
+    start = time.perf_counter()
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    handle, file_path, output = spec['handle'], spec['file_path'], spec['output']
+    ref = {} if force else read_ref(cache_dir, handle, file_path)
+    url = base_url + handle
+    archive = _archive_path(cache_dir, handle)
+    # 服务器上的压缩包有更新（或无法确认没有更新）时视为过期
+    stale = bool(refresh and not (mirror_dir or offline) and not force and not (
+        os.path.exists(archive)
+        and same_remote(ref.get('archive_validators'), remote_validators(url, _auth_headers()))))
+    if not stale and output_is_current(ref, output, spec['encoding']):
+        return {'name': name, 'status': 'current', 'path': output, 'sha256': ref['sha256'],
+                'size': ref['size'], 'downloaded': 0, 'seconds': time.perf_counter() - start}
+
+    if mirror_dir or offline:
+        info = fetch_dataset_file(handle, file_path, output, encoding=spec['encoding'], cache_dir=cache_dir,
+                                  mirror_dir=mirror_dir, offline=offline, force=force)
+        info.update(name=name, downloaded=0)
+        return info
+
+    downloaded, validators = 0, ref.get('archive_validators')
+    if force or stale or not os.path.exists(archive):
+        if stale and os.path.exists(f'{archive}.part'):
+            # 残留的 .part 可能属于旧版本，不能用来续传新版本
+            os.remove(f'{archive}.part')
+        result = download_resumable(url, archive, spec.get('size'), spec.get('sha256'),
+                                    headers=_auth_headers())
+        downloaded, validators = result['bytes'], result['validators']
+
+    archive_sha256 = file_sha256(archive)
+    if ref.get('archive_sha256') == archive_sha256 and ref.get('encoding') == spec['encoding']:
+        status = 'cached'
+    else:
+        with zipfile.ZipFile(archive) as zf:
+            try:
+                member = zf.open(file_path)
+            except KeyError:
+                raise DownloadError(f"压缩包 {archive} 中没有文件 {file_path}") from None
+            with member:
+                info = store_object(cache_dir, member, spec['encoding'])
+        ref = {'handle': handle, 'file_path': file_path, 'encoding': spec['encoding'],
+               'archive_sha256': archive_sha256, 'source_sha256': info['source_sha256'],
+               'sha256': info['sha256'], 'size': info['size']}
+        status = 'fetched'
+
+    ref['archive_validators'] = validators
+    write_output(cache_dir, ref, output)
+    return {'name': name, 'status': status, 'path': output, 'sha256': ref['sha256'], 'size': ref['size'],
+            'downloaded': downloaded, 'seconds': time.perf_counter() - start}
+
+
+def fetch_all(names: list = None, registry: dict = None, workers: int = 4, **options) -> list:
+    """
+    在线程池中并发获取多个数据集，单个数据集失败不影响其他数据集。
+
+    参数:
+        names (list): 要获取的数据集名称，默认为全部
+        registry (dict): 数据集注册表，默认为 REGISTRY
+        workers (int): 并发数
+        **options: 传递给 fetch_registered 的参数
+
+    返回:
+        list: 每个数据集的结果（失败时包含 'error'）
+    """
+    registry = registry or REGISTRY
+    names = names or list(registry)
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise KeyError(f"未注册的数据集: {unknown}，可用: {list(registry)}")
+
+    def run(name: str) -> dict:
+        try:
+            return fetch_registered(name, registry[name], **options)
+        except Exception as e:
+            return {'name': name, 'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as executor:
+        results = list(executor.map(run, names))
+
+    for result in results:
+        if result['status'] == 'failed':
+            print(f"[失败] {result['name']}: {result['error']}")
+        else:
+            print(f"[{result['status']}] {result['name']}: {result['path']} "
+                  f"（{result['size'] / 1e6:.2f} MB，下载 {result['downloaded'] / 1e6:.2f} MB，"
+                  f"{result['seconds']:.2f} 秒）")
+    print(f"共 {len(results)} 个数据集，耗时 {time.perf_counter() - start:.2f} 秒")
+    return results
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """支持单个 Range 请求的静态文件处理器，用作离线验证时的下载服务器替身。"""
+
+    def send_head(self):
+        range_header = self.headers.get('Range')
+        path = self.translate_path(self.path)
+        if not range_header or not os.path.isfile(path):
+            return super().send_head()
+
+        size = os.path.getsize(path)
+        start = int(range_header.split('=', 1)[1].split('-', 1)[0])
+        if start >= size:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.end_headers()
+            return None
+        f = open(path, 'rb')
+        f.seek(start)
+        self.send_response(206)
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Range', f'bytes {start}-{size - 1}/{size}')
+        self.send_header('Content-Length', str(size - start))
+        self.send_header('Last-Modified', self.date_time_string(os.path.getmtime(path)))
+        self.end_headers()
+        return f
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(root: str, port: int = 0) -> tuple:
+    """
+    在后台线程中启动本地 HTTP 替身服务器。
+
+    返回:
+        tuple: (server, base_url)；用完后调用 server.shutdown()
+    """
+    handler = lambda *args, **kwargs: RangeRequestHandler(*args, directory=root, **kwargs)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/'
+
+
+def self_test(workers: int = 4) -> bool:
+    """
+    离线验证：为每个注册数据集生成 latin1 编码的压缩包，通过本地替身服务器并发下载，
+    其中一个压缩包预置一半的 .part 以验证续传，最后校验输出内容、SHA256 和跳过逻辑，
+    以及服务器上的压缩包更新后 --refresh 只重新下载变化的数据集。
+    """
+    work_dir = tempfile.mkdtemp(prefix='fetch_all_')
+    try:
+        serve_root, cache_dir = os.path.join(work_dir, 'serve'), os.path.join(work_dir, 'cache')
+        registry, expected = {}, {}
+
+        def publish(name: str, spec: dict, rows: int) -> str:
+            text = 'name,value\n' + ''.join(f'café {name} {i},{i}\n' for i in range(rows))
+            archive = os.path.join(serve_root, *spec['handle'].split('/'))
+            os.makedirs(os.path.dirname(archive), exist_ok=True)
+            with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(spec['file_path'], text.encode('latin1'))
+            expected[name] = text.encode('utf-8')
+            return archive
+
+        for position, (name, spec) in enumerate(REGISTRY.items()):
+            archive = publish(name, spec, 2000 * (position + 1))
+            registry[name] = dict(spec, output=os.path.join(work_dir, 'out', f'{name}.csv'),
+                                  size=os.path.getsize(archive), sha256=file_sha256(archive))
+
+        # 预置一个只下载了一半的压缩包
+        first = next(iter(registry.values()))
+        with open(os.path.join(serve_root, *first['handle'].split('/')), 'rb') as f:
+            data = f.read()
+        partial = _archive_path(cache_dir, first['handle']) + '.part'
+        os.makedirs(os.path.dirname(partial), exist_ok=True)
+        with open(partial, 'wb') as f:
+            f.write(data[:len(data) // 2])
+
+        server, base_url = serve_directory(serve_root)
+        try:
+            results = fetch_all(registry=registry, workers=workers, cache_dir=cache_dir, base_url=base_url)
+            ok = all(r['status'] == 'fetched' for r in results)
+            ok &= results[0]['downloaded'] == len(data) - len(data) // 2
+            for name, spec in registry.items():
+                with open(spec['output'], 'rb') as f:
+                    content = f.read()
+                ok &= content == expected[name]
+                ok &= read_ref(cache_dir, spec['handle'], spec['file_path'])['sha256'] == \
+                    hashlib.sha256(expected[name]).hexdigest()
+            again = fetch_all(registry=registry, workers=workers, cache_dir=cache_dir, base_url=base_url)
+            ok &= all(r['status'] == 'current' for r in again)
+
+            # 服务器上的最后一个数据集更新后，--refresh 只重新下载它
+            updated = list(registry)[-1]
+            publish(updated, registry[updated], 500)
+            registry[updated].update(size=None, sha256=None)
+            refreshed = fetch_all(registry=registry, workers=workers, cache_dir=cache_dir, base_url=base_url,
+                                  refresh=True)
+            ok &= all(r['status'] == ('fetched' if r['name'] == updated else 'current') for r in refreshed)
+            with open(registry[updated]['output'], 'rb') as f:
+                ok &= f.read() == expected[updated]
+        finally:
+            server.shutdown()
+        print("自检通过" if ok else "自检失败")
+        return bool(ok)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="并发获取项目用到的全部数据集")
+    parser.add_argument('names', nargs='*', help=f"数据集名称，默认为全部: {', '.join(REGISTRY)}")
+    parser.add_argument('--workers', type=int, default=4, help="并发数，默认为 4")
+    parser.add_argument('--cache-dir', default=None, help="缓存目录")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help="下载地址前缀")
+    parser.add_argument('--mirror-dir', default=os.environ.get('DATASET_MIRROR_DIR'), help="本地镜像目录")
+    parser.add_argument('--offline', action='store_true', help="离线模式：只从镜像目录或缓存读取")
+    parser.add_argument('--force', action='store_true', help="忽略缓存记录，重新下载并写出")
+    parser.add_argument('--refresh', action='store_true',
+                        help="检查服务器上的压缩包（ETag/Last-Modified/大小），有更新时重新下载")
+    parser.add_argument('--self-test', action='store_true', help="用本地 HTTP 替身服务器离线自检")
+    args = parser.parse_args(argv)
+
+    if args.self_test:
+        return 0 if self_test(args.workers) else 1
+    results = fetch_all(args.names, workers=args.workers, cache_dir=args.cache_dir, base_url=args.base_url,
+                        mirror_dir=args.mirror_dir, offline=args.offline, force=args.force,
+                        refresh=args.refresh)
+    return 1 if any(r['status'] == 'failed' for r in results) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,256 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from load_curve_matrix import (SLOT_MINUTES, SLOTS_PER_DAY, _fill_missing, load_day_matrices,
+                               normalize_curves)
+from load_curve_store import ingest
+
+# 把所有日负荷曲线聚类为若干"典型日"（如工作日、周末、高温日）：
+#   - 在标准化后的日曲线上做 k-means（k-means++ 初始化）
+#   - 距离按批计算：|x - c|² = |x|² - 2x·c + |c|²，每批一次矩阵乘法，
+#     内存占用与批大小有关、与总天数无关，上万天的数据在单机上几秒完成
+#   - 输出聚类中心 CSV、每天的类别 CSV，以及每个类别一张汇总图
+#
+# 用法示例:
+#   python load_curve_clusters.py --k 4
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_DIR = os.path.join(SCRIPT_DIR, 'clusters')
+DEFAULT_BATCH_SIZE = 8192
+
+
+def _nearest(X: np.ndarray, centroids: np.ndarray, x_norms: np.ndarray,
+             batch_size: int = DEFAULT_BATCH_SIZE) -> tuple:
+    """按批计算每行到最近中心的编号和平方距离（x_norms 为预先计算的各行平方范数）。"""
+    c_norms = np.einsum('ij,ij->i', centroids, centroids)
+    labels = np.empty(len(X), dtype='int64')
+    dist = np.empty(len(X))
+    for lo in range(0, len(X), batch_size):
+        batch = X[lo:lo + batch_size]
+        d = c_norms - 2.0 * (batch @ centroids.T)
+        labels[lo:lo + batch_size] = d.argmin(axis=1)
+        dist[lo:lo + batch_size] = d[np.arange(len(batch)), labels[lo:lo + batch_size]]
+    dist += x_norms
+    return labels, np.maximum(dist, 0.0)
+
+
+def _kmeans_plus_plus(X: np.ndarray, k: int, rng: np.random.Generator, x_norms: np.ndarray) -> np.ndarray:
+    """
+    贪心 k-means++ 初始化：每一步按到已选中心的平方距离为概率抽取 2 + log(k) 个候选，
+    选择使总平方距离最小的一个，能明显减少陷入差的局部最优的情况。
+    """
+    n_trials = 2 + int(np.log(k))
+    centroids = np.empty((k, X.shape[1]))
+    first = rng.integers(len(X))
+    centroids[0] = X[first]
+    closest = np.maximum(x_norms - 2.0 * (X @ X[first]) + x_norms[first], 0.0)
+    for i in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            candidates = rng.integers(len(X), size=n_trials)
+        else:
+            candidates = np.searchsorted(np.cumsum(closest), rng.random(n_trials) * total)
+            candidates = np.minimum(candidates, len(X) - 1)
+        # (候选数 × 样本数) 的距离，一次矩阵乘法得到
+        cand_dist = np.maximum(x_norms - 2.0 * (X[candidates] @ X.T) + x_norms[candidates, None], 0.0)
+        cand_closest = np.minimum(closest, cand_dist)
+        best = cand_closest.sum(axis=1).argmin()
+        centroids[i] = X[candidates[best]]
+        closest = cand_closest[best]
+    return centroids
+
+
+def kmeans(X: np.ndarray, k: int, n_init: int = 4, max_iter: int = 100, tol: float = 1e-4,
+           seed: int = 0, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    矢量化 k-means（Lloyd 迭代），多次初始化取误差最小的结果。
+
+    参数:
+        X (numpy.ndarray): (样本数 × 维数) 矩阵
+        k (int): 类别数
+        n_init (int): 初始化次数
+        max_iter (int): 每次初始化的最大迭代次数
+        tol (float): 中心移动量（相对于数据方差）低于该值时停止
+        seed (int): 随机种子
+        batch_size (int): 距离计算的批大小
+
+    返回:
+        dict: {'labels', 'centroids', 'inertia', 'iterations'}
+    """
+    X = np.ascontiguousarray(X, dtype='float64')
+    if k > len(X):
+        raise ValueError(f"类别数 {k} 大于样本数 {len(X)}")
+    rng = np.random.default_rng(seed)
+    threshold = tol * X.var(axis=0).mean()
+    x_norms = np.einsum('ij,ij->i', X, X)
+    best = None
+
+    for _ in range(n_init):
+        centroids = _kmeans_plus_plus(X, k, rng, x_norms)
+        previous = None
+        for iteration in range(1, max_iter + 1):
+            labels, dist = _nearest(X, centroids, x_norms, batch_size)
+            # 分配不再变化时中心也不会变化，提前结束
+            if previous is not None and np.array_equal(labels, previous):
+                break
+            previous = labels
+            counts = np.bincount(labels, minlength=k)
+            sums = np.zeros_like(centroids)
+            _accumulate(sums, labels, X, batch_size)
+            new_centroids = sums / np.maximum(counts, 1)[:, None]
+            # 空类别用离自身中心最远的样本重新初始化
+            for empty in np.flatnonzero(counts == 0):
+                far = dist.argmax()
+                new_centroids[empty] = X[far]
+                dist[far] = 0.0
+            shift = ((new_centroids - centroids) ** 2).sum(axis=1).max()
+            centroids = new_centroids
+            if shift <= threshold:
+                break
+
+        labels, dist = _nearest(X, centroids, x_norms, batch_size)
+        inertia = float(dist.sum())
+        if best is None or inertia < best['inertia']:
+            best = {'labels': labels, 'centroids': centroids, 'inertia': inertia,
+                    'iterations': iteration}
+    return best
+
+
+def _accumulate(sums: np.ndarray, labels: np.ndarray, X: np.ndarray, batch_size: int) -> None:
+    """按批用 one-hot 矩阵乘法累加每个类别的样本和。"""
+    k = len(sums)
+    for lo in range(0, len(X), batch_size):
+        batch_labels = labels[lo:lo + batch_size]
+        one_hot = np.zeros((len(batch_labels), k))
+        one_hot[np.arange(len(batch_labels)), batch_labels] = 1.0
+        sums += one_hot.T @ X[lo:lo + batch_size]
+
+
+def cluster_days(dates: pd.DatetimeIndex, matrix: np.ndarray, k: int = 4, normalize: str = 'mean',
+                 seed: int = 0, temperature: np.ndarray = None) -> tuple:
+    """
+    把日负荷曲线聚类为典型日。
+
+    类别按平均负荷从低到高重新编号，使编号在不同运行之间保持稳定。
+
+    参数:
+        dates (pandas.DatetimeIndex): 各行对应的日期
+        matrix (numpy.ndarray): (天数 × 144) 负荷矩阵
+        k (int): 类别数
+        normalize (str): 聚类前的标准化方式（见 normalize_curves）
+        seed (int): 随机种子
+        temperature (numpy.ndarray): 可选，(天数 × 144) 温度矩阵，用于描述各类别
+
+    返回:
+        tuple: (每天类别的 DataFrame, 各类别中心的 DataFrame（原始单位）, kmeans 结果)
+    """
+    curves = _fill_missing(matrix)
+    result = kmeans(normalize_curves(curves, normalize), k, seed=seed)
+
+    # 按类别平均负荷排序并重新编号
+    counts = np.bincount(result['labels'], minlength=k)
+    level = np.bincount(result['labels'], weights=curves.mean(axis=1), minlength=k) / np.maximum(counts, 1)
+    order = np.argsort(level)
+    relabel = np.empty(k, dtype='int64')
+    relabel[order] = np.arange(k)
+    labels = relabel[result['labels']]
+    result['labels'] = labels
+    result['centroids'] = result['centroids'][order]
+
+    days = pd.DataFrame({'cluster': labels, 'weekday': dates.dayofweek,
+                         'mean_load': curves.mean(axis=1)}, index=dates)
+    if temperature is not None:
+        days['mean_temperature'] = np.nanmean(temperature, axis=1)
+
+    sums = np.zeros((k, curves.shape[1]))
+    np.add.at(sums, labels, curves)
+    slot_labels = [f'{m // 60:02d}:{m % 60:02d}' for m in range(0, SLOTS_PER_DAY * SLOT_MINUTES, SLOT_MINUTES)]
+    centroids = pd.DataFrame(sums / np.maximum(np.bincount(labels, minlength=k), 1)[:, None],
+                             columns=slot_labels)
+    centroids.index.name = 'cluster'
+    return days, centroids, result
+
+
+def summarize_clusters(days: pd.DataFrame) -> pd.DataFrame:
+    """每个类别的天数、周末占比、平均负荷和平均温度。"""
+    grouped = days.assign(weekend=days['weekday'] >= 5).groupby('cluster')
+    summary = grouped.agg(days=('weekday', 'size'), weekend_share=('weekend', 'mean'),
+                          mean_load=('mean_load', 'mean'))
+    if 'mean_temperature' in days.columns:
+        summary['mean_temperature'] = grouped['mean_temperature'].mean()
+    return summary
+
+
+def plot_clusters(days: pd.DataFrame, centroids: pd.DataFrame, matrix: np.ndarray, output_dir: str,
+                  max_curves: int = 400) -> list:
+    """
+    每个类别绘制一张图：灰色为该类别中的日曲线（最多 max_curves 条），蓝色为类别中心。
+
+    返回:
+        list: 保存的图片路径
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    hours = np.arange(SLOTS_PER_DAY) * SLOT_MINUTES / 60
+    summary = summarize_clusters(days)
+    labels = days['cluster'].to_numpy()
+    paths = []
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for cluster in centroids.index:
+        ax.clear()
+        members = matrix[labels == cluster][:max_curves]
+        if len(members):
+            ax.plot(hours, members.T, color='gray', alpha=0.15, linewidth=0.8)
+        ax.plot(hours, centroids.loc[cluster].to_numpy(), color='blue', linewidth=2.5, label='Centroid')
+        info = summary.loc[cluster]
+        ax.set_title(f"Cluster {cluster}: {int(info['days'])} days, "
+                     f"weekend {info['weekend_share']:.0%}", fontsize=16)
+        ax.set_xlabel('Hour of Day', fontsize=12)
+        ax.set_ylabel('Power Consumption', fontsize=12)
+        ax.set_xticks(range(0, 25, 3))
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
+        path = os.path.join(output_dir, f'cluster_{cluster}.png')
+        fig.savefig(path)
+        paths.append(path)
+    plt.close(fig)
+    return paths
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="把日负荷曲线聚类为典型日")
+    parser.add_argument('--k', type=int, default=4, help="类别数，默认为 4")
+    parser.add_argument('--normalize', default='mean', choices=['shape', 'mean', 'none'],
+                        help="聚类前的标准化方式，默认为除以当天均值")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help="输出目录，默认为 clusters")
+    args = parser.parse_args(argv)
+
+    ingest()
+    dates, matrices = load_day_matrices(['PowerConsumption', 'Temperature'])
+    power = matrices['PowerConsumption']
+
+    start = time.perf_counter()
+    days, centroids, result = cluster_days(dates, power, k=args.k, normalize=args.normalize,
+                                           seed=args.seed, temperature=matrices['Temperature'])
+    print(f"{len(days)} 天聚类为 {args.k} 类，迭代 {result['iterations']} 次，"
+          f"耗时 {time.perf_counter() - start:.3f} 秒")
+    print(summarize_clusters(days))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    centroids.to_csv(os.path.join(args.output_dir, 'centroids.csv'))
+    days.to_csv(os.path.join(args.output_dir, 'day_labels.csv'), index_label='Date')
+    paths = plot_clusters(days, centroids, _fill_missing(power), args.output_dir)
+    print(f"聚类结果和 {len(paths)} 张类别图已保存到: {args.output_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,303 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from load_curve_matrix import _fill_missing, load_day_matrices
+from load_curve_store import ingest
+
+# 基于天气的次日负荷预测（144 个 10 分钟时段）：
+#   - 特征在 (天数 × 144) 日矩阵上通过整行平移一次性构建：前一天/上周同一时段负荷、
+#     前一天平均负荷、星期、年内季节，以及目标时段的温度/湿度/风速
+#   - 每个时段一个岭回归模型，144 个模型通过批量求解 (特征数 × 特征数) 线性方程组一次训练完成
+#   - 滚动起点回测的各折在进程池中并行运行
+#   - forecast_next_day 用已存储的历史构建最后一天之后一天的滞后和日历特征，
+#     天气由调用方提供 (144 × 3) 的预报
+#
+# 用法示例:
+#   python load_curve_forecast.py                 # 回测，并预测数据中最后一天之后的一天
+#   python load_curve_forecast.py --weather-forecast forecast.csv   # 使用天气预报（Temperature/Humidity/WindSpeed 各 144 行）
+#   python load_curve_forecast.py --benchmark     # 输出特征构建、训练耗时、每秒预测数和次日预测耗时
+
+TARGET = 'PowerConsumption'
+WEATHER = ['Temperature', 'Humidity', 'WindSpeed']
+FEATURE_NAMES = (['load_lag_1d', 'load_lag_7d', 'mean_lag_1d']
+                 + [f'weekday_{d}' for d in range(1, 7)]
+                 + ['doy_sin', 'doy_cos', 'temperature', 'temperature_sq', 'humidity', 'wind_speed'])
+MAX_LAG_DAYS = 7
+
+
+def build_features(dates: pd.DatetimeIndex, matrices: dict) -> tuple:
+    """
+    构建预测特征。
+
+    参数:
+        dates (pandas.DatetimeIndex): 连续的日期（build_day_matrices 的输出）
+        matrices (dict): {列名: (天数 × 144) 矩阵}，需包含负荷和天气列
+
+    返回:
+        tuple: (X: (天数 × 144 × 特征数), y: (天数 × 144), valid: 每天是否具备完整特征的布尔数组)
+    """
+    load = _fill_missing(matrices[TARGET])
+    n_days, n_slots = load.shape
+    # 日期不连续时，按日期而不是行号计算滞后
+    day_number = (dates.to_numpy(dtype='datetime64[D]').astype('int64'))
+    position = np.full(day_number.max() - day_number.min() + 1 + MAX_LAG_DAYS, -1)
+    position[day_number - day_number.min() + MAX_LAG_DAYS] = np.arange(n_days)
+
+    def lagged(matrix: np.ndarray, days: int) -> tuple:
+        rows = position[day_number - day_number.min() + MAX_LAG_DAYS - days]
+        return matrix[np.maximum(rows, 0)], rows >= 0
+
+    lag_1d, has_1d = lagged(load, 1)
+    lag_7d, has_7d = lagged(load, 7)
+
+    X = np.empty((n_days, n_slots, len(FEATURE_NAMES)))
+    _fill_features(X, dates, lag_1d, lag_7d,
+                   [_fill_missing(matrices[col]) for col in WEATHER])
+
+    valid = has_1d & has_7d & ~np.isnan(matrices[TARGET]).any(axis=1)
+    return X, load, valid
+
+
+def _fill_features(X: np.ndarray, dates: pd.DatetimeIndex, lag_1d: np.ndarray, lag_7d: np.ndarray,
+                   weather: list) -> None:
+    """按 FEATURE_NAMES 的顺序把滞后负荷、日历和天气（温度/湿度/风速矩阵）写入 X。"""
+    X[:, :, 0] = lag_1d
+    X[:, :, 1] = lag_7d
+    X[:, :, 2] = lag_1d.mean(axis=1, keepdims=True)
+    weekday = dates.dayofweek.to_numpy()
+    for d in range(1, 7):
+        X[:, :, 2 + d] = (weekday == d)[:, None]
+    angle = 2 * np.pi * dates.dayofyear.to_numpy() / 365.25
+    X[:, :, 9] = np.sin(angle)[:, None]
+    X[:, :, 10] = np.cos(angle)[:, None]
+    temperature, humidity, wind_speed = weather
+    X[:, :, 11] = temperature
+    X[:, :, 12] = temperature ** 2
+    X[:, :, 13] = humidity
+    X[:, :, 14] = wind_speed
+
+
+class SlotRidgeForecaster:
+    """
+    每个时段一个岭回归模型，144 个模型批量训练和预测。
+
+    特征按时段标准化；训练时对每个时段求解 (XᵀX + αI) w = Xᵀy，
+    所有时段的方程组堆叠为 (144 × F × F) 后一次 np.linalg.solve 完成。
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> 'SlotRidgeForecaster':
+        """
+        参数:
+            X (numpy.ndarray): (天数 × 144 × 特征数)
+            y (numpy.ndarray): (天数 × 144)
+        """
+        self.mean_ = X.mean(axis=0)                           # (144 × F)
+        self.scale_ = X.std(axis=0)
+        self.scale_[self.scale_ == 0] = 1.0
+        self.y_mean_ = y.mean(axis=0)                         # (144,)
+        Z = (X - self.mean_) / self.scale_
+        gram = np.einsum('dsf,dsg->sfg', Z, Z)
+        gram += self.alpha * np.eye(Z.shape[2])
+        rhs = np.einsum('dsf,ds->sf', Z, y - self.y_mean_)
+        self.coef_ = np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """返回 (天数 × 144) 的预测负荷。"""
+        Z = (X - self.mean_) / self.scale_
+        return np.einsum('dsf,sf->ds', Z, self.coef_) + self.y_mean_
+
+
+def forecast_next_day(dates: pd.DatetimeIndex, matrices: dict, weather_forecast: np.ndarray,
+                      model: SlotRidgeForecaster = None, alpha: float = 1.0) -> tuple:
+    """
+    预测历史中最后一天的次日（dates[-1] + 1 天）144 个时段的负荷。
+
+    前一天/上周同一时段负荷和日历特征取自已存储的历史，天气取调用方提供的预报。
+
+    参数:
+        dates (pandas.DatetimeIndex): 历史日期（build_day_matrices 的输出）
+        matrices (dict): {列名: (天数 × 144) 矩阵}，需包含负荷列
+        weather_forecast (numpy.ndarray): (144 × 3) 次日天气预报，列依次为 Temperature/Humidity/WindSpeed
+        model (SlotRidgeForecaster): 已训练的模型，默认用历史中的全部有效天训练
+        alpha (float): 未传入 model 时的岭回归正则化系数
+
+    返回:
+        tuple: (预测日期 pandas.Timestamp, (144,) 预测负荷)
+    """
+    load = matrices[TARGET]
+    n_slots = load.shape[1]
+    weather_forecast = np.asarray(weather_forecast, dtype=float)
+    if weather_forecast.shape != (n_slots, len(WEATHER)):
+        raise ValueError(f"天气预报应为 ({n_slots} × {len(WEATHER)}) 数组（{'/'.join(WEATHER)}），"
+                         f"实际为 {weather_forecast.shape}")
+
+    target_date = dates[-1] + pd.Timedelta(days=1)
+    week_before = np.flatnonzero(dates == target_date - pd.Timedelta(days=MAX_LAG_DAYS))
+    if not len(week_before) or np.isnan(load[[-1, week_before[0]]]).all(axis=1).any():
+        raise ValueError(f"历史中缺少 {dates[-1].date()} 或 {(target_date - pd.Timedelta(days=MAX_LAG_DAYS)).date()} "
+                         f"的负荷，无法预测 {target_date.date()}")
+
+    if model is None:
+        X, y, valid = build_features(dates, matrices)
+        model = SlotRidgeForecaster(alpha).fit(X[valid], y[valid])
+
+    X = np.empty((1, n_slots, len(FEATURE_NAMES)))
+    _fill_features(X, pd.DatetimeIndex([target_date]), _fill_missing(load[-1:]),
+                   _fill_missing(load[week_before[:1]]), list(_fill_missing(weather_forecast.T)[:, None, :]))
+    return target_date, model.predict(X)[0]
+
+
+def rolling_origin_folds(n_days: int, initial: int = 180, horizon: int = 7, step: int = 7) -> list:
+    """
+    生成滚动起点回测的各折：每折用起点之前的全部天训练，预测之后 horizon 天。
+
+    返回:
+        list: [(训练结束位置, 测试结束位置), ...]（位置为在有效天中的序号）
+    """
+    return [(origin, min(origin + horizon, n_days)) for origin in range(initial, n_days, step)]
+
+
+# 回测工作进程中共享的特征，避免每折重复传输
+_SHARED = {}
+
+
+def _init_backtest(X: np.ndarray, y: np.ndarray, alpha: float) -> None:
+    _SHARED.update(X=X, y=y, alpha=alpha)
+
+
+def _run_fold(fold: tuple) -> dict:
+    origin, end = fold
+    X, y = _SHARED['X'], _SHARED['y']
+    start = time.perf_counter()
+    model = SlotRidgeForecaster(_SHARED['alpha']).fit(X[:origin], y[:origin])
+    train_seconds = time.perf_counter() - start
+    pred = model.predict(X[origin:end])
+    actual = y[origin:end]
+    return {'origin': origin, 'days': end - origin, 'train_seconds': train_seconds,
+            'mape': float(np.mean(np.abs(pred - actual) / np.abs(actual))),
+            'rmse': float(np.sqrt(np.mean((pred - actual) ** 2)))}
+
+
+def backtest(X: np.ndarray, y: np.ndarray, folds: list, alpha: float = 1.0, workers: int = None) -> pd.DataFrame:
+    """
+    滚动起点回测，各折在进程池中并行训练和评估。
+
+    参数:
+        X, y: 有效天的特征和目标（build_features 输出按 valid 筛选后）
+        folds (list): rolling_origin_folds 的输出
+        alpha (float): 岭回归正则化系数
+        workers (int): 进程数，默认为 CPU 核数；为 1 时在当前进程中运行
+
+    返回:
+        pandas.DataFrame: 每折的 origin/days/train_seconds/mape/rmse
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(folds) <= 1:
+        _init_backtest(X, y, alpha)
+        results = [_run_fold(fold) for fold in folds]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(folds)), initializer=_init_backtest,
+                                 initargs=(X, y, alpha)) as executor:
+            results = list(executor.map(_run_fold, folds))
+    return pd.DataFrame(results)
+
+
+def benchmark(dates: pd.DatetimeIndex, matrices: dict, alpha: float = 1.0, repeat: int = 20) -> dict:
+    """
+    测量特征构建时间、训练时间、每秒预测数（每个预测为一天 144 个时段）
+    和 forecast_next_day 的单次耗时（天气预报取最后一天的实测天气）。
+
+    返回:
+        dict: {'feature_seconds', 'train_seconds', 'forecasts_per_sec', 'next_day_seconds', 'days'}
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        X, y, valid = build_features(dates, matrices)
+    feature_seconds = (time.perf_counter() - start) / repeat
+    X, y = X[valid], y[valid]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model = SlotRidgeForecaster(alpha).fit(X, y)
+    train_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict(X)
+    predict_seconds = (time.perf_counter() - start) / repeat
+
+    weather_forecast = np.stack([matrices[col][-1] for col in WEATHER], axis=1)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        target_date, _forecast = forecast_next_day(dates, matrices, weather_forecast, model=model)
+    next_day_seconds = (time.perf_counter() - start) / repeat
+
+    stats = {'days': len(X), 'feature_seconds': feature_seconds, 'train_seconds': train_seconds,
+             'forecasts_per_sec': len(X) / predict_seconds, 'next_day_seconds': next_day_seconds}
+    print(f"特征构建: {feature_seconds * 1e3:.2f} 毫秒（{len(dates)} 天）")
+    print(f"训练 144 个时段模型: {train_seconds * 1e3:.2f} 毫秒（{len(X)} 天）")
+    print(f"预测吞吐量: {stats['forecasts_per_sec']:,.0f} 天/秒（每天 144 个时段）")
+    print(f"次日预测（{target_date.date()}）: {next_day_seconds * 1e3:.2f} 毫秒")
+    return stats
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="基于天气的次日负荷预测")
+    parser.add_argument('--alpha', type=float, default=1.0, help="岭回归正则化系数")
+    parser.add_argument('--initial', type=int, default=180, help="第一折的训练天数")
+    parser.add_argument('--horizon', type=int, default=7, help="每折预测的天数")
+    parser.add_argument('--workers', type=int, default=None, help="回测进程数，默认为 CPU 核数")
+    parser.add_argument('--weather-forecast', default=None,
+                        help="次日天气预报 CSV（Temperature/Humidity/WindSpeed 列，144 行），默认沿用最后一天的实测天气")
+    parser.add_argument('--benchmark', action='store_true', help="输出性能测试结果")
+    args = parser.parse_args(argv)
+
+    ingest()
+    dates, matrices = load_day_matrices([TARGET] + WEATHER)
+    if args.benchmark:
+        benchmark(dates, matrices, alpha=args.alpha)
+        return 0
+
+    X, y, valid = build_features(dates, matrices)
+    X, y, valid_dates = X[valid], y[valid], dates[valid]
+    folds = rolling_origin_folds(len(X) - 1, args.initial, args.horizon, args.horizon)
+
+    start = time.perf_counter()
+    results = backtest(X[:-1], y[:-1], folds, alpha=args.alpha, workers=args.workers)
+    print(f"滚动起点回测 {len(folds)} 折，耗时 {time.perf_counter() - start:.2f} 秒")
+    print(f"平均 MAPE: {results['mape'].mean():.2%}, 平均 RMSE: {results['rmse'].mean():.1f}")
+
+    # 检验次日预测路径：只用最后一天之前的历史预测最后一天（天气取当天实测值）
+    observed = np.stack([matrices[col][-1] for col in WEATHER], axis=1)
+    history = {col: matrix[:-1] for col, matrix in matrices.items()}
+    model = SlotRidgeForecaster(args.alpha).fit(X[valid_dates < dates[-1]], y[valid_dates < dates[-1]])
+    target_date, forecast = forecast_next_day(dates[:-1], history, observed, model=model)
+    if target_date == dates[-1]:
+        actual = matrices[TARGET][-1]
+        mape = np.nanmean(np.abs(forecast - actual) / np.abs(actual))
+        print(f"{target_date.date()} 预测 MAPE: {mape:.2%}，预测峰值 {forecast.max():.0f}，实际峰值 {np.nanmax(actual):.0f}")
+
+    # 用全部历史训练，预测数据之后的一天
+    if args.weather_forecast:
+        weather_forecast = pd.read_csv(args.weather_forecast)[WEATHER].to_numpy()
+    else:
+        print("未提供 --weather-forecast，次日天气沿用最后一天的实测值")
+        weather_forecast = observed
+    model = SlotRidgeForecaster(args.alpha).fit(X, y)
+    target_date, forecast = forecast_next_day(dates, matrices, weather_forecast, model=model)
+    print(f"{target_date.date()} 负荷预测：峰值 {forecast.max():.0f}（{forecast.argmax() * 10 // 60:02d}:"
+          f"{forecast.argmax() * 10 % 60:02d}），日均 {forecast.mean():.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
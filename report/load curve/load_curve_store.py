@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# 把 unique_dates_csv 下每天一个的 CSV 合并为按月分区的列式数据集：
+#   - 每个月一个 .npz 分区，包含 int64 纳秒时间戳和各测量列（float64）
+#   - manifest.json 记录每个日文件的 SHA256、大小和修改时间，
+#     重新导入时只解析有变化的日文件，只重写涉及的月份
+#
+# 用法示例:
+#   python load_curve_store.py                # 增量导入
+#   python load_curve_store.py --force        # 全部重新导入
+#
+# 读取:
+#   from load_curve_store import load_store
+#   df = load_store(start='2017-03-01', end='2017-04-01')
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV_DIR = os.path.join(SCRIPT_DIR, 'unique_dates_csv')
+DEFAULT_STORE_DIR = os.path.join(SCRIPT_DIR, '.load_curve_store')
+
+DATETIME_COLUMN = 'Datetime'
+DATETIME_FORMAT = '%m/%d/%Y %H:%M'
+MEASURES = ['Temperature', 'Humidity', 'WindSpeed', 'GeneralDiffuseFlows', 'DiffuseFlows',
+            'PowerConsumption']
+
+STORE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+INDEX_KEY = '__index__'
+DAY_NS = 24 * 3600 * 10**9
+
+
+def _month_of(file_name: str) -> str:
+    """日文件名形如 2017-01-07.csv，取前 7 个字符作为月份分区键。"""
+    return file_name[:7]
+
+
+def _partition_file(month: str) -> str:
+    return f'{month}.npz'
+
+
+def parse_day_bytes(data: bytes) -> tuple:
+    """
+    解析一个日文件的内容。
+
+    参数:
+        data (bytes): CSV 文件内容
+
+    返回:
+        tuple: (int64 纳秒时间戳数组, {列名: float64 数组})
+    """
+    df = pd.read_csv(io.BytesIO(data))
+    missing = [col for col in [DATETIME_COLUMN] + MEASURES if col not in df.columns]
+    if missing:
+        raise KeyError(f"缺少列 {missing}，可用列: {df.columns.tolist()}")
+    index = pd.to_datetime(df[DATETIME_COLUMN], format=DATETIME_FORMAT)
+    index_ns = index.to_numpy(dtype='datetime64[ns]').view('int64')
+    return index_ns, {col: df[col].to_numpy(dtype='float64') for col in MEASURES}
+
+
+def _read_day(path: str) -> dict:
+    """读取一个日文件：一次读入字节，同时计算校验和并解析。"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    stat = os.stat(path)
+    index_ns, values = parse_day_bytes(data)
+    return {'sha256': hashlib.sha256(data).hexdigest(), 'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns, 'rows': len(index_ns), 'index': index_ns, 'values': values}
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(store_dir: str) -> dict:
+    """读取 manifest.json，不存在、损坏或版本不符时返回空的清单。"""
+    try:
+        with open(os.path.join(store_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if not manifest or manifest.get('version') != STORE_VERSION:
+        return {'version': STORE_VERSION, 'columns': MEASURES, 'files': {}, 'partitions': {}}
+    return manifest
+
+
+def _write_manifest(store_dir: str, manifest: dict) -> None:
+    tmp_path = os.path.join(store_dir, f'{MANIFEST_FILE}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(store_dir, MANIFEST_FILE))
+
+
+def _read_partition(store_dir: str, month: str) -> tuple:
+    with np.load(os.path.join(store_dir, _partition_file(month))) as data:
+        return data[INDEX_KEY], {col: data[col] for col in MEASURES}
+
+
+def _write_partition(store_dir: str, month: str, index_ns: np.ndarray, values: dict) -> None:
+    """写入一个月的分区（先写临时文件再替换）。"""
+    path = os.path.join(store_dir, _partition_file(month))
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **{INDEX_KEY: index_ns}, **values)
+    os.replace(tmp_path, path)
+
+
+def _changed_files(csv_dir: str, names: list, manifest: dict, force: bool, workers: int) -> list:
+    """
+    找出需要重新解析的日文件。
+
+    大小和修改时间都与清单一致的文件直接视为未变化；否则再比对 SHA256，
+    只是被 touch 过而内容未变的文件只更新清单中的修改时间。
+    """
+    if force:
+        return list(names)
+    suspects = []
+    for name in names:
+        entry = manifest['files'].get(name)
+        stat = os.stat(os.path.join(csv_dir, name))
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            suspects.append(name)
+
+    changed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        digests = executor.map(lambda n: _file_sha256(os.path.join(csv_dir, n)), suspects)
+        for name, digest in zip(suspects, digests):
+            entry = manifest['files'].get(name)
+            if entry is not None and entry['sha256'] == digest:
+                entry['mtime_ns'] = os.stat(os.path.join(csv_dir, name)).st_mtime_ns
+            else:
+                changed.append(name)
+    return changed
+
+
+def ingest(csv_dir: str = DEFAULT_CSV_DIR, store_dir: str = DEFAULT_STORE_DIR,
+           workers: int = None, force: bool = False) -> dict:
+    """
+    并行读取日文件并增量更新按月分区的数据集。
+
+    参数:
+        csv_dir (str): 日文件所在目录
+        store_dir (str): 数据集目录
+        workers (int): 读取线程数，默认为 min(32, CPU 核数 + 4)
+        force (bool): 是否忽略清单、全部重新导入
+
+    返回:
+        dict: 导入统计（解析的日文件数、删除的日文件数、重写的月份、耗时）
+    """
+    start = time.perf_counter()
+    os.makedirs(store_dir, exist_ok=True)
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    manifest = read_manifest(store_dir)
+    if force:
+        manifest['files'], manifest['partitions'] = {}, {}
+
+    names = sorted(name for name in os.listdir(csv_dir) if name.endswith('.csv'))
+    changed = _changed_files(csv_dir, names, manifest, force, workers)
+    removed = sorted(set(manifest['files']) - set(names))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        parsed = dict(zip(changed, executor.map(lambda n: _read_day(os.path.join(csv_dir, n)), changed)))
+
+    dirty_months = sorted({_month_of(name) for name in changed + removed})
+    for month in dirty_months:
+        _rebuild_month(store_dir, manifest, month, parsed, removed)
+
+    for name in removed:
+        del manifest['files'][name]
+    for name, day in parsed.items():
+        manifest['files'][name] = {'sha256': day['sha256'], 'size': day['size'],
+                                   'mtime_ns': day['mtime_ns'], 'rows': day['rows'],
+                                   'month': _month_of(name)}
+    _write_manifest(store_dir, manifest)
+
+    stats = {'files': len(names), 'parsed': len(changed), 'removed': len(removed),
+             'months': dirty_months, 'seconds': time.perf_counter() - start}
+    print(f"共 {stats['files']} 个日文件，解析 {stats['parsed']} 个，删除 {stats['removed']} 个，"
+          f"重写 {len(dirty_months)} 个月份分区，耗时 {stats['seconds']:.2f} 秒")
+    return stats
+
+
+def _rebuild_month(store_dir: str, manifest: dict, month: str, parsed: dict, removed: list) -> None:
+    """
+    重写一个月的分区：保留已有分区中未变化日期的行，替换为新解析的日文件，
+    删除源文件已不存在的日期。
+    """
+    new_days = {name: day for name, day in parsed.items() if _month_of(name) == month}
+    drop_days = [name for name in removed if _month_of(name) == month] + list(new_days)
+
+    pieces = []
+    if month in manifest['partitions']:
+        index_ns, values = _read_partition(store_dir, month)
+        drop_ns = np.array([pd.Timestamp(name[:10]).value for name in drop_days], dtype='int64')
+        keep = ~np.isin(index_ns // DAY_NS * DAY_NS, drop_ns)
+        pieces.append((index_ns[keep], {col: values[col][keep] for col in MEASURES}))
+    pieces.extend((day['index'], day['values']) for day in new_days.values())
+
+    index_ns = np.concatenate([piece[0] for piece in pieces]) if pieces else np.empty(0, dtype='int64')
+    if not len(index_ns):
+        manifest['partitions'].pop(month, None)
+        path = os.path.join(store_dir, _partition_file(month))
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    order = np.argsort(index_ns, kind='stable')
+    values = {col: np.concatenate([piece[1][col] for piece in pieces])[order] for col in MEASURES}
+    index_ns = index_ns[order]
+    _write_partition(store_dir, month, index_ns, values)
+    manifest['partitions'][month] = {'file': _partition_file(month), 'rows': int(len(index_ns)),
+                                     'start': int(index_ns[0]), 'end': int(index_ns[-1])}
+
+
+def load_store(start=None, end=None, columns: list = None, store_dir: str = DEFAULT_STORE_DIR) -> pd.DataFrame:
+    """
+    从按月分区的数据集读取 [start, end) 时间范围的数据，只打开有重叠的月份分区。
+
+    参数:
+        start: 起始时间（包含），None 表示从头开始
+        end: 结束时间（不包含），None 表示到末尾
+        columns (list): 需要的列，默认为全部测量列
+        store_dir (str): 数据集目录
+
+    返回:
+        pandas.DataFrame: 以 Datetime 为索引的数据框
+    """
+    manifest = read_manifest(store_dir)
+    columns = columns or MEASURES
+    start_ns = None if start is None else pd.Timestamp(start).value
+    end_ns = None if end is None else pd.Timestamp(end).value
+
+    index_parts, value_parts = [], {col: [] for col in columns}
+    for month in sorted(manifest['partitions']):
+        info = manifest['partitions'][month]
+        if (start_ns is not None and info['end'] < start_ns) or (end_ns is not None and info['start'] >= end_ns):
+            continue
+        index_ns, values = _read_partition(store_dir, month)
+        lo = 0 if start_ns is None else np.searchsorted(index_ns, start_ns, side='left')
+        hi = len(index_ns) if end_ns is None else np.searchsorted(index_ns, end_ns, side='left')
+        index_parts.append(index_ns[lo:hi])
+        for col in columns:
+            value_parts[col].append(values[col][lo:hi])
+
+    if not index_parts:
+        return pd.DataFrame({col: np.empty(0) for col in columns},
+                            index=pd.DatetimeIndex([], name=DATETIME_COLUMN))
+    index = pd.DatetimeIndex(np.concatenate(index_parts).view('datetime64[ns]'), name=DATETIME_COLUMN)
+    return pd.DataFrame({col: np.concatenate(value_parts[col]) for col in columns}, index=index)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="把每日负荷曲线 CSV 导入为按月分区的列式数据集")
+    parser.add_argument('--csv-dir', default=DEFAULT_CSV_DIR, help="日文件目录，默认为 unique_dates_csv")
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR, help="数据集目录，默认为 .load_curve_store")
+    parser.add_argument('--workers', type=int, default=None, help="读取线程数")
+    parser.add_argument('--force', action='store_true', help="忽略清单，全部重新导入")
+    args = parser.parse_args(argv)
+
+    ingest(args.csv_dir, args.store_dir, workers=args.workers, force=args.force)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# 批量绘制每日负荷曲线图（graph_images/YYYY-MM-DD.png）：
+#   - 在进程池中并行绘制，使用无界面的 Agg 后端
+#   - 每个进程只创建一次画布和曲线，之后每天只更新数据和标题
+#   - 以"日文件内容 + 绘图参数"的哈希判断是否需要重绘，未变化的日期直接跳过
+#
+# 用法示例:
+#   python render_graph_images.py              # 只重绘有变化的日期
+#   python render_graph_images.py --force      # 全部重绘
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV_DIR = os.path.join(SCRIPT_DIR, 'unique_dates_csv')
+DEFAULT_OUTPUT_DIR = os.path.join(SCRIPT_DIR, 'graph_images')
+MANIFEST_FILE = '.render_manifest.json'
+
+DATETIME_FORMAT = '%m/%d/%Y %H:%M'
+
+# 绘图参数，修改后所有图片的哈希都会变化，下次运行时全部重绘
+PLOT_PARAMS = {
+    'column': 'PowerConsumption',
+    'figsize': [12, 6],
+    'dpi': 100,
+    'color': 'blue',
+    'label': 'Power Consumption',
+    'title': 'Power Consumption vs Time on {date}',
+    'title_fontsize': 16,
+    'xlabel': 'Time',
+    'ylabel': 'Power Consumption',
+    'label_fontsize': 12,
+    'grid': True
+}
+
+# 工作进程中复用的画布：(figure, axes, line)
+_CANVAS = None
+
+
+def _init_worker(params: dict) -> None:
+    """进程池初始化：切换到 Agg 后端，并创建本进程复用的画布和曲线。"""
+    global _CANVAS
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=params['figsize'], dpi=params['dpi'])
+    line, = ax.plot([], [], color=params['color'], label=params['label'])
+    ax.xaxis_date()
+    ax.set_xlabel(params['xlabel'], fontsize=params['label_fontsize'])
+    ax.set_ylabel(params['ylabel'], fontsize=params['label_fontsize'])
+    ax.legend()
+    ax.grid(params['grid'])
+    title = ax.set_title('', fontsize=params['title_fontsize'])
+    _CANVAS = (fig, ax, line, title)
+
+
+def render_day(csv_path: str, output_path: str, params: dict = PLOT_PARAMS) -> None:
+    """
+    在本进程复用的画布上绘制一天的负荷曲线并保存。
+
+    参数:
+        csv_path (str): 日文件路径
+        output_path (str): 输出 PNG 路径
+        params (dict): 绘图参数
+    """
+    import matplotlib.dates as mdates
+
+    if _CANVAS is None:
+        _init_worker(params)
+    fig, ax, line, title = _CANVAS
+
+    df = pd.read_csv(csv_path, usecols=['Datetime', params['column']])
+    times = pd.to_datetime(df['Datetime'], format=DATETIME_FORMAT).to_numpy()
+    line.set_data(mdates.date2num(times), df[params['column']].to_numpy())
+    ax.relim()
+    ax.autoscale_view()
+    date = os.path.splitext(os.path.basename(csv_path))[0]
+    title.set_text(params['title'].format(date=date))
+    fig.tight_layout()
+    fig.savefig(output_path)
+
+
+def _render_batch(tasks: list) -> list:
+    """在工作进程中依次绘制一批日期，返回每张图的 (日期, 耗时秒数, 错误信息)。"""
+    results = []
+    for date, csv_path, output_path in tasks:
+        start = time.perf_counter()
+        try:
+            render_day(csv_path, output_path)
+            results.append((date, time.perf_counter() - start, None))
+        except Exception as e:
+            results.append((date, time.perf_counter() - start, f'{type(e).__name__}: {e}'))
+    return results
+
+
+def input_hash(csv_path: str, params: dict = PLOT_PARAMS) -> str:
+    """日文件内容与绘图参数的 SHA256。"""
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8'))
+    with open(csv_path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _read_manifest(output_dir: str) -> dict:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(output_dir: str, manifest: dict) -> None:
+    tmp_path = os.path.join(output_dir, f'{MANIFEST_FILE}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(output_dir, MANIFEST_FILE))
+
+
+def render_all(csv_dir: str = DEFAULT_CSV_DIR, output_dir: str = DEFAULT_OUTPUT_DIR,
+               workers: int = None, force: bool = False, batch_size: int = 8) -> dict:
+    """
+    并行重绘所有输入有变化的日期。
+
+    参数:
+        csv_dir (str): 日文件目录
+        output_dir (str): 图片输出目录
+        workers (int): 进程数，默认为 CPU 核数
+        force (bool): 是否忽略清单、全部重绘
+        batch_size (int): 每个进程任务包含的日期数，减少进程间通信开销
+
+    返回:
+        dict: 统计信息（总日期数、绘制数、跳过数、失败列表、耗时、图片/秒）
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {} if force else _read_manifest(output_dir)
+
+    pending, hashes = [], {}
+    names = sorted(name for name in os.listdir(csv_dir) if name.endswith('.csv'))
+    for name in names:
+        date = os.path.splitext(name)[0]
+        csv_path = os.path.join(csv_dir, name)
+        output_path = os.path.join(output_dir, f'{date}.png')
+        hashes[date] = input_hash(csv_path)
+        if manifest.get(date) == hashes[date] and os.path.exists(output_path):
+            continue
+        pending.append((date, csv_path, output_path))
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    results = []
+    workers = min(workers or os.cpu_count() or 1, max(len(batches), 1))
+    if batches:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(PLOT_PARAMS,)) as executor:
+            for batch_results in executor.map(_render_batch, batches):
+                results.extend(batch_results)
+
+    failed = [(date, error) for date, _, error in results if error]
+    for date, _, error in results:
+        if error is None:
+            manifest[date] = hashes[date]
+        else:
+            manifest.pop(date, None)
+    _write_manifest(output_dir, manifest)
+
+    elapsed = time.perf_counter() - start
+    rendered = len(results) - len(failed)
+    stats = {'days': len(names), 'rendered': rendered, 'skipped': len(names) - len(pending),
+             'failed': failed, 'seconds': elapsed,
+             'images_per_sec': rendered / elapsed if elapsed > 0 else 0.0}
+
+    for date, error in failed:
+        print(f"[失败] {date}: {error}")
+    print(f"共 {stats['days']} 天，绘制 {rendered} 张，跳过未变化的 {stats['skipped']} 张，"
+          f"失败 {len(failed)} 张，耗时 {elapsed:.2f} 秒（{stats['images_per_sec']:.1f} 张/秒）")
+    return stats
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="并行绘制每日负荷曲线图，只重绘有变化的日期")
+    parser.add_argument('--csv-dir', default=DEFAULT_CSV_DIR, help="日文件目录，默认为 unique_dates_csv")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help="图片输出目录，默认为 graph_images")
+    parser.add_argument('--workers', type=int, default=None, help="并行进程数，默认为 CPU 核数")
+    parser.add_argument('--force', action='store_true', help="忽略清单，全部重绘")
+    args = parser.parse_args(argv)
+
+    stats = render_all(args.csv_dir, args.output_dir, workers=args.workers, force=args.force)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,267 @@
+import ast
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# 列表字面量字符串列（如 ingredients: "['onion', 'garlic']"）的解析器，替代逐行 ast.literal_eval：
+#   - 相同的单元格字符串只解析一次（pd.factorize 后只处理不同的取值，再按编码展开到各行）
+#   - 标准写法的单元格（repr 生成的 ['a', 'b']，不含转义和双引号）连接成一个字符串后用一次 str.split 切分；
+#     其他写法（双引号、转义、空格变化、尾逗号、裸 nan/None）由逐个记号扫描的分词器处理
+#   - 缺失值记号（nan、None，带引号或不带引号）作为整个元素丢弃；
+#     不做字符串替换，"banana"、"naan" 等包含 nan 的元素保持原样
+#   - 结果为扁平的 offsets + codes 表示（RaggedStrings），不再生成 Python 列表的列表
+#
+# 与原先 apply(safe_literal_eval) 的差异：只保留字符串元素（数字等非字符串元素原本也不参与统计），
+# 不是列表字面量的单元格和缺失单元格都视为空列表。
+
+MISSING_TOKENS = frozenset({'nan', 'NaN', 'None'})
+
+# 一个元素及其后的分隔符：单引号字符串 | 双引号字符串 | 裸记号（nan、None、数字、True/False）
+_ITEM = re.compile(r"""\s*(?:'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)"|([^\s,\[\]'"]+))\s*(,|\])""")
+_CLOSE = re.compile(r'\s*\]')
+_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_CANONICAL_SEPARATOR = "', '"
+# 连接单元格时使用的标记字符（\x00 会被 numpy 的字符串比较忽略，不能使用）
+_MARK = '\x1f'
+_BOUNDARY = "']" + _MARK + "['"
+
+
+def parse_list_literal(text) -> tuple:
+    """
+    解析一个列表字面量字符串。
+
+    参数:
+        text: 单元格内容
+
+    返回:
+        tuple: 字符串元素（已去掉缺失值记号和非字符串元素）；不是合法的列表字面量时返回 None
+    """
+    if not isinstance(text, str):
+        return None
+    s = text.strip()
+    if len(s) < 2 or s[0] != '[' or s[-1] != ']':
+        return None
+    if _CLOSE.fullmatch(s, 1):
+        return ()
+    items, pos, end = [], 1, len(s)
+    while True:
+        match = _ITEM.match(s, pos)
+        if match is None:
+            return None
+        single, double, bare, terminator = match.groups()
+        if bare is not None:
+            # 裸记号只允许缺失值、数字和布尔值（ast.literal_eval 能接受的非字符串元素）
+            if bare not in MISSING_TOKENS and bare not in ('True', 'False') and not _NUMBER.fullmatch(bare):
+                return None
+        else:
+            value = single if single is not None else double
+            if '\\' in value:
+                quote = "'" if single is not None else '"'
+                try:
+                    value = ast.literal_eval(quote + value + quote)
+                except (ValueError, SyntaxError):
+                    return None
+            if value not in MISSING_TOKENS:
+                items.append(value)
+        pos = match.end()
+        if terminator == ']':
+            return tuple(items) if pos == end else None
+        close = _CLOSE.match(s, pos)
+        if close is not None:
+            # 尾逗号："['a', ]"
+            return tuple(items) if close.end() == end else None
+
+
+class RaggedStrings:
+    """
+    字符串列表列的扁平表示：第 i 行的元素为 vocabulary[codes[offsets[i]:offsets[i + 1]]]。
+
+    参数:
+        offsets (numpy.ndarray): 长度为 行数 + 1 的 int64 起止位置
+        codes (numpy.ndarray): 所有元素在 vocabulary 中的编码（int32）
+        vocabulary (numpy.ndarray): 不同元素的取值（object 数组），按元素在数据中首次出现的顺序排列
+    """
+
+    def __init__(self, offsets: np.ndarray, codes: np.ndarray, vocabulary: np.ndarray):
+        self.offsets = offsets
+        self.codes = codes
+        self.vocabulary = vocabulary
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> list:
+        return self.vocabulary[self.codes[self.offsets[row]:self.offsets[row + 1]]].tolist()
+
+    def __repr__(self) -> str:
+        return f'RaggedStrings(rows={len(self)}, values={len(self.codes)}, vocabulary={len(self.vocabulary)})'
+
+    @property
+    def values(self) -> np.ndarray:
+        """所有元素按行顺序排列的扁平数组。"""
+        return self.vocabulary[self.codes]
+
+    def lengths(self) -> np.ndarray:
+        """每行的元素个数。"""
+        return np.diff(self.offsets)
+
+    def tolist(self) -> list:
+        """转换为 Python 列表的列表（只用于小数据或调试）。"""
+        if not len(self):
+            return []
+        return [values.tolist() for values in np.split(self.values, self.offsets[1:-1])]
+
+    def value_counts(self, normalize: bool = True) -> Counter:
+        """
+        统计每个元素出现的次数（一次 bincount）。
+
+        参数:
+            normalize (bool): 是否先把元素转为小写并去掉首尾空格再合并计数
+
+        返回:
+            collections.Counter: 键的顺序为元素在数据中首次出现的顺序（与逐个元素构建 Counter 相同）
+        """
+        codes, vocabulary = self.codes, self.vocabulary
+        if normalize and len(vocabulary):
+            # 词表按首次出现顺序排列，pd.factorize 合并后的编码同样按首次出现顺序
+            remap, vocabulary = pd.factorize(pd.Series(vocabulary, dtype=object).str.lower().str.strip())
+            codes = remap[codes]
+            vocabulary = np.asarray(vocabulary, dtype=object)
+        counts = np.bincount(codes, minlength=len(vocabulary))
+        present = np.flatnonzero(counts)
+        return Counter(dict(zip(vocabulary[present].tolist(), counts[present].tolist())))
+
+
+def _split_canonical(cells: list) -> tuple:
+    """
+    切分一批标准写法的单元格：连接后把单元格边界替换为 分隔符 + 标记字符，一次 str.split 得到全部元素，
+    除第一个单元格外，每个单元格的第一个元素带有标记前缀，标记在编码后的词表上识别并去掉。
+
+    返回:
+        tuple: (每个单元格的元素个数, 元素编码, 取值数组)；任何一个单元格不是标准写法时返回 None
+    """
+    if not cells:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), np.empty(0, dtype=object)
+    joined = _MARK.join(cells)
+    n = len(cells)
+    # 每个单元格以 [' 开头、以 '] 结尾，不含标记字符、反斜杠和双引号
+    if not (len(joined) >= 4 and joined.startswith("['") and joined.endswith("']") and joined.count(_MARK) == n - 1
+            and joined.count(_BOUNDARY) == n - 1 and '\\' not in joined and '"' not in joined):
+        return None
+    tokens = joined[2:-2].replace(_BOUNDARY, _CANONICAL_SEPARATOR + _MARK).split(_CANONICAL_SEPARATOR)
+    # 每个分隔符恰好包含两个单引号：除首尾两个外的单引号都用在分隔符上时，元素内不含单引号，
+    # 即每个单元格都是简单的 ['a', 'b'] 形式（排除 ['a']+['b'] 之类），单元格边界也不会被错误切分
+    if joined.count("'") - 2 != 2 * (len(tokens) - 1):
+        return None
+    codes, vocabulary = _factorize_strings(tokens)
+    marked = np.fromiter((value.startswith(_MARK) for value in vocabulary), dtype=bool, count=len(vocabulary))
+    starts = np.flatnonzero(marked[codes])
+    if len(starts):
+        remap, vocabulary = _factorize_strings([value[1:] if mark else value
+                                                for value, mark in zip(vocabulary.tolist(), marked)])
+        codes = remap[codes]
+    lengths = np.diff(np.concatenate([[0], starts, [len(tokens)]]))
+    return lengths, codes, vocabulary
+
+
+def _is_canonical(cell: str) -> bool:
+    return (cell.startswith("['") and cell.endswith("']") and '\\' not in cell and '"' not in cell
+            and _MARK not in cell and cell.count("'") == 2 * (cell.count(_CANONICAL_SEPARATOR) + 1))
+
+
+def _parse_unique_cells(cells: list) -> tuple:
+    """
+    解析不同的单元格字符串（已去掉缺失单元格）。
+
+    返回:
+        tuple: (每个单元格的元素个数, 按单元格顺序排列的元素编码, 取值数组)；非法单元格的元素个数为 0
+    """
+    n_cells = len(cells)
+    all_str = pd.api.types.infer_dtype(cells, skipna=False) in ('string', 'empty')
+    if all_str:
+        # 整列都是标准写法时（repr 写出的数据通常如此）不需要逐个单元格检查
+        split = _split_canonical(cells)
+        if split is not None:
+            return split
+
+    # 先挑出标准写法的单元格批量切分，其余逐个分词
+    is_str = np.ones(n_cells, dtype=bool) if all_str else np.fromiter(
+        (type(cell) is str for cell in cells), dtype=bool, count=n_cells)
+    canonical = np.fromiter((ok and _is_canonical(cell) for ok, cell in zip(is_str, cells)),
+                            dtype=bool, count=n_cells)
+    fast_index = np.flatnonzero(canonical)
+    split = _split_canonical([cells[i] for i in fast_index])
+    if split is None:
+        canonical[:] = False
+        fast_index, fast_lengths, fast_values = fast_index[:0], np.zeros(0, dtype=np.int64), []
+    else:
+        fast_lengths, fast_codes, fast_vocabulary = split
+        fast_values = fast_vocabulary[fast_codes].tolist()
+    slow_index = np.flatnonzero(is_str & ~canonical)
+    slow_items = [parse_list_literal(cells[i]) or () for i in slow_index]
+    slow_lengths = np.fromiter((len(items) for items in slow_items), dtype=np.int64, count=len(slow_items))
+    slow_values = [value for items in slow_items for value in items]
+
+    # 按单元格顺序合并两部分：每个元素放到 所属单元格的起点 + 在单元格内的位置
+    lengths = np.zeros(n_cells, dtype=np.int64)
+    lengths[fast_index] = fast_lengths
+    lengths[slow_index] = slow_lengths
+    starts = np.cumsum(lengths) - lengths
+    segment_lengths = np.concatenate([fast_lengths, slow_lengths])
+    owners = np.repeat(np.concatenate([fast_index, slow_index]), segment_lengths)
+    within = np.arange(len(owners)) - np.repeat(np.cumsum(segment_lengths) - segment_lengths, segment_lengths)
+    values = np.empty(len(owners), dtype=object)
+    values[starts[owners] + within] = fast_values + slow_values
+    return (lengths, *_factorize_strings(values.tolist()))
+
+
+def _factorize_strings(values: list) -> tuple:
+    """
+    按首次出现顺序给字符串编码。
+
+    用 dict.setdefault 记录每个字符串首次出现的位置（逐个查找在 C 中完成），
+    再把位置映射为连续编码，比对 object 数组调用 pd.factorize 更快。
+
+    返回:
+        tuple: (int32 编码, 取值数组)
+    """
+    first = {}
+    positions = np.fromiter(map(first.setdefault, values, range(len(values))), dtype=np.intp, count=len(values))
+    dense = np.empty(len(values), dtype=np.int32)
+    dense[np.fromiter(first.values(), dtype=np.intp, count=len(first))] = np.arange(len(first), dtype=np.int32)
+    vocabulary = np.empty(len(first), dtype=object)
+    vocabulary[:] = list(first)
+    return dense[positions], vocabulary
+
+
+def parse_list_column(column: pd.Series) -> RaggedStrings:
+    """
+    把列表字面量字符串列解析为 RaggedStrings。
+
+    参数:
+        column (pandas.Series): 如 df['ingredients']，缺失单元格视为空列表
+
+    返回:
+        RaggedStrings: 每行一个字符串列表
+    """
+    row_cells, unique_cells = pd.factorize(column)
+    unique_lengths, value_codes, vocabulary = _parse_unique_cells(np.asarray(unique_cells, dtype=object).tolist())
+
+    # 标准写法中带引号的缺失值记号（'nan'）在词表上识别，再从元素中去掉
+    missing = np.isin(vocabulary, list(MISSING_TOKENS))
+    if missing.any():
+        keep = ~missing[value_codes]
+        cell_of = np.repeat(np.arange(len(unique_lengths)), unique_lengths)
+        unique_lengths = np.bincount(cell_of[keep], minlength=len(unique_lengths))
+        remap = np.cumsum(~missing) - 1
+        value_codes, vocabulary = remap[value_codes[keep]], vocabulary[~missing]
+
+    # 按行展开：第 i 行复制其单元格取值对应的那一段；编码 -1（缺失单元格）取到末尾追加的空段
+    lengths = np.append(unique_lengths, 0)
+    starts = np.append(np.cumsum(unique_lengths) - unique_lengths, 0)
+    row_lengths = lengths[row_cells]
+    offsets = np.concatenate([[0], np.cumsum(row_lengths)]).astype(np.int64)
+    sources = np.repeat(starts[row_cells] - offsets[:-1], row_lengths) + np.arange(offsets[-1])
+    return RaggedStrings(offsets, value_codes[sources].astype(np.int32, copy=False), vocabulary)
@@ -1,11 +1,15 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import ast
 import os
-from collections import Counter
+import sys
 import numpy as np
 
+# Shared binned histogram/KDE engine lives one level up (report/distribution.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from distribution import histogram_kde, plot_histogram_kde
+from list_parser import parse_list_column
+
 # --- Configuration ---
 DATA_FILE = 'scripts/recipes_data.csv'
 REPORT_FILE = 'scripts/recipe_analysis_report.md'
@@ -14,43 +18,24 @@ TOP_N_CUISINE = 15
 TOP_N_INGREDIENTS = 20
 
 # --- Helper Functions ---
-def safe_literal_eval(s):
-    """Safely evaluate a string containing a Python literal (list)."""
-    try:
-        # Handle potential numpy nan strings within the list string representation
-        s = s.replace("nan", "None")
-        evaluated = ast.literal_eval(s)
-        if isinstance(evaluated, list):
-            # Replace None back to np.nan if needed, or handle specific strings like 'nan'
-            # For dietary_restrictions, specifically handle the ['nan'] case later
-            return evaluated
-        else:
-            return [] # Return empty list if not a list
-    except (ValueError, SyntaxError, TypeError):
-        return [] # Return empty list on error
-
 def ensure_dir(directory):
     """Ensure the directory exists."""
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-# --- Main Analysis Logic ---
-def analyze_recipes():
-    """Loads data, performs analysis, generates plots, and creates a report."""
-    print(f"开始分析 {DATA_FILE}...")
+# --- Analysis Stages ---
+def load_recipes(data_file=DATA_FILE):
+    """Load the raw recipe CSV."""
+    df = pd.read_csv(data_file)
+    print(f"成功加载数据，维度: {df.shape}")
+    return df
 
-    # 1. Load Data
-    try:
-        df = pd.read_csv(DATA_FILE)
-        print(f"成功加载数据，维度: {df.shape}")
-    except FileNotFoundError:
-        print(f"错误: 数据文件 {DATA_FILE} 未找到。")
-        return
-    except Exception as e:
-        print(f"加载数据时出错: {e}")
-        return
+def clean_recipes(df):
+    """Coerce numeric columns, parse list-like columns and derive total_time_minutes.
 
-    # 2. Clean Data
+    Returns the cleaned DataFrame, the NaN counts of the numeric columns after coercion and the
+    parsed list columns as RaggedStrings keyed by column name.
+    """
     print("开始数据清理...")
     numeric_cols = ['cooking_time_minutes', 'prep_time_minutes', 'servings', 'calories_per_serving']
     initial_nan_counts = df[numeric_cols].isna().sum()
@@ -64,12 +49,8 @@ def analyze_recipes():
     print("数值列转换后 NaN 统计:")
     print(cleaned_nan_counts)
 
-    # Parse list-like strings
-    df['ingredients_list'] = df['ingredients'].apply(safe_literal_eval)
-    df['dietary_restrictions_list'] = df['dietary_restrictions'].apply(safe_literal_eval)
-
-    # Specific handling for ['nan'] in dietary_restrictions
-    df['dietary_restrictions_list'] = df['dietary_restrictions_list'].apply(lambda x: [] if x == ['nan'] or x == [None] else x)
+    # Parse list-like strings into flat offsets + codes; nan/None entries (e.g. ['nan']) are dropped
+    lists = {col: parse_list_column(df[col]) for col in ['ingredients', 'dietary_restrictions']}
 
     # Clean cuisine names
     df['cuisine'] = df['cuisine'].str.lower().str.strip()
@@ -79,20 +60,58 @@ def analyze_recipes():
     print("计算派生列...")
     df['total_time_minutes'] = df['cooking_time_minutes'] + df['prep_time_minutes']
     print("派生列计算完成。")
+    return df, cleaned_nan_counts, lists
 
-
-    # 4. Analysis and Visualization
-    print("开始数据分析与可视化...")
-    ensure_dir(IMAGE_DIR) # Create image directory if it doesn't exist
+def aggregate_recipes(df, lists):
+    """Compute every table the plots and the report need."""
+    numeric_cols = ['cooking_time_minutes', 'prep_time_minutes', 'servings', 'calories_per_serving']
 
     # --- Descriptive Statistics ---
     print("计算描述性统计...")
     desc_stats = df[numeric_cols + ['total_time_minutes']].describe()
     print(desc_stats)
 
+    cuisine_groups = df.groupby('cuisine')
+    return {
+        'desc_stats': desc_stats,
+        'cuisine_counts': df['cuisine'].value_counts(),
+        'cuisine_avg_time': cuisine_groups['total_time_minutes'].mean().nlargest(TOP_N_CUISINE),
+        'cuisine_avg_calories': cuisine_groups['calories_per_serving'].mean().nlargest(TOP_N_CUISINE),
+        'ingredient_counts': lists['ingredients'].value_counts(),
+        'restriction_counts': lists['dietary_restrictions'].value_counts(),
+        # Binned histogram + FFT KDE, so the distribution plots never touch the raw rows
+        'total_time_dist': histogram_kde(df['total_time_minutes'], bins=30),
+        'calories_dist': histogram_kde(df['calories_per_serving'], bins=30),
+    }
+
+# --- Main Analysis Logic ---
+def analyze_recipes():
+    """Loads data, performs analysis, generates plots, and creates a report."""
+    print(f"开始分析 {DATA_FILE}...")
+
+    # 1. Load Data
+    try:
+        df = load_recipes(DATA_FILE)
+    except FileNotFoundError:
+        print(f"错误: 数据文件 {DATA_FILE} 未找到。")
+        return
+    except Exception as e:
+        print(f"加载数据时出错: {e}")
+        return
+
+    # 2. Clean Data
+    df, cleaned_nan_counts, lists = clean_recipes(df)
+
+
+    # 4. Analysis and Visualization
+    print("开始数据分析与可视化...")
+    ensure_dir(IMAGE_DIR) # Create image directory if it doesn't exist
+    agg = aggregate_recipes(df, lists)
+    desc_stats = agg['desc_stats']
+
     # --- Cuisine Analysis ---
     print("菜系分析...")
-    cuisine_counts = df['cuisine'].value_counts()
+    cuisine_counts = agg['cuisine_counts']
     top_cuisines = cuisine_counts.nlargest(TOP_N_CUISINE)
 
     plt.figure(figsize=(12, 7))
@@ -106,7 +125,7 @@ def analyze_recipes():
     plt.close()
     print(f"菜系数量图已保存至: {cuisine_counts_path}")
 
-    cuisine_avg_time = df.groupby('cuisine')['total_time_minutes'].mean().nlargest(TOP_N_CUISINE)
+    cuisine_avg_time = agg['cuisine_avg_time']
     plt.figure(figsize=(12, 7))
     sns.barplot(x=cuisine_avg_time.values, y=cuisine_avg_time.index, palette="viridis")
     plt.title(f'Top {TOP_N_CUISINE} 菜系平均总耗时 (分钟)')
@@ -118,7 +137,7 @@ def analyze_recipes():
     plt.close()
     print(f"菜系平均时间图已保存至: {cuisine_avg_time_path}")
 
-    cuisine_avg_calories = df.groupby('cuisine')['calories_per_serving'].mean().nlargest(TOP_N_CUISINE)
+    cuisine_avg_calories = agg['cuisine_avg_calories']
     plt.figure(figsize=(12, 7))
     sns.barplot(x=cuisine_avg_calories.values, y=cuisine_avg_calories.index, palette="viridis")
     plt.title(f'Top {TOP_N_CUISINE} 菜系平均每份卡路里')
@@ -134,7 +153,7 @@ def analyze_recipes():
     # --- Time/Calorie Analysis ---
     print("时间与卡路里分析...")
     plt.figure(figsize=(10, 6))
-    sns.histplot(df['total_time_minutes'].dropna(), kde=True, bins=30)
+    plot_histogram_kde(plt.gca(), agg['total_time_dist'])
     plt.title('食谱总耗时分布')
     plt.xlabel('总耗时 (分钟)')
     plt.ylabel('频数')
@@ -145,7 +164,7 @@ def analyze_recipes():
     print(f"总耗时分布图已保存至: {total_time_dist_path}")
 
     plt.figure(figsize=(10, 6))
-    sns.histplot(df['calories_per_serving'].dropna(), kde=True, bins=30)
+    plot_histogram_kde(plt.gca(), agg['calories_dist'])
     plt.title('每份卡路里分布')
     plt.xlabel('每份卡路里')
     plt.ylabel('频数')
@@ -169,8 +188,7 @@ def analyze_recipes():
 
     # --- Ingredient Analysis ---
     print("食材分析...")
-    all_ingredients = [ingredient.lower().strip() for sublist in df['ingredients_list'] for ingredient in sublist if isinstance(ingredient, str)]
-    ingredient_counts = Counter(all_ingredients)
+    ingredient_counts = agg['ingredient_counts']
     top_ingredients = ingredient_counts.most_common(TOP_N_INGREDIENTS)
 
     plt.figure(figsize=(12, 8))
@@ -186,8 +204,7 @@ def analyze_recipes():
 
     # --- Dietary Restriction Analysis ---
     print("饮食限制分析...")
-    all_restrictions = [restriction.lower().strip() for sublist in df['dietary_restrictions_list'] for restriction in sublist if isinstance(restriction, str)]
-    restriction_counts = Counter(all_restrictions)
+    restriction_counts = agg['restriction_counts']
 
     plt.figure(figsize=(10, 6))
     sns.barplot(x=list(restriction_counts.values()), y=list(restriction_counts.keys()), palette="rocket")
@@ -0,0 +1,268 @@
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import DATASETS
+
+# 用合成数据按不同规模运行各报告的流水线阶段，记录每个阶段的耗时、吞吐和内存峰值：
+#   - 每个规模先用 synthetic_data.py 生成数据文件（不计入阶段耗时），再依次运行
+#     加载 → 清洗 → 聚合 等阶段，阶段函数直接使用各报告脚本中的函数
+#   - 耗时和内存分两遍测量：tracemalloc 会拖慢 Python 代码，耗时只取不跟踪的那一遍
+#   - 相邻规模之间按 耗时 ∝ 规模^k 估计增长指数 k，k 明显大于 1 的阶段标记为超线性
+#   - 可把结果保存为 CSV，下次用 --baseline 对比，找出变慢的阶段
+#
+# 用法示例:
+#   python scaling_benchmark.py                                   # 全部数据集，1 倍和 10 倍
+#   python scaling_benchmark.py churn recipes --scales 1 10 100
+#   python scaling_benchmark.py --output bench.csv
+#   python scaling_benchmark.py --baseline bench.csv              # 与上次结果对比
+
+REPORT_DIR = os.path.dirname(os.path.abspath(__file__))
+for _folder in ('Customers churned in telecom services', 'Household Electricity Consumption',
+                'load curve', 'recipe analyze'):
+    sys.path.insert(0, os.path.join(REPORT_DIR, _folder))
+
+DEFAULT_SCALES = [1, 10]
+# 计时遍数（取每个阶段的最短耗时，减少毫秒级阶段的抖动）
+DEFAULT_REPEAT = 3
+# 增长指数超过该值的阶段标记为超线性
+SUPERLINEAR_EXPONENT = 1.3
+# 比基线慢超过该倍数的阶段标记为退化
+REGRESSION_RATIO = 1.25
+
+
+# 各数据集的流水线：生成器依次产出 (阶段名, 无参函数)，运行器把函数结果送回给下一个阶段
+
+def churn_pipeline(path: str, work_dir: str):
+    from churn_data import parse_churn_csv
+    from churn_analysis_report import aggregate, clean_data
+
+    raw = yield 'load', lambda: parse_churn_csv(path)
+    df = yield 'clean', lambda: clean_data(raw)
+    yield 'aggregate', lambda: aggregate(df)
+
+
+def household_pipeline(path: str, work_dir: str):
+    from power_analysis import load_power_data, preprocess_data
+    from power_anomaly import detect_anomalies
+    from power_rollups import build_rollups
+    from power_stream import DEFAULT_CHUNKSIZE
+
+    def load():
+        df = load_power_data(path, chunksize=DEFAULT_CHUNKSIZE)
+        if df is None:
+            raise RuntimeError(f"无法加载 {path}")
+        return df
+
+    raw = yield 'load', load
+    df = yield 'clean', lambda: preprocess_data(raw, float_dtype='float32')
+    yield 'rollups', lambda: build_rollups(df)
+    yield 'anomalies', lambda: detect_anomalies(df)
+
+
+def load_curve_pipeline(csv_dir: str, work_dir: str):
+    from load_curve_matrix import day_metrics, load_day_matrices
+    from load_curve_store import ingest
+
+    store_dir = os.path.join(work_dir, 'store')
+    yield 'ingest', lambda: ingest(csv_dir, store_dir, force=True)
+    dates, matrices = yield 'matrix', lambda: load_day_matrices(['PowerConsumption'], store_dir=store_dir)
+    yield 'metrics', lambda: day_metrics(dates, matrices['PowerConsumption'])
+
+
+def recipes_pipeline(path: str, work_dir: str):
+    from recipe_analyzer import aggregate_recipes, clean_recipes, load_recipes
+
+    raw = yield 'load', lambda: load_recipes(path)
+    df, _, lists = yield 'clean', lambda: clean_recipes(raw)
+    yield 'aggregate', lambda: aggregate_recipes(df, lists)
+
+
+PIPELINES = {
+    'churn': churn_pipeline,
+    'household': household_pipeline,
+    'load_curve': load_curve_pipeline,
+    'recipes': recipes_pipeline,
+}
+
+
+def _call(func, trace_memory: bool) -> tuple:
+    """运行一个阶段（屏蔽报告函数的打印），返回 (结果, 秒, 内存峰值 MB)。"""
+    if trace_memory:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+    seconds = time.perf_counter() - start
+    peak_mb = (tracemalloc.get_traced_memory()[1] - before) / 1e6 if trace_memory else np.nan
+    return result, seconds, peak_mb
+
+
+def run_pipeline(dataset: str, path: str, work_dir: str, trace_memory: bool = False) -> list:
+    """
+    依次运行一个数据集的全部阶段。
+
+    参数:
+        dataset (str): 数据集名称（PIPELINES 的键）
+        path (str): 合成数据文件（load_curve 为目录）
+        work_dir (str): 阶段可使用的临时目录
+        trace_memory (bool): 是否用 tracemalloc 记录每个阶段的内存峰值（Python 与 NumPy 分配）
+
+    返回:
+        list: 每个阶段一个 (阶段名, 秒, 内存峰值 MB)
+    """
+    pipeline = PIPELINES[dataset](path, work_dir)
+    timings = []
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        stage, func = next(pipeline)
+        while True:
+            result, seconds, peak_mb = _call(func, trace_memory)
+            timings.append((stage, seconds, peak_mb))
+            stage, func = pipeline.send(result)
+    except StopIteration:
+        pass
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    return timings
+
+
+def benchmark(datasets: list = None, scales: list = None, seed: int = 0, trace_memory: bool = True,
+              work_dir: str = None, repeat: int = DEFAULT_REPEAT) -> pd.DataFrame:
+    """
+    按各规模生成合成数据并运行流水线。
+
+    参数:
+        datasets (list): 数据集名称，默认为全部
+        scales (list): 相对仓库数据规模的倍数，默认为 [1, 10]
+        seed (int): 合成数据的随机种子
+        trace_memory (bool): 是否额外运行一遍记录内存峰值
+        work_dir (str): 存放合成数据的目录，默认为临时目录（结束后删除）
+        repeat (int): 计时遍数，每个阶段取最短耗时
+
+    返回:
+        pandas.DataFrame: 每个 (数据集, 规模, 阶段) 一行，包含 size、seconds、rows_per_sec、peak_mb
+    """
+    datasets = datasets or list(PIPELINES)
+    scales = scales or DEFAULT_SCALES
+    root = work_dir or tempfile.mkdtemp(prefix='scaling_benchmark_')
+    rows = []
+    try:
+        for dataset in datasets:
+            spec = DATASETS[dataset]
+            for scale in scales:
+                size = max(int(round(spec['base_size'] * scale)), 1)
+                run_dir = os.path.join(root, f'{dataset}-{size}')
+                os.makedirs(run_dir, exist_ok=True)
+                data_path = os.path.join(run_dir, 'data' if dataset == 'load_curve' else 'data.csv')
+                start = time.perf_counter()
+                spec['write'](data_path, size, seed)
+                print(f"{dataset} × {scale:g}: 已生成 {size:,} {spec['unit']}（{time.perf_counter() - start:.2f} 秒）")
+
+                runs = [run_pipeline(dataset, data_path, run_dir) for _ in range(max(repeat, 1))]
+                timings = [min(stage_runs, key=lambda t: t[1]) for stage_runs in zip(*runs)]
+                peaks = ([peak for _, _, peak in run_pipeline(dataset, data_path, run_dir, trace_memory=True)]
+                         if trace_memory else [np.nan] * len(timings))
+                for (stage, seconds, _), peak_mb in zip(timings, peaks):
+                    rows.append({'dataset': dataset, 'scale': scale, 'size': size, 'stage': stage,
+                                 'seconds': seconds, 'rows_per_sec': size / seconds if seconds else np.inf,
+                                 'peak_mb': peak_mb})
+                shutil.rmtree(run_dir, ignore_errors=True)
+    finally:
+        if work_dir is None:
+            shutil.rmtree(root, ignore_errors=True)
+    return pd.DataFrame(rows)
+
+
+def scaling_exponents(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    按相邻规模估计每个阶段的增长指数 k（耗时 ∝ 规模^k）。
+
+    返回:
+        pandas.DataFrame: 每个 (数据集, 阶段, 规模区间) 一行；k 大于 SUPERLINEAR_EXPONENT 时 superlinear 为 True
+    """
+    rows = []
+    for (dataset, stage), group in results.groupby(['dataset', 'stage'], sort=False):
+        group = group.sort_values('size')
+        sizes, seconds = group['size'].to_numpy(), group['seconds'].to_numpy()
+        for i in range(1, len(group)):
+            if sizes[i] == sizes[i - 1] or seconds[i - 1] <= 0:
+                continue
+            exponent = np.log(seconds[i] / seconds[i - 1]) / np.log(sizes[i] / sizes[i - 1])
+            rows.append({'dataset': dataset, 'stage': stage, 'from_size': sizes[i - 1], 'to_size': sizes[i],
+                         'exponent': exponent, 'superlinear': exponent > SUPERLINEAR_EXPONENT})
+    return pd.DataFrame(rows, columns=['dataset', 'stage', 'from_size', 'to_size', 'exponent', 'superlinear'])
+
+
+def compare_baseline(results: pd.DataFrame, baseline: pd.DataFrame) -> pd.DataFrame:
+    """
+    与之前保存的结果按 (数据集, 规模, 阶段) 对比耗时和内存峰值。
+
+    返回:
+        pandas.DataFrame: 包含 time_ratio、peak_ratio；time_ratio 大于 REGRESSION_RATIO 时 regression 为 True
+    """
+    keys = ['dataset', 'size', 'stage']
+    merged = results.merge(baseline[keys + ['seconds', 'peak_mb']], on=keys, suffixes=('', '_baseline'))
+    merged['time_ratio'] = merged['seconds'] / merged['seconds_baseline']
+    merged['peak_ratio'] = merged['peak_mb'] / merged['peak_mb_baseline']
+    merged['regression'] = merged['time_ratio'] > REGRESSION_RATIO
+    return merged[keys + ['seconds_baseline', 'seconds', 'time_ratio', 'peak_ratio', 'regression']]
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="用合成数据测试各报告流水线随数据规模的耗时和内存")
+    parser.add_argument('datasets', nargs='*', help=f"数据集（{', '.join(PIPELINES)}），默认为全部")
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES, help="相对仓库数据规模的倍数")
+    parser.add_argument('--seed', type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="计时遍数，每个阶段取最短耗时")
+    parser.add_argument('--no-memory', action='store_true', help="不运行记录内存峰值的第二遍")
+    parser.add_argument('--work-dir', default=None, help="存放合成数据的目录，默认为临时目录")
+    parser.add_argument('--output', default=None, help="把结果保存为 CSV")
+    parser.add_argument('--baseline', default=None, help="与之前保存的结果 CSV 对比")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.datasets) - set(PIPELINES))
+    if unknown:
+        parser.error(f"未知的数据集: {', '.join(unknown)}")
+
+    results = benchmark(args.datasets or None, args.scales, args.seed, not args.no_memory, args.work_dir,
+                        args.repeat)
+    with pd.option_context('display.width', 120, 'display.max_rows', None):
+        print("\n各阶段耗时:")
+        print(results.to_string(index=False, float_format=lambda v: f'{v:,.3f}'))
+
+        exponents = scaling_exponents(results)
+        if not exponents.empty:
+            print("\n增长指数（耗时 ∝ 规模^k）:")
+            print(exponents.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+            flagged = exponents[exponents['superlinear']]
+            for row in flagged.itertuples():
+                print(f"警告: {row.dataset}.{row.stage} 在 {row.from_size:,} → {row.to_size:,} 之间"
+                      f"超线性增长（k = {row.exponent:.2f}）")
+
+        if args.baseline:
+            comparison = compare_baseline(results, pd.read_csv(args.baseline))
+            print(f"\n与基线 {args.baseline} 对比:")
+            print(comparison.to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+            for row in comparison[comparison['regression']].itertuples():
+                print(f"警告: {row.dataset}.{row.stage}（{row.size:,}）比基线慢 {row.time_ratio:.2f} 倍")
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\n结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())